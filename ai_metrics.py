@@ -0,0 +1,190 @@
+"""
+AI Call Metrics
+In-process registry of AI overview calls (Perplexity in the app, OpenAI in
+weather.py): latency, prompt and completion tokens from the response's usage
+block, model, cache hit or miss and why a fallback was shown. Summaries give
+call counts, hit rates, latency percentiles, tokens and an estimated cost per
+provider and model, to tune prompt size and caching with real numbers.
+
+    with METRICS.track('openai', 'gpt-4o-mini') as call:
+        completion = client.chat.completions.create(...)
+        call.set_usage(completion.usage)
+
+The last MAX_CALLS calls are kept; export them with to_json() or to_csv().
+"""
+
+import csv
+import io
+import json
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+MAX_CALLS = 2000
+
+# USD per million (prompt, completion) tokens; update when prices change.
+# Perplexity's per-request search fee is not included.
+PRICES = {
+    'sonar': (1.0, 1.0),
+    'sonar-pro': (3.0, 15.0),
+    'gpt-4o-mini': (0.15, 0.60),
+    'gpt-4o': (2.50, 10.0),
+}
+
+FIELDS = ('time', 'provider', 'model', 'latency_ms', 'prompt_tokens', 'completion_tokens',
+          'cost_usd', 'cache', 'fallback', 'retries', 'error')
+
+
+def estimate_cost(model, prompt_tokens, completion_tokens):
+    """Estimated USD cost of a call, or None for unknown models or missing usage."""
+    price = PRICES.get(model)
+    if price is None or prompt_tokens is None or completion_tokens is None:
+        return None
+    return (prompt_tokens * price[0] + completion_tokens * price[1]) / 1_000_000
+
+
+class Call:
+    """One AI call being recorded; fill in what is known as it happens."""
+
+    def __init__(self, provider, model):
+        self.provider = provider
+        self.model = model
+        self.prompt_tokens = None
+        self.completion_tokens = None
+        self.cache = None       # 'hit', 'miss' or None where there is no cache
+        self.fallback = None    # e.g. 'no_key', 'quota', 'error', 'deadline'
+        self.retries = 0
+        self.error = None
+
+    def set_usage(self, usage):
+        """Token counts from a response usage block (dict or SDK object); ignores None."""
+        if usage is None:
+            return
+        get = usage.get if isinstance(usage, dict) else lambda name: getattr(usage, name, None)
+        self.prompt_tokens = get('prompt_tokens')
+        self.completion_tokens = get('completion_tokens')
+
+
+class MetricsRegistry:
+    """Thread-safe ring buffer of recorded calls."""
+
+    def __init__(self, max_calls=MAX_CALLS, clock=time.time, timer=time.perf_counter):
+        self.clock = clock
+        self.timer = timer
+        self._calls = deque(maxlen=max_calls)
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def track(self, provider, model):
+        """Time the block and record it as one call; exceptions are recorded and re-raised."""
+        call = Call(provider, model)
+        started = self.timer()
+        try:
+            yield call
+        except Exception as e:
+            call.error = str(e)
+            call.fallback = call.fallback or 'error'
+            raise
+        finally:
+            self._add(call, (self.timer() - started) * 1000)
+
+    def record(self, provider, model, latency_ms=None, **fields):
+        """Record a call (or a fallback event) that wasn't timed with track()."""
+        call = Call(provider, model)
+        for name, value in fields.items():
+            setattr(call, name, value)
+        self._add(call, latency_ms)
+
+    def _add(self, call, latency_ms):
+        row = {
+            'time': self.clock(),
+            'provider': call.provider,
+            'model': call.model,
+            'latency_ms': round(latency_ms, 1) if latency_ms is not None else None,
+            'prompt_tokens': call.prompt_tokens,
+            'completion_tokens': call.completion_tokens,
+            'cost_usd': estimate_cost(call.model, call.prompt_tokens, call.completion_tokens),
+            'cache': call.cache,
+            'fallback': call.fallback,
+            'retries': call.retries,
+            'error': call.error,
+        }
+        with self._lock:
+            self._calls.append(row)
+
+    def calls(self):
+        with self._lock:
+            return list(self._calls)
+
+    def clear(self):
+        with self._lock:
+            self._calls.clear()
+
+    def summary(self):
+        """One row per (provider, model): counts, cache hit rate, latency, tokens and cost."""
+        groups = {}
+        for row in self.calls():
+            groups.setdefault((row['provider'], row['model']), []).append(row)
+        rows = []
+        for (provider, model), calls in sorted(groups.items()):
+            # Latency of calls that went to the API (cache hits and skipped calls are near zero)
+            latencies = sorted(c['latency_ms'] for c in calls
+                               if c['latency_ms'] is not None and c['cache'] != 'hit' and c['fallback'] != 'no_key')
+            hits = sum(c['cache'] == 'hit' for c in calls)
+            misses = sum(c['cache'] == 'miss' for c in calls)
+            fallbacks = {}
+            for c in calls:
+                if c['fallback']:
+                    fallbacks[c['fallback']] = fallbacks.get(c['fallback'], 0) + 1
+            rows.append({
+                'provider': provider,
+                'model': model,
+                'calls': len(calls),
+                'cache_hit_rate': round(hits / (hits + misses), 3) if hits + misses else None,
+                'latency_p50_ms': _percentile(latencies, 0.5),
+                'latency_p95_ms': _percentile(latencies, 0.95),
+                'prompt_tokens': sum(c['prompt_tokens'] or 0 for c in calls),
+                'completion_tokens': sum(c['completion_tokens'] or 0 for c in calls),
+                'cost_usd': round(sum(c['cost_usd'] or 0.0 for c in calls), 6),
+                'fallbacks': ', '.join(f"{name}: {count}" for name, count in sorted(fallbacks.items())),
+            })
+        return rows
+
+    def to_json(self):
+        return json.dumps({'summary': self.summary(), 'calls': self.calls()}, indent=2)
+
+    def to_csv(self):
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=FIELDS)
+        writer.writeheader()
+        writer.writerows(self.calls())
+        return buffer.getvalue()
+
+
+def _percentile(values, q):
+    """Nearest-rank percentile of sorted values (None if empty)."""
+    if not values:
+        return None
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def format_summary(rows):
+    """Plain-text table of summary() rows for the CLI."""
+    if not rows:
+        return "No AI calls recorded."
+    lines = []
+    for r in rows:
+        p50 = f"{r['latency_p50_ms']:.0f}" if r['latency_p50_ms'] is not None else "n/a"
+        p95 = f"{r['latency_p95_ms']:.0f}" if r['latency_p95_ms'] is not None else "n/a"
+        hit_rate = f", cache hits {r['cache_hit_rate']:.0%}" if r['cache_hit_rate'] is not None else ""
+        lines.append(
+            f"{r['provider']}/{r['model']}: {r['calls']} calls{hit_rate}, latency p50 {p50} ms / p95 {p95} ms, "
+            f"{r['prompt_tokens']} prompt + {r['completion_tokens']} completion tokens, ~${r['cost_usd']:.4f}"
+            + (f", fallbacks {r['fallbacks']}" if r['fallbacks'] else "")
+        )
+    return "\n".join(lines)
+
+
+# The process-wide registry
+METRICS = MetricsRegistry()
@@ -0,0 +1,332 @@
+"""
+AI Overview Prompt
+The parts of the weather overview shared by the Streamlit app and the daily
+briefing job: the 48-hour hourly slice an overview is built from, the
+Perplexity request (plain and streamed), and the non-AI local overviews used in
+"Local Detailed" mode and as the fallback.
+
+Both callers must build the slice the same way (current_hour_index() and
+build_hourly_summary()) so that their overview cache keys match.
+"""
+
+import json
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List
+
+import requests
+
+from forecast_aggregates import aggregate_summary
+from prompt_compaction import compact_hourly
+from units import MM_PER_INCH
+
+
+# Bump when the overview prompt changes, so cached overviews from the old prompt aren't reused
+PROMPT_VERSION = 3
+PERPLEXITY_URL = "https://api.perplexity.ai/chat/completions"
+PERPLEXITY_MODEL = "sonar-pro"  # Perplexity's web-search enabled model
+
+
+def current_hour_index(times: List[str], utc_offset_seconds: int = 0, now: datetime = None) -> int:
+    """Index of the location's current local hour in the forecast (0 if none match).
+
+    `times` are the forecast's local "YYYY-MM-DDTHH:MM" strings (timezone=auto),
+    so "now" is shifted by the location's UTC offset and compared as a local
+    "YYYY-MM-DDTHH:00" string. The overview panel starts its slice here; the
+    briefing job passes a later `now` to build the slices the panel will ask
+    for in the coming hours.
+    """
+    now = (now or datetime.now(timezone.utc)).astimezone(timezone.utc)
+    current = (now + timedelta(seconds=utc_offset_seconds or 0)).strftime('%Y-%m-%dT%H:00')
+    for i, t in enumerate(times):
+        if t >= current:
+            return i
+    return 0
+
+
+def build_hourly_summary(hourly: Dict[str, Any], start_idx: int, hours_to_show: int = 24) -> List[Dict[str, Any]]:
+    """Extract a compact hourly slice for AI summarization (up to 24 hours)."""
+    times = hourly.get('time', [])
+    temps = hourly.get('temperature_2m', [])
+    codes = hourly.get('weather_code', [])
+    probs = hourly.get('precipitation_probability', [])
+    precips = hourly.get('precipitation', [])
+    end = min(len(times), start_idx + hours_to_show)
+    summary = []
+    for i in range(start_idx, end):
+        hour = {
+            'time': times[i],
+            'temp_f': temps[i] if i < len(temps) else None,
+            'wmo_code': codes[i] if i < len(codes) else None,
+            'precip_prob': probs[i] if i < len(probs) else None,
+            'precip_mm': precips[i] if i < len(precips) else None,
+        }
+        summary.append(hour)
+    return summary
+
+
+def _c(temp_f):
+    """Whole-degree Celsius for an overview line."""
+    return int(round((temp_f - 32) * 5 / 9))
+
+
+def build_local_overview(location: Dict[str, Any], hourly_slice: List[Dict[str, Any]]) -> str:
+    """Build a detailed, non-AI 2-day overview from hourly data (next 48 hours).
+    Includes likely precipitation hours per day and temperature ranges.
+    """
+    if not hourly_slice:
+        return "Local overview unavailable: missing hourly data."
+    city = location.get('city', 'Unknown')
+    region = location.get('region', '')
+    country = location.get('country', '')
+
+    # One pass over the window for per-day and per-period stats
+    aggregates = aggregate_summary(hourly_slice[:48])
+
+    lines = []
+    lines.append(f"**Detailed 2-Day Weather Overview for {city}, {region}, {country}**\n")
+    
+    for day in aggregates['days']:
+        # Parse day for better formatting
+        try:
+            day_dt = datetime.fromisoformat(day['date'])
+            day_name = day_dt.strftime('%A')
+            full_date = day_dt.strftime('%B %d, %Y')
+            day_header = f"🌨️ {day_name} — {full_date}"
+        except Exception:
+            day_header = f"📅 {day['date']}"
+        
+        lines.append(f"\n{day_header}")
+        lines.append("=" * 50)
+        
+        # Temperature analysis
+        if day['temp_min'] is not None:
+            tmin = int(round(day['temp_min']))
+            tmax = int(round(day['temp_max']))
+            
+            lines.append(f"\n🌡️ **Temperature Range:**")
+            lines.append(f"   • High: ~{tmax}°F ({_c(tmax)}°C)")
+            lines.append(f"   • Low: ~{tmin}°F ({_c(tmin)}°C)")
+            
+            # Temperature description
+            temp_range = tmax - tmin
+            if temp_range > 20:
+                lines.append(f"   • Significant temperature variation of {temp_range}°F throughout the day")
+            else:
+                lines.append(f"   • Relatively stable temperatures with {temp_range}°F variation")
+        else:
+            lines.append("\n🌡️ **Temperature Range:** Data unavailable")
+        
+        # Precipitation analysis
+        pmax = int(day['prob_max'])
+        total_mm = round(day['precip_total'], 2)
+        total_inches = round(total_mm / MM_PER_INCH, 2)
+        
+        lines.append(f"\n💧 **Precipitation:**")
+        lines.append(f"   • Maximum probability: {pmax}%")
+        lines.append(f"   • Total accumulation: ~{total_mm} mm ({total_inches} inches)")
+        
+        if day['precip_hours']:
+            lines.append(f"\n⏰ **Precipitation Timeline:** (Times with ≥25% chance or ≥0.5mm)")
+            
+            # Grouped by time of day
+            for period, heading in (
+                ('morning', "☀️ **Morning (6 AM - 11 AM):**"),
+                ('afternoon', "🌤️ **Afternoon (12 PM - 5 PM):**"),
+                ('evening', "🌙 **Evening (6 PM - 11 PM):**"),
+                ('night', "🌃 **Night (12 AM - 5 AM):**"),
+            ):
+                hours = day['periods'][period]['precip_hours']
+                if hours:
+                    lines.append(f"\n   {heading} {len(hours)} hour(s)")
+                    for h, p, m in hours:
+                        lines.append(f"      • {h}: {int(p)}% probability, {round(m, 2)} mm expected")
+            
+            # Summary
+            if pmax >= 70:
+                lines.append(f"\n   📌 **Alert:** High precipitation probability. Plan for wet conditions.")
+            elif pmax >= 40:
+                lines.append(f"\n   📌 **Note:** Moderate precipitation expected. Carry an umbrella.")
+            else:
+                lines.append(f"\n   📌 **Note:** Low to moderate precipitation chance.")
+        else:
+            lines.append(f"   • No significant precipitation expected")
+            lines.append(f"   📌 **Note:** Dry conditions expected throughout the day")
+        
+        lines.append("")  # Blank line between days
+    
+    # Overall summary
+    overall = aggregates['overall']
+    lines.append("\n" + "=" * 50)
+    lines.append("📊 **2-Day Summary:**")
+    
+    if overall['temp_min'] is not None:
+        lines.append(f"   • Overall temperature range: {int(round(overall['temp_min']))}°F to {int(round(overall['temp_max']))}°F")
+    
+    if overall['hours']:
+        avg_precip_prob = int(overall['prob_sum'] / overall['hours'])
+        total_precip_mm = round(overall['precip_total'], 2)
+        total_precip_in = round(total_precip_mm / MM_PER_INCH, 2)
+        lines.append(f"   • Average precipitation probability: {avg_precip_prob}%")
+        lines.append(f"   • Total 48-hour precipitation: {total_precip_mm} mm ({total_precip_in} inches)")
+    
+    return "\n".join(lines)
+
+
+def build_local_brief(location: Dict[str, Any], hourly_slice: List[Dict[str, Any]]) -> str:
+    """Short non-AI overview of the next 24 hours ("Local Detailed" overview mode)."""
+    if not hourly_slice:
+        return "Local overview unavailable: missing hourly data."
+    city = location.get('city', 'Unknown')
+    region = location.get('region', '')
+    country = location.get('country', '')
+    overall = aggregate_summary(hourly_slice[:24])['overall']
+    precip_hours = [f"{label} ({int(prob)}% / {round(amt, 2)} mm)" for label, prob, amt in overall['precip_hours']]
+    lines = []
+    lines.append(f"Detailed overview for {city}, {region}, {country}:")
+    if overall['temp_first'] is not None:
+        lines.append(f"- Temps: start ~{overall['temp_first']}°F; range {overall['temp_min']}–{overall['temp_max']}°F today.")
+    else:
+        lines.append("- Temps: data unavailable.")
+    lines.append(f"- Precipitation: max chance ~{int(overall['prob_max'])}%; total ~{round(overall['precip_total'], 2)} mm over the day.")
+    if precip_hours:
+        lines.append("- Likely precip hours: " + ", ".join(precip_hours[:12]) + ("…" if len(precip_hours) > 12 else ""))
+    else:
+        lines.append("- No significant precipitation expected based on current data.")
+    return "\n".join(lines)
+
+
+def is_quota_error(error) -> bool:
+    """True for rate limit / quota errors, which fall back to the local overview."""
+    msg = str(error).lower()
+    return 'insufficient_quota' in msg or 'code: 429' in msg or 'status code: 429' in msg or '429 client error' in msg
+
+
+def request_perplexity_overview(location: Dict[str, Any], hourly_slice: List[Dict[str, Any]], perplexity_api_key: str,
+                                call=None) -> str:
+    """One Perplexity request for an overview (uncached). Raises on HTTP and network errors.
+
+    Token usage is recorded on `call` (an ai_metrics.Call) when given.
+    """
+    response = requests.post(
+        PERPLEXITY_URL,
+        headers={"Authorization": f"Bearer {perplexity_api_key}", "Content-Type": "application/json"},
+        json=perplexity_payload(location, hourly_slice),
+        timeout=30
+    )
+    response.raise_for_status()
+    
+    result = response.json()
+    if call is not None:
+        call.set_usage(result.get('usage'))
+    return result['choices'][0]['message']['content']
+
+
+def stream_perplexity_overview(location: Dict[str, Any], hourly_slice: List[Dict[str, Any]], perplexity_api_key: str,
+                               call=None):
+    """Stream a Perplexity overview (server-sent events), yielding text chunks as they arrive.
+    
+    The timeout applies to the connection and to each gap between chunks, not the whole answer.
+    Events carry the usage so far, recorded on `call` (an ai_metrics.Call) when given.
+    """
+    with requests.post(
+        PERPLEXITY_URL,
+        headers={"Authorization": f"Bearer {perplexity_api_key}", "Content-Type": "application/json"},
+        json=perplexity_payload(location, hourly_slice, stream=True),
+        timeout=30,
+        stream=True
+    ) as response:
+        response.raise_for_status()
+        # SSE is UTF-8; without a charset requests would decode text/event-stream as ISO-8859-1
+        response.encoding = 'utf-8'
+        for line in response.iter_lines(decode_unicode=True):
+            # SSE: "data: {json}" lines, blank separators, "data: [DONE]" at the end
+            if not line or not line.startswith('data:'):
+                continue
+            data = line[5:].strip()
+            if data == '[DONE]':
+                break
+            event = json.loads(data)
+            if call is not None:
+                call.set_usage(event.get('usage'))
+            choices = event.get('choices') or []
+            text = (choices[0].get('delta') or {}).get('content') if choices else None
+            if text:
+                yield text
+
+
+def perplexity_payload(location: Dict[str, Any], hourly_slice: List[Dict[str, Any]], stream: bool = False) -> Dict[str, Any]:
+    """Chat completion request body for a 2-day overview of the hourly slice."""
+    city = location.get('city', 'Unknown')
+    region = location.get('region', '')
+    country = location.get('country', '')
+    
+    # Get current date for context
+    today = datetime.now().strftime('%B %d, %Y')
+
+    # Compact summary of the next 48 hours (periods, highs/lows, precipitation windows)
+    forecast_summary = compact_hourly(hourly_slice, hours=48)
+
+    system_msg = (
+        "You are a precise, thorough weather forecaster with access to real-time web information. "
+        "You will receive a summary of hourly weather data and transform it into a richly detailed, practical 2-day forecast "
+        "enriched with current web-based weather intelligence from trusted meteorological sources. "
+        "Use a natural, flowing narrative style with complete sentences and professional weather language. "
+        "Be explicit about when precipitation starts, peaks, and ends, using the precipitation windows you are given. "
+        "Only quote numbers that appear in the summary; never invent hourly values. "
+        "Leverage your web search capabilities to provide context about current weather patterns, systems, and trends."
+    )
+
+    user_msg = (
+        f"Location: {city}, {region}, {country}\n"
+        f"Date: {today}\n\n"
+        f"FORECAST SUMMARY (next 48 hours, local time):\n{forecast_summary}\n\n"
+        f"Using your web search capabilities, find current weather patterns, advisories, and meteorological context for {city}, {region}. "
+        f"Then create a comprehensive forecast using this EXACT format:\n\n"
+        f"🌨️ <DayName> — <Full Date (e.g., December 13, 2025)>\n"
+        f"==================================================\n\n"
+        f"**General**\n\n"
+        f"<2-3 complete sentences describing overall conditions, sky cover, and primary weather pattern for the day.>\n\n"
+        f"**Temperatures**\n\n"
+        f"🌡️ High: ~<high°F> (<high°C>)\n\n"
+        f"🌡️ Low: ~<low°F> (<low°C>) overnight\n\n"
+        f"<Additional sentence about temperature feel and trends.>\n\n"
+        f"**Precipitation Timeline**\n\n"
+        f"☀️ **Morning (6 AM - 11 AM):**\n"
+        f"<Natural narrative describing any precipitation window in the morning (start, peak chance and hour, end, total), or 'No precipitation expected.'>\n\n"
+        f"🌤️ **Afternoon (12 PM - 5 PM):**\n"
+        f"<Natural narrative describing any precipitation window in the afternoon (start, peak chance and hour, end, total), or 'Dry conditions.'>\n\n"
+        f"🌙 **Evening (6 PM - 11 PM):**\n"
+        f"<Natural narrative describing any precipitation window in the evening and how it changes, or 'Clear skies.'>\n\n"
+        f"🌃 **Night (12 AM - 5 AM):**\n"
+        f"<Natural narrative describing any overnight precipitation window, or 'No precipitation overnight.'>\n\n"
+        f"**Conditions**\n\n"
+        f"<Complete sentences about overall conditions based on the data patterns.>\n\n"
+        f"[Repeat exact same format for Day 2]\n\n"
+        f"==================================================\n\n"
+        f"**📊 2-Day Summary**\n\n"
+        f"<DayName>: <One-sentence summary highlighting key weather impacts.>\n\n"
+        f"<DayName>: <One-sentence summary highlighting key weather impacts.>\n\n"
+        f"<Additional summary sentence about overall pattern or temperatures.>\n\n"
+        f"CRITICAL FORMATTING RULES:\n"
+        f"- Use double line breaks between sections\n"
+        f"- Write in complete, natural sentences (not bullet points)\n"
+        f"- Break precipitation into 4 time periods: Morning/Afternoon/Evening/Night with emojis\n"
+        f"- Describe precipitation by window: start and end times, the peak chance and its hour, and the total "
+        f"(e.g. 'rain from 6 PM to 1 AM, peaking near 80% around 8 PM, about 7 mm')\n"
+        f"- Don't give hour-by-hour percentages; the summary only has each period's maximum and each window's peak\n"
+        f"- Use weather terminology: 'accumulating snow', 'lingering showers', 'tapering off'\n"
+        f"- Include transitions: 'developing', 'becomes steadier', 'continuing into'\n"
+        f"- Add separator lines (==================================================) for visual organization"
+    )
+
+    # Use Perplexity AI with web search to generate narrative forecast from hourly data
+    return {
+        "model": PERPLEXITY_MODEL,
+        "messages": [
+            {"role": "system", "content": system_msg},
+            {"role": "user", "content": user_msg},
+        ],
+        "temperature": 0.3,
+        "max_tokens": 3500,
+        "stream": stream,
+    }
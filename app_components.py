@@ -0,0 +1,110 @@
+"""
+Static Streamlit Components
+The radar viewer, the hourly strip and the page stylesheet are static files
+(components/ and static/) instead of HTML strings rebuilt on every rerun. The
+browser loads them once; each rerun only sends the component's small props
+(for the hourly strip, a few compact binary arrays).
+
+Static assets are served from /app/static (server.enableStaticServing in
+.streamlit/config.toml) with a ?v= query, which makes them long-lived in the
+browser cache. To serve Leaflet locally instead of from unpkg, copy
+leaflet.js, leaflet.css and images/ from the leaflet 1.9.4 dist/ folder into
+static/vendor/leaflet/; the radar viewer only requests it from there once
+leaflet.js is present.
+"""
+
+import html
+import os
+import sys
+from array import array
+from datetime import datetime, timezone
+
+import streamlit.components.v1 as components
+
+from units import is_missing
+
+COMPONENTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'components')
+LEAFLET_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static', 'vendor', 'leaflet')
+
+_radar_viewer = components.declare_component('radar_viewer', path=os.path.join(COMPONENTS_DIR, 'radar_viewer'))
+_page_style = components.declare_component('page_style', path=os.path.join(COMPONENTS_DIR, 'page_style'))
+_hourly_strip = components.declare_component('hourly_strip', path=os.path.join(COMPONENTS_DIR, 'hourly_strip'))
+
+
+def radar_viewer(location, variant='animated', height=520, key=None):
+    """Animated RainViewer radar centred on a location.
+
+    variant: 'animated' (2 hours past + nowcast) or 'recent' (last 4 frames).
+    Frames and tiles go through the caching proxy at RADAR_PROXY_URL when it is set
+    (see radar_proxy.py).
+    """
+    label = (f"<b>{html.escape(str(location.get('city', '')))}</b><br>"
+             f"{html.escape(str(location.get('region', '')))}, {html.escape(str(location.get('country', '')))}")
+    return _radar_viewer(
+        latitude=location['latitude'],
+        longitude=location['longitude'],
+        label=label,
+        variant=variant,
+        proxy=os.environ.get('RADAR_PROXY_URL', ''),
+        local_leaflet=os.path.exists(os.path.join(LEAFLET_DIR, 'leaflet.js')),
+        height=height,
+        key=key,
+        default=None,
+    )
+
+
+def page_style():
+    """Link static/app.css into the page (the stylesheet is fetched once and cached)."""
+    _page_style(key='page_style', default=None)
+
+
+def _pack(typecode, values):
+    """Little-endian bytes of a typed array (what the browser's typed arrays expect)."""
+    packed = array(typecode, values)
+    if sys.byteorder == 'big':
+        packed.byteswap()
+    return packed.tobytes()
+
+
+def pack_hourly_strip(times, temps, emojis, probs, amounts_in):
+    """Binary payload for hourly_strip() (temps already in the display unit).
+
+    Hours whose time can't be parsed are dropped; missing temperatures are sent as
+    NaN, missing probabilities as 0. Emojis are sent as indexes into a short list
+    of the distinct emojis used.
+    """
+    rows = []
+    for idx, time_str in enumerate(times):
+        try:
+            dt = datetime.fromisoformat(time_str)
+        except (TypeError, ValueError):
+            continue
+        temp = temps[idx] if idx < len(temps) else None
+        rows.append((
+            # Local wall-clock minutes; the browser reads them back with its UTC getters
+            int(dt.replace(tzinfo=timezone.utc).timestamp() // 60),
+            float('nan') if is_missing(temp) else float(temp),
+            emojis[idx] if idx < len(emojis) else "🌤️",
+            int(round((probs[idx] if idx < len(probs) else None) or 0)),
+            float((amounts_in[idx] if idx < len(amounts_in) else None) or 0.0),
+        ))
+
+    palette = sorted({row[2] for row in rows})
+    index = {emoji: i for i, emoji in enumerate(palette)}
+    return {
+        'times': _pack('i', [row[0] for row in rows]),
+        'temps': _pack('f', [row[1] for row in rows]),
+        'emoji': bytes(index[row[2]] for row in rows),
+        'emojis': palette,
+        'probs': bytes(min(max(row[3], 0), 255) for row in rows),
+        'amounts': _pack('f', [row[4] for row in rows]),
+    }
+
+
+def hourly_strip(payload, version, height=250, key=None):
+    """Scrollable hourly forecast cards, rendered in the browser from pack_hourly_strip() arrays.
+
+    version identifies the payload (e.g. dataset fingerprint, unit and start hour),
+    so the component only rebuilds its cards when the data changed.
+    """
+    return _hourly_strip(**payload, version=version, height=height, key=key, default=None)
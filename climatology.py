@@ -0,0 +1,366 @@
+"""
+Climatology Normals
+Backfills daily history from the Open-Meteo archive for tracked locations and
+precomputes day-of-year normals and percentiles, so the app can say "8°F above
+normal" from a small precomputed table instead of fetching years of history.
+
+Store layout (one directory per 0.25° grid cell, so nearby searches share it):
+
+    <store>/<lat>_<lon>/meta.json         location, years stored, normals info
+    <store>/<lat>_<lon>/<variable>.f32    float32 rows of 366 days, one row per year
+    <store>/<lat>_<lon>/normals.f32       float32 [variable][stat][366 days]
+
+Days are indexed by their position in a leap year (Feb 29 = 59, Mar 1 = 60 in
+every year); Feb 29 is NaN in non-leap years. Normals are aggregated one year
+row at a time over a +/- WINDOW_DAYS window around each day, into running
+sums and fixed-width histograms (see DayAccumulator).
+
+    python climatology.py backfill 40.71 -74.01 --years 30
+    python climatology.py lookup 40.71 -74.01 2024-07-04
+"""
+
+import json
+import math
+import os
+import sys
+from array import array
+from datetime import date
+
+import requests
+
+ARCHIVE_URL = "https://archive-api.open-meteo.com/v1/archive"
+
+# Daily archive variables (°F and mm, matching get_weather())
+VARIABLES = ('temperature_2m_max', 'temperature_2m_min', 'precipitation_sum')
+STATS = ('mean', 'p10', 'p50', 'p90')
+DAYS = 366
+WINDOW_DAYS = 7
+GRID = 0.25
+
+# Percentile histogram per variable: (lowest, highest, bin width); values outside are clamped
+HISTOGRAMS = {
+    'temperature_2m_max': (-100.0, 150.0, 0.25),  # °F
+    'temperature_2m_min': (-100.0, 150.0, 0.25),
+    'precipitation_sum': (0.0, 400.0, 0.2),       # mm
+}
+
+
+def day_index(day):
+    """Position of a date ("YYYY-MM-DD" or date) in a leap year, 0-365."""
+    if isinstance(day, str):
+        day = date.fromisoformat(day[:10])
+    return date(2000, day.month, day.day).timetuple().tm_yday - 1
+
+
+def cell_key(latitude, longitude, grid=GRID):
+    """Directory name of the grid cell a location falls in."""
+    lat = round(round(latitude / grid) * grid, 2)
+    lon = round(round(longitude / grid) * grid, 2)
+    return f"{lat:.2f}_{lon:.2f}"
+
+
+def year_rows(daily):
+    """Split an archive 'daily' block into {year: {variable: array('f') of 366}}."""
+    rows = {}
+    for i, day in enumerate(daily.get('time') or []):
+        year = int(day[:4])
+        if year not in rows:
+            rows[year] = {v: array('f', [math.nan]) * DAYS for v in VARIABLES}
+        index = day_index(day)
+        for variable in VARIABLES:
+            values = daily.get(variable) or []
+            value = values[i] if i < len(values) else None
+            if value is not None:
+                rows[year][variable][index] = value
+    return rows
+
+
+def fetch_archive_year(latitude, longitude, year, session=None, timeout=30):
+    """Fetch one year of daily archive data. Raises requests exceptions on HTTP errors."""
+    params = {
+        'latitude': latitude,
+        'longitude': longitude,
+        'start_date': f"{year}-01-01",
+        'end_date': f"{year}-12-31",
+        'daily': ','.join(VARIABLES),
+        'temperature_unit': 'fahrenheit',
+        'timezone': 'auto',
+    }
+    response = (session or requests).get(ARCHIVE_URL, params=params, timeout=timeout)
+    response.raise_for_status()
+    return response.json().get('daily') or {}
+
+
+class DayAccumulator:
+    """Streaming statistics of one variable for every day of the year.
+
+    A running count and sum per day give the mean, and a fixed-width histogram
+    per day gives the percentiles to within one bin width, so memory stays the
+    same however many years are aggregated.
+    """
+
+    def __init__(self, low, high, width):
+        self.low = low
+        self.width = width
+        self.bins = int(math.ceil((high - low) / width))
+        self.counts = array('I', [0]) * DAYS
+        self.sums = array('d', [0.0]) * DAYS
+        self.histogram = array('I', [0]) * (DAYS * self.bins)
+
+    def add(self, index, value):
+        self.counts[index] += 1
+        self.sums[index] += value
+        b = min(self.bins - 1, max(0, int((value - self.low) / self.width)))
+        self.histogram[index * self.bins + b] += 1
+
+    def mean(self, index):
+        count = self.counts[index]
+        return self.sums[index] / count if count else math.nan
+
+    def percentiles(self, index, qs):
+        """Percentiles (0-100, ascending) for a day, interpolated within their bin."""
+        count = self.counts[index]
+        if not count:
+            return [math.nan] * len(qs)
+        # Rank of each percentile's lower neighbour, as for a sorted list of the values
+        ranks = [int((count - 1) * q / 100.0) for q in qs]
+        results = []
+        seen = 0
+        base = index * self.bins
+        for b in range(self.bins):
+            in_bin = self.histogram[base + b]
+            if not in_bin:
+                continue
+            while len(results) < len(ranks) and ranks[len(results)] < seen + in_bin:
+                rank = ranks[len(results)]
+                results.append(self.low + self.width * (b + (rank - seen + 0.5) / in_bin))
+            seen += in_bin
+            if len(results) == len(ranks):
+                break
+        return results
+
+
+def compute_normals(row_source, window_days=WINDOW_DAYS):
+    """Aggregate year rows into normals, reading one row at a time.
+
+    Args:
+        row_source: Iterable of {variable: 366 values} rows (one per year)
+        window_days: Days either side of each day that count towards its normals
+
+    Returns ({variable: {stat: array('f') of 366}}, years aggregated).
+    """
+    accumulators = {v: DayAccumulator(*HISTOGRAMS[v]) for v in VARIABLES}
+    years = 0
+
+    for row in row_source:
+        years += 1
+        for variable in VARIABLES:
+            series = row[variable]
+            accumulator = accumulators[variable]
+            for index in range(DAYS):
+                value = series[index]
+                if math.isnan(value):
+                    continue
+                for offset in range(-window_days, window_days + 1):
+                    accumulator.add((index + offset) % DAYS, value)
+
+    normals = {}
+    for variable in VARIABLES:
+        accumulator = accumulators[variable]
+        table = {stat: array('f', [math.nan]) * DAYS for stat in STATS}
+        for index in range(DAYS):
+            if not accumulator.counts[index]:
+                continue
+            table['mean'][index] = accumulator.mean(index)
+            table['p10'][index], table['p50'][index], table['p90'][index] = accumulator.percentiles(index, (10, 50, 90))
+        normals[variable] = table
+    return normals, years
+
+
+class Normals:
+    """Precomputed normals for one grid cell."""
+
+    def __init__(self, tables, meta):
+        self.tables = tables
+        self.meta = meta
+
+    def get(self, variable, day, stat='mean'):
+        """Normal value for a date, or None if there is no data."""
+        value = self.tables[variable][stat][day_index(day)]
+        return None if math.isnan(value) else value
+
+    def anomaly(self, variable, day, value):
+        """How far a value is from the normal (value - mean), or None."""
+        normal = self.get(variable, day)
+        if normal is None or value is None:
+            return None
+        return value - normal
+
+
+class ClimatologyStore:
+    """Directory of per-cell year rows and normals tables."""
+
+    def __init__(self, root):
+        self.root = root
+        self._normals = {}  # cell -> (normals.f32 mtime, Normals)
+
+    def cell_dir(self, latitude, longitude):
+        return os.path.join(self.root, cell_key(latitude, longitude))
+
+    def _read_meta(self, cell):
+        try:
+            with open(os.path.join(cell, 'meta.json'), encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def _write_meta(self, cell, meta):
+        tmp = os.path.join(cell, 'meta.json.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(meta, f, indent=2)
+        os.replace(tmp, os.path.join(cell, 'meta.json'))
+
+    def iter_rows(self, latitude, longitude):
+        """Yield stored year rows one at a time ({variable: array('f')})."""
+        cell = self.cell_dir(latitude, longitude)
+        meta = self._read_meta(cell)
+        if not meta or meta.get('last_year') is None:
+            return
+        handles = {v: open(os.path.join(cell, f"{v}.f32"), 'rb') for v in VARIABLES}
+        try:
+            for _ in range(meta['first_year'], meta['last_year'] + 1):
+                row = {}
+                for variable, handle in handles.items():
+                    row[variable] = array('f')
+                    row[variable].fromfile(handle, DAYS)
+                yield row
+        finally:
+            for handle in handles.values():
+                handle.close()
+
+    def append_year(self, latitude, longitude, year, row):
+        """Append one year row; years must be added in order without gaps."""
+        cell = self.cell_dir(latitude, longitude)
+        os.makedirs(cell, exist_ok=True)
+        meta = self._read_meta(cell) or {
+            'latitude': latitude, 'longitude': longitude,
+            'variables': list(VARIABLES), 'first_year': year, 'last_year': None,
+        }
+        if meta['last_year'] is not None and year != meta['last_year'] + 1:
+            raise ValueError(f"Expected year {meta['last_year'] + 1}, got {year}")
+        for variable in VARIABLES:
+            with open(os.path.join(cell, f"{variable}.f32"), 'ab') as f:
+                row[variable].tofile(f)
+        meta['last_year'] = year
+        self._write_meta(cell, meta)
+
+    def backfill(self, latitude, longitude, start_year, end_year, fetch=fetch_archive_year, progress=None):
+        """Fetch and store missing years up to end_year, then recompute the normals.
+
+        Resumes after the last stored year, so re-running only fetches new years.
+        Returns the number of years fetched.
+        """
+        meta = self._read_meta(self.cell_dir(latitude, longitude))
+        if meta and meta.get('last_year') is not None:
+            start_year = meta['last_year'] + 1
+
+        fetched = 0
+        session = requests.Session() if fetch is fetch_archive_year else None
+        for year in range(start_year, end_year + 1):
+            daily = fetch(latitude, longitude, year, session=session)
+            row = year_rows(daily).get(year) or {v: array('f', [math.nan]) * DAYS for v in VARIABLES}
+            self.append_year(latitude, longitude, year, row)
+            fetched += 1
+            if progress:
+                progress(year)
+
+        if fetched or not os.path.exists(os.path.join(self.cell_dir(latitude, longitude), 'normals.f32')):
+            self.write_normals(latitude, longitude)
+        return fetched
+
+    def write_normals(self, latitude, longitude, window_days=WINDOW_DAYS):
+        """Recompute and store the normals table for a cell."""
+        cell = self.cell_dir(latitude, longitude)
+        normals, years = compute_normals(self.iter_rows(latitude, longitude), window_days)
+        with open(os.path.join(cell, 'normals.f32'), 'wb') as f:
+            for variable in VARIABLES:
+                for stat in STATS:
+                    normals[variable][stat].tofile(f)
+        meta = self._read_meta(cell)
+        meta['normals'] = {'stats': list(STATS), 'window_days': window_days, 'years': years}
+        self._write_meta(cell, meta)
+        self._normals.pop(cell, None)
+
+    def normals(self, latitude, longitude):
+        """Normals for the cell containing a location, or None if it hasn't been backfilled.
+
+        Loaded tables are kept until their file changes; misses aren't cached, so
+        a cell backfilled later (e.g. by the CLI) shows up without a restart.
+        """
+        cell = self.cell_dir(latitude, longitude)
+        try:
+            mtime = os.stat(os.path.join(cell, 'normals.f32')).st_mtime_ns
+        except FileNotFoundError:
+            return None
+        cached = self._normals.get(cell)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        meta = self._read_meta(cell)
+        if not meta or not meta.get('normals'):
+            return None
+        tables = {}
+        with open(os.path.join(cell, 'normals.f32'), 'rb') as f:
+            for variable in VARIABLES:
+                tables[variable] = {}
+                for stat in STATS:
+                    tables[variable][stat] = array('f')
+                    tables[variable][stat].fromfile(f, DAYS)
+        result = Normals(tables, meta)
+        self._normals[cell] = (mtime, result)
+        return result
+
+
+def _parse_args(argv):
+    """Positional args and --years; raises ValueError for a missing or invalid --years value."""
+    args = list(argv)
+    years = 30
+    if '--years' in args:
+        i = args.index('--years')
+        if i + 1 >= len(args):
+            raise ValueError("--years needs a value")
+        value = args.pop(i + 1)
+        args.pop(i)
+        try:
+            years = int(value)
+        except ValueError:
+            raise ValueError(f"--years needs a whole number, got {value!r}") from None
+        if years < 1:
+            raise ValueError(f"--years needs a positive number, got {value!r}")
+    return args, years
+
+
+if __name__ == "__main__":
+    try:
+        args, years = _parse_args(sys.argv[1:])
+    except ValueError as e:
+        print(f"❌ {e}")
+        args, years = [], None
+    store = ClimatologyStore(os.environ.get('CLIMATOLOGY_STORE', 'climatology'))
+    if len(args) == 3 and args[0] == 'backfill':
+        lat, lon = float(args[1]), float(args[2])
+        last = date.today().year - 1
+        count = store.backfill(lat, lon, last - years + 1, last, progress=lambda y: print(f"  {y}"))
+        print(f"✅ Stored {count} new years for cell {cell_key(lat, lon)}")
+    elif len(args) == 4 and args[0] == 'lookup':
+        normals = store.normals(float(args[1]), float(args[2]))
+        if not normals:
+            print("❌ Location not backfilled yet")
+        else:
+            for variable in VARIABLES:
+                values = {s: normals.get(variable, args[3], s) for s in STATS}
+                print(f"{variable}: " + ', '.join(
+                    f"{s} {v:.1f}" if v is not None else f"{s} n/a" for s, v in values.items()))
+    else:
+        print("Usage: python climatology.py backfill <lat> <lon> [--years 30]")
+        print("       python climatology.py lookup <lat> <lon> <YYYY-MM-DD>   (uses CLIMATOLOGY_STORE)")
+        sys.exit(1)
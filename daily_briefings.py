@@ -0,0 +1,210 @@
+"""
+Daily Briefings
+Precomputes the AI overviews for a list of subscribed locations into the
+overview cache, so the morning's page loads for those cities are cache hits
+instead of Perplexity calls. Run it from cron after the morning model runs.
+
+Forecasts are fetched in bulk (Open-Meteo takes comma-separated coordinate
+lists), then overviews are generated on a small thread pool with a rate limit
+on the AI calls. Keys are built exactly as the overview panel builds them
+(current_hour_index, build_hourly_summary, overview_key with PROMPT_VERSION),
+and because the panel's slice starts at the current hour, each location gets
+one overview per upcoming hour (--hours). Locations already cached are skipped.
+
+The location list is a JSON file (BRIEFING_LOCATIONS) of objects with city,
+region, country, latitude and longitude. Use the coordinates the app's city
+search returns so the forecasts, and therefore the keys, match:
+
+    [{"city": "Boston", "region": "Massachusetts", "country": "United States",
+      "latitude": 42.35843, "longitude": -71.05977}]
+
+    python daily_briefings.py [locations.json] [--hours 3] [--workers 4] [--rate 1]
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+import requests
+
+from ai_overview import (
+    PROMPT_VERSION, build_hourly_summary, current_hour_index, is_quota_error, request_perplexity_overview,
+)
+from overview_cache import OverviewCache, overview_key
+
+FORECAST_URL = "https://api.open-meteo.com/v1/forecast"
+# Same hourly forecast as the app's fetch_weather() (best_match model)
+FORECAST_PARAMS = {
+    'hourly': 'temperature_2m,precipitation_probability,precipitation,rain,showers,snowfall,weather_code',
+    'temperature_unit': 'fahrenheit',
+    'wind_speed_unit': 'mph',
+    'forecast_days': 3,
+    'timezone': 'auto',
+}
+FORECAST_BATCH = 50      # Locations per forecast request
+BRIEFING_HOURS = 3       # Upcoming start hours to precompute per location
+BRIEFING_WORKERS = 4
+BRIEFING_RATE = 1.0      # AI requests per second
+
+
+class RateLimiter:
+    """Spaces calls at least 1/rate seconds apart, across threads."""
+
+    def __init__(self, rate, clock=time.monotonic, sleep=time.sleep):
+        self.interval = 1.0 / rate if rate else 0.0
+        self.clock = clock
+        self.sleep = sleep
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        with self._lock:
+            now = self.clock()
+            start = max(now, self._next)
+            self._next = start + self.interval
+        if start > now:
+            self.sleep(start - now)
+
+
+def load_locations(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def fetch_forecasts(locations, batch=FORECAST_BATCH):
+    """Forecasts (hourly data and UTC offset) for the locations, in order (None where a request failed)."""
+    forecasts = []
+    for i in range(0, len(locations), batch):
+        chunk = locations[i:i + batch]
+        params = dict(
+            FORECAST_PARAMS,
+            latitude=','.join(str(loc['latitude']) for loc in chunk),
+            longitude=','.join(str(loc['longitude']) for loc in chunk),
+        )
+        try:
+            response = requests.get(FORECAST_URL, params=params, timeout=30)
+            response.raise_for_status()
+            data = response.json()
+        except Exception as e:
+            print(f"⚠️ Forecast request failed for {len(chunk)} locations: {e}")
+            forecasts.extend([None] * len(chunk))
+            continue
+        # One location returns an object, several return a list
+        data = data if isinstance(data, list) else [data]
+        forecasts.extend(data)
+    return forecasts
+
+
+def briefing_slices(forecast, hours=BRIEFING_HOURS, now=None):
+    """The 48-hour slices the overview panel will build over the next `hours` hours."""
+    now = now or datetime.now(timezone.utc)
+    hourly = forecast.get('hourly') or {}
+    times = hourly.get('time', [])
+    slices = []
+    for offset in range(hours):
+        start_idx = current_hour_index(times, forecast.get('utc_offset_seconds', 0), now + timedelta(hours=offset))
+        hourly_slice = build_hourly_summary(hourly, start_idx, hours_to_show=48)
+        if hourly_slice and hourly_slice not in slices:
+            slices.append(hourly_slice)
+    return slices
+
+
+def run_briefings(locations, cache, api_key, hours=BRIEFING_HOURS, workers=BRIEFING_WORKERS,
+                  rate=BRIEFING_RATE, fetch=fetch_forecasts, generate=request_perplexity_overview, now=None):
+    """Fill the cache with overviews for every location. Returns counts of what happened."""
+    stats = {'locations': len(locations), 'no_forecast': 0, 'cached': 0, 'generated': 0, 'failed': 0, 'skipped': 0}
+    limiter = RateLimiter(rate)
+    quota_exhausted = threading.Event()
+    lock = threading.Lock()
+    # Keep each overview until the last hour it was built for has passed
+    ttl = (hours + 1) * 3600
+
+    def count(name):
+        with lock:
+            stats[name] += 1
+
+    def build(location, hourly_slice):
+        if quota_exhausted.is_set():
+            raise RuntimeError("quota exhausted")
+        limiter.wait()
+        return generate(location, hourly_slice, api_key)
+
+    def brief(location, hourly_slice):
+        key = overview_key(location, hourly_slice, PROMPT_VERSION, kind='perplexity')
+        try:
+            _, hit = cache.get_or_create(key, lambda: build(location, hourly_slice), ttl)
+        except Exception as e:
+            if quota_exhausted.is_set():
+                count('skipped')
+                return
+            if is_quota_error(e):
+                quota_exhausted.set()
+                print("⚠️ AI quota exhausted; skipping the remaining overviews")
+            else:
+                print(f"❌ {location.get('city', 'Unknown')}: {e}")
+            count('failed')
+            return
+        count('cached' if hit else 'generated')
+
+    jobs = []
+    for location, forecast in zip(locations, fetch(locations)):
+        if not forecast or not forecast.get('hourly'):
+            stats['no_forecast'] += 1
+            continue
+        jobs.extend((location, hourly_slice) for hourly_slice in briefing_slices(forecast, hours, now))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(lambda job: brief(*job), jobs))
+    return stats
+
+
+def _parse_args(argv):
+    """Positional args and options; raises ValueError for a flag without a valid value."""
+    args = [a for a in argv if not a.startswith('--')]
+    options = {'hours': BRIEFING_HOURS, 'workers': BRIEFING_WORKERS, 'rate': BRIEFING_RATE}
+    for name, kind in (('hours', int), ('workers', int), ('rate', float)):
+        flag = f"--{name}"
+        if flag in argv:
+            i = argv.index(flag) + 1
+            if i >= len(argv) or argv[i].startswith('--'):
+                raise ValueError(f"{flag} needs a value")
+            value = argv[i]
+            try:
+                options[name] = kind(value)
+            except ValueError:
+                raise ValueError(f"{flag} needs a number, got {value!r}") from None
+            # --rate 0 turns the rate limit off; hours and workers need at least 1
+            if options[name] < (0 if name == 'rate' else 1):
+                raise ValueError(f"{flag} is out of range: {value!r}")
+            args.remove(value)
+    return args, options
+
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    try:
+        args, options = _parse_args(sys.argv[1:])
+    except ValueError as e:
+        print(f"❌ {e}")
+        args, options = None, None
+    api_key = os.environ.get('PERPLEXITY_API_KEY', '')
+    path = args[0] if args else os.environ.get('BRIEFING_LOCATIONS', 'briefing_locations.json')
+    if args is None or len(args) > 1 or not os.path.exists(path):
+        print("Usage: python daily_briefings.py [locations.json] [--hours 3] [--workers 4] [--rate 1]")
+        print("       (uses BRIEFING_LOCATIONS, OVERVIEW_CACHE_PATH and PERPLEXITY_API_KEY)")
+        sys.exit(1)
+    if not api_key:
+        print("❌ PERPLEXITY_API_KEY is not set")
+        sys.exit(1)
+    cache = OverviewCache(os.environ.get('OVERVIEW_CACHE_PATH', 'overview_cache.sqlite'))
+    started = time.monotonic()
+    stats = run_briefings(load_locations(path), cache, api_key, **options)
+    print(f"✅ {stats['generated']} generated, {stats['cached']} already cached, "
+          f"{stats['failed']} failed, {stats['skipped']} skipped, "
+          f"{stats['no_forecast']} locations without a forecast ({time.monotonic() - started:.1f}s)")
+    print(f"Purged {cache.purge()} expired overviews")
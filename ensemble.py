@@ -0,0 +1,165 @@
+"""
+Ensemble Forecasts
+Fetches Open-Meteo ensemble members (ECMWF ENS, GEFS, ICON EPS, ...) and reduces
+them to percentile bands (p10/p50/p90) and precipitation exceedance probabilities.
+
+Member payloads are large (dozens of members x every hour x every model), so the
+response is requested as CSV and decoded line by line into float32 arrays; only
+the reduced bands are returned and cached, never the raw members.
+"""
+
+import math
+import warnings
+from array import array
+
+import requests
+
+try:
+    # Optional; Streamlit already installs NumPy, the CLI may not have it
+    import numpy as np
+except Exception:
+    np = None
+
+ENSEMBLE_URL = "https://ensemble-api.open-meteo.com/v1/ensemble"
+
+ENSEMBLE_MODELS = {
+    'ecmwf_ifs025': 'ECMWF ENS',
+    'gfs025': 'GEFS',
+    'icon_seamless': 'ICON EPS',
+    'gem_global': 'GEM GEPS',
+}
+DEFAULT_MODELS = ('ecmwf_ifs025', 'gfs025')
+VARIABLES = ('temperature_2m', 'precipitation')
+PERCENTILES = (10, 50, 90)
+EXCEEDANCE_THRESHOLDS_MM = (0.1, 1.0, 5.0)
+
+
+def _variable_of(column):
+    """Which requested variable a CSV column ('temperature_2m_member01_gfs025 (°F)') belongs to."""
+    name = column.split(' (')[0]
+    for variable in VARIABLES:
+        if name == variable or name.startswith(variable + '_'):
+            return variable
+    return None
+
+
+def decode_ensemble_csv(lines):
+    """Decode Open-Meteo ensemble CSV lines into compact float32 member arrays.
+
+    Returns {'time': [...], 'utc_offset_seconds': int, 'members': {variable: count},
+    variable: array('f') laid out hour-major (hours x members)}.
+    """
+    decoded = {'time': [], 'utc_offset_seconds': 0, 'members': {v: 0 for v in VARIABLES}}
+    for variable in VARIABLES:
+        decoded[variable] = array('f')
+
+    metadata_header = None
+    columns = None
+    for raw in lines:
+        line = raw.decode('utf-8') if isinstance(raw, bytes) else raw
+        line = line.strip()
+        if not line:
+            continue
+        fields = line.split(',')
+        if columns is None:
+            if fields[0] == 'time':
+                columns = [_variable_of(c) for c in fields]
+                for variable in columns[1:]:
+                    if variable:
+                        decoded['members'][variable] += 1
+            elif fields[0] == 'latitude':
+                metadata_header = fields
+            elif metadata_header:
+                metadata = dict(zip(metadata_header, fields))
+                decoded['utc_offset_seconds'] = int(float(metadata.get('utc_offset_seconds') or 0))
+            continue
+
+        fields += [''] * (len(columns) - len(fields))
+        decoded['time'].append(fields[0])
+        for variable, value in zip(columns[1:], fields[1:]):
+            if variable:
+                decoded[variable].append(float(value) if value else math.nan)
+    return decoded
+
+
+def _percentile(sorted_values, q):
+    """Linear-interpolated percentile of an already sorted list."""
+    if not sorted_values:
+        return math.nan
+    pos = (len(sorted_values) - 1) * q / 100.0
+    lo = int(pos)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (pos - lo)
+
+
+def reduce_members(values, hours, members):
+    """Percentile bands and exceedance probabilities for an hour-major member array.
+
+    Returns ({'p10': [...], 'p50': [...], 'p90': [...]}, {threshold: [probability %]}).
+    """
+    if not hours or not members:
+        return {f'p{q}': [] for q in PERCENTILES}, {t: [] for t in EXCEEDANCE_THRESHOLDS_MM}
+
+    if np is not None:
+        grid = np.frombuffer(values, dtype=np.float32, count=hours * members).reshape(hours, members)
+        valid = np.isfinite(grid)
+        counts = np.maximum(valid.sum(axis=1), 1)
+        with warnings.catch_warnings():
+            # All-NaN hours give NaN bands; don't warn about them
+            warnings.simplefilter('ignore', RuntimeWarning)
+            bands = np.nanpercentile(grid.astype(np.float64), PERCENTILES, axis=1)
+        exceedance = {
+            t: np.round((grid >= t).sum(axis=1) * 100.0 / counts).tolist()
+            for t in EXCEEDANCE_THRESHOLDS_MM
+        }
+        return {f'p{q}': bands[i].tolist() for i, q in enumerate(PERCENTILES)}, exceedance
+
+    result = {f'p{q}': [] for q in PERCENTILES}
+    exceedance = {t: [] for t in EXCEEDANCE_THRESHOLDS_MM}
+    for h in range(hours):
+        row = sorted(v for v in values[h * members:(h + 1) * members] if not math.isnan(v))
+        for q in PERCENTILES:
+            result[f'p{q}'].append(_percentile(row, q))
+        for t in EXCEEDANCE_THRESHOLDS_MM:
+            hits = sum(1 for v in row if v >= t)
+            exceedance[t].append(round(hits * 100.0 / len(row)) if row else 0)
+    return result, exceedance
+
+
+def reduce_ensemble(decoded):
+    """Reduce decoded members to the compact bands structure that gets cached."""
+    hours = len(decoded['time'])
+    temperature, _ = reduce_members(decoded['temperature_2m'], hours, decoded['members']['temperature_2m'])
+    precipitation, exceedance = reduce_members(decoded['precipitation'], hours, decoded['members']['precipitation'])
+    return {
+        'time': decoded['time'],
+        'utc_offset_seconds': decoded['utc_offset_seconds'],
+        'members': decoded['members']['temperature_2m'],
+        'temperature_2m': temperature,
+        'precipitation': precipitation,
+        'exceedance': {f"{t:g}": exceedance[t] for t in EXCEEDANCE_THRESHOLDS_MM},
+    }
+
+
+def fetch_ensemble_bands(latitude, longitude, models=DEFAULT_MODELS, forecast_days=3, timeout=30):
+    """Fetch ensemble members for a location and return the reduced bands.
+
+    Temperatures are in °F and precipitation in mm, matching get_weather().
+    Raises requests exceptions on HTTP errors.
+    """
+    params = {
+        'latitude': latitude,
+        'longitude': longitude,
+        'hourly': ','.join(VARIABLES),
+        'models': ','.join(models),
+        'temperature_unit': 'fahrenheit',
+        'forecast_days': forecast_days,
+        'timezone': 'auto',
+        'format': 'csv',
+    }
+    with requests.get(ENSEMBLE_URL, params=params, timeout=timeout, stream=True) as response:
+        response.raise_for_status()
+        decoded = decode_ensemble_csv(response.iter_lines())
+    bands = reduce_ensemble(decoded)
+    bands['models'] = [ENSEMBLE_MODELS.get(m, m) for m in models]
+    return bands
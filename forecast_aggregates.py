@@ -0,0 +1,116 @@
+"""
+Forecast Aggregates
+Per-day and per-period (night, morning, afternoon, evening) statistics computed in
+a single pass over columnar hourly data. Used by the local overviews and by batch
+reports so they all share the same aggregates.
+
+Periods follow the overview prompt: Night 12-5 AM, Morning 6-11 AM,
+Afternoon 12-5 PM, Evening 6-11 PM (local time of the forecast).
+"""
+
+PERIODS = ('morning', 'afternoon', 'evening', 'night')
+PERIOD_BY_HOUR = ['night'] * 6 + ['morning'] * 6 + ['afternoon'] * 6 + ['evening'] * 6
+
+# Thresholds for an hour to count as a precipitation hour
+MIN_PRECIP_PROB = 25
+MIN_PRECIP_MM = 0.5
+
+
+def hour_label(hour):
+    """'7 AM' style label for an hour of the day."""
+    return f"{hour % 12 or 12} {'AM' if hour < 12 else 'PM'}"
+
+
+def _new_stats():
+    return {
+        'hours': 0,
+        'temp_first': None,
+        'temp_min': None,
+        'temp_max': None,
+        'prob_max': 0,
+        'prob_sum': 0,
+        'precip_total': 0.0,
+        'precip_hours': [],  # (hour label, probability, amount mm)
+    }
+
+
+def _add(stats, temp, prob, amount, label, is_precip_hour):
+    stats['hours'] += 1
+    if temp is not None:
+        if stats['temp_first'] is None:
+            stats['temp_first'] = temp
+        if stats['temp_min'] is None or temp < stats['temp_min']:
+            stats['temp_min'] = temp
+        if stats['temp_max'] is None or temp > stats['temp_max']:
+            stats['temp_max'] = temp
+    if prob > stats['prob_max']:
+        stats['prob_max'] = prob
+    stats['prob_sum'] += prob
+    stats['precip_total'] += amount
+    if is_precip_hour:
+        stats['precip_hours'].append((label, prob, amount))
+
+
+def aggregate_columns(times, temps, probs, amounts,
+                      min_prob=MIN_PRECIP_PROB, min_amount=MIN_PRECIP_MM):
+    """Aggregate aligned hourly columns (local ISO times, °F, %, mm) in one pass.
+
+    Missing probabilities/amounts count as 0; missing temperatures are skipped.
+
+    Returns {'days': [...], 'overall': stats} where each day is
+    {'date': 'YYYY-MM-DD', **stats, 'periods': {period: stats}} in date order, and
+    stats holds hours, temp_first/min/max, prob_max, prob_sum, precip_total and
+    precip_hours [(label, prob, mm)].
+    """
+    days = {}
+    overall = _new_stats()
+
+    for i, ts in enumerate(times):
+        if not ts:
+            continue
+        temp = temps[i] if i < len(temps) else None
+        prob = (probs[i] if i < len(probs) else None) or 0
+        amount = (amounts[i] if i < len(amounts) else None) or 0.0
+        day_key = ts[:10]
+        try:
+            hour = int(ts[11:13])
+        except ValueError:
+            hour = 0
+        label = hour_label(hour)
+        is_precip_hour = prob >= min_prob or amount >= min_amount
+
+        day = days.get(day_key)
+        if day is None:
+            day = _new_stats()
+            day['date'] = day_key
+            day['periods'] = {period: _new_stats() for period in PERIODS}
+            days[day_key] = day
+
+        _add(day, temp, prob, amount, label, is_precip_hour)
+        _add(day['periods'][PERIOD_BY_HOUR[hour % 24]], temp, prob, amount, label, is_precip_hour)
+        _add(overall, temp, prob, amount, label, is_precip_hour)
+
+    return {'days': [days[k] for k in sorted(days)], 'overall': overall}
+
+
+def aggregate_hourly(hourly, start_idx=0, hours=48, **kwargs):
+    """Aggregate a window of an Open-Meteo style 'hourly' block."""
+    end = start_idx + hours
+    return aggregate_columns(
+        (hourly.get('time') or [])[start_idx:end],
+        (hourly.get('temperature_2m') or [])[start_idx:end],
+        (hourly.get('precipitation_probability') or [])[start_idx:end],
+        (hourly.get('precipitation') or [])[start_idx:end],
+        **kwargs
+    )
+
+
+def aggregate_summary(hourly_slice, **kwargs):
+    """Aggregate a build_hourly_summary() slice (list of per-hour dicts)."""
+    return aggregate_columns(
+        [h.get('time') for h in hourly_slice],
+        [h.get('temp_f') for h in hourly_slice],
+        [h.get('precip_prob') for h in hourly_slice],
+        [h.get('precip_mm') for h in hourly_slice],
+        **kwargs
+    )
@@ -0,0 +1,156 @@
+"""
+Offline IP Geolocation
+Looks up approximate locations for IPv4 addresses in a local range table,
+so "Use Current Location" does not need to call ipapi.co for every click.
+
+The table is a single binary file that is memory-mapped and binary-searched:
+
+    header   '<4sHHII'  magic b'IPRG', version, reserved, record count, labels offset
+    records  '<IIffII'  start ip, end ip, latitude, longitude, label offset, label length
+    labels   UTF-8 "city\\tregion\\tcountry" strings referenced by the records
+
+Records are sorted by start ip and must not overlap. Build one from a CSV with
+columns start_ip,end_ip,latitude,longitude,city,region,country:
+
+    python ip_geolocation.py build ranges.csv ip_ranges.bin
+"""
+
+import csv
+import ipaddress
+import mmap
+import struct
+import sys
+
+MAGIC = b'IPRG'
+VERSION = 1
+HEADER = struct.Struct('<4sHHII')
+RECORD = struct.Struct('<IIffII')
+_START = struct.Struct('<I')
+
+
+class IPRangeDatabase:
+    """Read-only, memory-mapped IPv4 range table."""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'rb')
+        try:
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except Exception:
+            self._file.close()
+            raise
+        magic, version, _, count, labels_offset = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"{path} is not an IP range database (version {VERSION})")
+        self.count = count
+        self._labels_offset = labels_offset
+
+    def __len__(self):
+        return self.count
+
+    def close(self):
+        """Release the memory map and file handle."""
+        self._mm.close()
+        self._file.close()
+
+    def _start_at(self, index):
+        return _START.unpack_from(self._mm, HEADER.size + index * RECORD.size)[0]
+
+    def lookup(self, ip):
+        """Return a location dict for an IPv4 address, or None if it is not covered."""
+        try:
+            address = ipaddress.ip_address(ip)
+        except ValueError:
+            return None
+        if address.version != 4:
+            return None
+        value = int(address)
+
+        # Find the last record whose start is <= value
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._start_at(mid) <= value:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo == 0:
+            return None
+
+        start, end, latitude, longitude, label_offset, label_length = RECORD.unpack_from(
+            self._mm, HEADER.size + (lo - 1) * RECORD.size
+        )
+        if value > end:
+            return None
+
+        label_start = self._labels_offset + label_offset
+        label = self._mm[label_start:label_start + label_length].decode('utf-8')
+        city, region, country = (label.split('\t') + ['', '', ''])[:3]
+        return {
+            'latitude': round(latitude, 4),
+            'longitude': round(longitude, 4),
+            'city': city or 'Unknown',
+            'region': region or 'Unknown',
+            'country': country or 'Unknown'
+        }
+
+
+def build_ip_range_database(rows, output_path):
+    """Write a range table from rows of (start_ip, end_ip, lat, lon, city, region, country).
+
+    IPv6 rows are skipped. Returns the number of records written.
+    """
+    records = []
+    labels = bytearray()
+    label_offsets = {}
+
+    for start_ip, end_ip, latitude, longitude, city, region, country in rows:
+        start = ipaddress.ip_address(start_ip.strip())
+        end = ipaddress.ip_address(end_ip.strip())
+        if start.version != 4 or end.version != 4:
+            continue
+        label = '\t'.join((city or '', region or '', country or '')).encode('utf-8')
+        if label not in label_offsets:
+            label_offsets[label] = len(labels)
+            labels.extend(label)
+        records.append((int(start), int(end), float(latitude), float(longitude),
+                        label_offsets[label], len(label)))
+
+    records.sort()
+    for previous, current in zip(records, records[1:]):
+        if current[0] <= previous[1]:
+            raise ValueError(f"Overlapping ranges starting at {ipaddress.ip_address(current[0])}")
+
+    labels_offset = HEADER.size + len(records) * RECORD.size
+    with open(output_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, 0, len(records), labels_offset))
+        for record in records:
+            f.write(RECORD.pack(*record))
+        f.write(labels)
+    return len(records)
+
+
+def build_from_csv(csv_path, output_path):
+    """Build a range table from a CSV file with a header row."""
+    with open(csv_path, newline='', encoding='utf-8') as f:
+        reader = csv.DictReader(f)
+        rows = (
+            (r['start_ip'], r['end_ip'], r['latitude'], r['longitude'],
+             r.get('city', ''), r.get('region', ''), r.get('country', ''))
+            for r in reader
+        )
+        return build_ip_range_database(rows, output_path)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 4 and sys.argv[1] == 'build':
+        count = build_from_csv(sys.argv[2], sys.argv[3])
+        print(f"✅ Wrote {count} ranges to {sys.argv[3]}")
+    elif len(sys.argv) == 3 and sys.argv[1] == 'lookup':
+        import os
+        db = IPRangeDatabase(os.environ.get('IP_RANGE_DB_PATH', 'ip_ranges.bin'))
+        print(db.lookup(sys.argv[2]) or "❌ Address not covered")
+    else:
+        print("Usage: python ip_geolocation.py build <ranges.csv> <output.bin>")
+        print("       python ip_geolocation.py lookup <ip>   (uses IP_RANGE_DB_PATH)")
@@ -0,0 +1,152 @@
+"""
+Model Consensus
+Aligns the hourly series of several forecast models (Open-Meteo ECMWF/GFS/ICON and
+the converted Visual Crossing data) on a common time axis and computes the
+per-hour mean, spread and disagreement flags in one vectorized pass.
+
+Works on already-fetched weather data, so it costs no extra API calls.
+"""
+
+import math
+
+try:
+    # Optional; Streamlit already installs NumPy, the CLI may not have it
+    import numpy as np
+except Exception:
+    np = None
+
+VARIABLES = ('temperature_2m', 'precipitation_probability', 'precipitation')
+
+# An hour is flagged when the models differ by more than this much
+TEMP_SPREAD_F = 5.0
+PROB_SPREAD = 40.0
+WET_HOUR_MM = 0.5
+
+
+def align_models(datasets):
+    """Align {model name: weather data} on the union of their hourly times.
+
+    Times are normalized to "YYYY-MM-DDTHH:MM" so "...T00:00:00" (Visual Crossing)
+    lines up with "...T00:00" (Open-Meteo). Missing values are NaN.
+
+    Returns {'time': [...], 'models': [...], variable: [[values per hour] per model]}.
+    """
+    models = [name for name, data in datasets.items() if data and data.get('hourly', {}).get('time')]
+    series = {}
+    for name in models:
+        hourly = datasets[name]['hourly']
+        times = [t[:16] for t in hourly['time']]
+        series[name] = {
+            variable: dict(zip(times, hourly.get(variable) or []))
+            for variable in VARIABLES
+        }
+    times = sorted({t for name in models for t in series[name]['temperature_2m']})
+
+    aligned = {'time': times, 'models': models}
+    for variable in VARIABLES:
+        aligned[variable] = [
+            [math.nan if series[name][variable].get(t) is None else float(series[name][variable][t])
+             for t in times]
+            for name in models
+        ]
+    return aligned
+
+
+def _stats(rows):
+    """Mean, min, max and spread across models for each hour (NaN-aware)."""
+    if not rows:
+        return {key: [] for key in ('mean', 'min', 'max', 'spread', 'count')}
+    if np is not None:
+        grid = np.asarray(rows, dtype=np.float64)
+        valid = np.isfinite(grid)
+        count = valid.sum(axis=0)
+        has = count > 0
+        total = np.where(valid, grid, 0.0).sum(axis=0)
+        mean = np.where(has, total / np.maximum(count, 1), np.nan)
+        low = np.where(has, np.where(valid, grid, np.inf).min(axis=0), np.nan)
+        high = np.where(has, np.where(valid, grid, -np.inf).max(axis=0), np.nan)
+        return {'mean': mean, 'min': low, 'max': high, 'spread': high - low, 'count': count}
+
+    hours = len(rows[0]) if rows else 0
+    result = {key: [] for key in ('mean', 'min', 'max', 'spread', 'count')}
+    for h in range(hours):
+        values = [row[h] for row in rows if not math.isnan(row[h])]
+        if values:
+            low, high = min(values), max(values)
+            result['mean'].append(sum(values) / len(values))
+            result['min'].append(low)
+            result['max'].append(high)
+            result['spread'].append(high - low)
+        else:
+            for key in ('mean', 'min', 'max', 'spread'):
+                result[key].append(math.nan)
+        result['count'].append(len(values))
+    return result
+
+
+def compute_consensus(aligned):
+    """Per-hour consensus statistics and disagreement flags.
+
+    An hour is flagged when at least two models have data and the temperature
+    spread exceeds TEMP_SPREAD_F, the precipitation probability spread exceeds
+    PROB_SPREAD, or some models are wet (>= WET_HOUR_MM) while others are dry.
+
+    Returns {'time', 'models', variable: {'mean','min','max','spread','count'},
+    'disagree': [bool], 'reasons': [[str]]} with plain lists.
+    """
+    result = {'time': aligned['time'], 'models': aligned['models']}
+    stats = {variable: _stats(aligned[variable]) for variable in VARIABLES}
+
+    temp, prob, precip = (stats[v] for v in VARIABLES)
+    if not aligned['models']:
+        flags = ([], [], [])
+    elif np is not None:
+        multi = temp['count'] >= 2
+        temp_flag = multi & (np.nan_to_num(temp['spread']) > TEMP_SPREAD_F)
+        prob_flag = (prob['count'] >= 2) & (np.nan_to_num(prob['spread']) > PROB_SPREAD)
+        wet_flag = (precip['count'] >= 2) & (np.nan_to_num(precip['max']) >= WET_HOUR_MM) & \
+            (np.nan_to_num(precip['min'], nan=WET_HOUR_MM) < WET_HOUR_MM / 5)
+        flags = (temp_flag.tolist(), prob_flag.tolist(), wet_flag.tolist())
+        for variable in VARIABLES:
+            stats[variable] = {key: values.tolist() for key, values in stats[variable].items()}
+    else:
+        def flag(s, test):
+            return [c >= 2 and not math.isnan(v) and test(v, i) for i, (c, v) in enumerate(zip(s['count'], s['spread']))]
+        flags = (
+            flag(temp, lambda v, i: v > TEMP_SPREAD_F),
+            flag(prob, lambda v, i: v > PROB_SPREAD),
+            flag(precip, lambda v, i: precip['max'][i] >= WET_HOUR_MM and precip['min'][i] < WET_HOUR_MM / 5),
+        )
+
+    labels = ('temperature', 'precipitation chance', 'wet vs dry')
+    result.update(stats)
+    result['reasons'] = [[label for label, f in zip(labels, hour_flags) if f] for hour_flags in zip(*flags)]
+    result['disagree'] = [bool(r) for r in result['reasons']]
+    return result
+
+
+def consensus_summary(consensus, start_time=None, hours=24):
+    """Headline numbers for a window: max temperature spread and disagreement hours.
+
+    start_time is a local "YYYY-MM-DDTHH:MM" string; the window starts at the
+    first hour at or after it.
+    """
+    times = consensus['time']
+    start = 0
+    if start_time:
+        start = next((i for i, t in enumerate(times) if t >= start_time[:16]), len(times))
+    window = range(start, min(len(times), start + hours))
+
+    spreads = [(consensus['temperature_2m']['spread'][i], i) for i in window
+               if not math.isnan(consensus['temperature_2m']['spread'][i])]
+    max_spread, max_at = max(spreads) if spreads else (None, None)
+    disagree = [i for i in window if consensus['disagree'][i]]
+    return {
+        'models': consensus['models'],
+        'hours': len(window),
+        'max_temp_spread': max_spread,
+        'max_temp_spread_time': times[max_at] if max_at is not None else None,
+        'disagree_hours': len(disagree),
+        'first_disagreement': times[disagree[0]] if disagree else None,
+        'first_reasons': consensus['reasons'][disagree[0]] if disagree else [],
+    }
@@ -0,0 +1,188 @@
+"""
+AI Overview Cache
+Stores generated weather overviews so repeat requests for the same place and
+forecast are served in milliseconds instead of another AI call.
+
+Keys combine the 0.25° grid cell (as in climatology), a hash of the 48-hour
+hourly slice the prompt was built from, the prompt version and the overview
+kind. A new forecast or a prompt change therefore misses on its own; the TTL
+only bounds how long an overview of an unchanged forecast is reused (models
+update hourly).
+
+Entries live in memory and in a SQLite file (OVERVIEW_CACHE_PATH), so they
+survive restarts and are shared with other processes such as a briefing batch
+job. Generation is single flight per key within a process.
+
+    python overview_cache.py stats
+    python overview_cache.py purge
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+from climatology import cell_key
+
+OVERVIEW_TTL = 3600
+SLICE_HOURS = 48
+
+
+def slice_fingerprint(hourly_slice):
+    """Stable hash of the hourly slice an overview is built from."""
+    content = json.dumps(hourly_slice[:SLICE_HOURS], sort_keys=True, default=str)
+    return hashlib.blake2b(content.encode('utf-8'), digest_size=12).hexdigest()
+
+
+def overview_key(location, hourly_slice, prompt_version, kind='ai'):
+    """Cache key for an overview of a location's forecast."""
+    cell = cell_key(location['latitude'], location['longitude'])
+    return f"{kind}:v{prompt_version}:{cell}:{slice_fingerprint(hourly_slice)}"
+
+
+class OverviewCache:
+    """In-memory LRU in front of a SQLite table of overviews with expiry times."""
+
+    def __init__(self, path=None, ttl=OVERVIEW_TTL, max_memory=512, clock=time.time):
+        self.path = path
+        self.ttl = ttl
+        self.max_memory = max_memory
+        self.clock = clock
+        self.stats = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0, 'stored': 0}
+        self._memory = OrderedDict()  # key -> (text, expires)
+        self._lock = threading.Lock()
+        self._build_locks = {}
+        if path:
+            with self._connect() as db:
+                db.execute("PRAGMA journal_mode=WAL")  # Readers don't block the batch writer
+                db.execute(
+                    "CREATE TABLE IF NOT EXISTS overviews ("
+                    "key TEXT PRIMARY KEY, text TEXT NOT NULL, created REAL NOT NULL, expires REAL NOT NULL)"
+                )
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=10)
+
+    def _remember(self, key, text, expires):
+        with self._lock:
+            self._memory[key] = (text, expires)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_memory:
+                self._memory.popitem(last=False)
+
+    def get(self, key):
+        """Cached overview text, or None if missing or expired."""
+        now = self.clock()
+        with self._lock:
+            cached = self._memory.get(key)
+            if cached is not None:
+                if cached[1] > now:
+                    self._memory.move_to_end(key)
+                    self.stats['memory_hits'] += 1
+                    return cached[0]
+                del self._memory[key]
+        if self.path:
+            with self._connect() as db:
+                row = db.execute("SELECT text, expires FROM overviews WHERE key = ?", (key,)).fetchone()
+            if row and row[1] > now:
+                self._remember(key, row[0], row[1])
+                self.stats['disk_hits'] += 1
+                return row[0]
+        self.stats['misses'] += 1
+        return None
+
+    def put(self, key, text, ttl=None):
+        """Store an overview for ttl seconds (default: the cache TTL)."""
+        now = self.clock()
+        expires = now + (self.ttl if ttl is None else ttl)
+        self._remember(key, text, expires)
+        if self.path:
+            with self._connect() as db:
+                db.execute("INSERT OR REPLACE INTO overviews VALUES (?, ?, ?, ?)", (key, text, now, expires))
+        self.stats['stored'] += 1
+
+    def get_or_create(self, key, build, ttl=None):
+        """Cached overview, or build() it once however many callers ask at the same time.
+
+        build() returns the text to store; exceptions propagate and nothing is cached.
+        Returns (text, hit) where hit is True when it came from the cache.
+        """
+        text = self.get(key)
+        if text is not None:
+            return text, True
+        with self._lock:
+            build_lock = self._build_locks.setdefault(key, threading.Lock())
+        try:
+            with build_lock:
+                # Another caller may have finished building while we waited
+                with self._lock:
+                    cached = self._memory.get(key)
+                if cached is not None and cached[1] > self.clock():
+                    self.stats['memory_hits'] += 1
+                    return cached[0], True
+                text = build()
+                self.put(key, text, ttl)
+                return text, False
+        finally:
+            with self._lock:
+                self._build_locks.pop(key, None)
+
+    def stream_or_create(self, key, stream, ttl=None):
+        """get_or_create() for a build that yields text chunks.
+
+        Yields the cached text as one chunk, or stream()'s chunks as they arrive,
+        storing the joined text once the stream completes. Concurrent callers
+        wait for the first stream and then get the cached text. A stream that
+        fails or is abandoned part-way stores nothing.
+        """
+        text = self.get(key)
+        if text is not None:
+            yield text
+            return
+        with self._lock:
+            build_lock = self._build_locks.setdefault(key, threading.Lock())
+        try:
+            with build_lock:
+                with self._lock:
+                    cached = self._memory.get(key)
+                if cached is not None and cached[1] > self.clock():
+                    self.stats['memory_hits'] += 1
+                    yield cached[0]
+                    return
+                chunks = []
+                for chunk in stream():
+                    chunks.append(chunk)
+                    yield chunk
+                self.put(key, ''.join(chunks), ttl)
+        finally:
+            with self._lock:
+                self._build_locks.pop(key, None)
+
+    def purge(self):
+        """Drop expired entries from memory and disk. Returns the number removed from disk."""
+        now = self.clock()
+        with self._lock:
+            for key in [k for k, (_, expires) in self._memory.items() if expires <= now]:
+                del self._memory[key]
+        if not self.path:
+            return 0
+        with self._connect() as db:
+            return db.execute("DELETE FROM overviews WHERE expires <= ?", (now,)).rowcount
+
+
+if __name__ == "__main__":
+    cache = OverviewCache(os.environ.get('OVERVIEW_CACHE_PATH', 'overview_cache.sqlite'))
+    if sys.argv[1:] == ['stats']:
+        with cache._connect() as db:
+            total, live = db.execute(
+                "SELECT COUNT(*), SUM(expires > ?) FROM overviews", (time.time(),)
+            ).fetchone()
+        print(f"{total} overviews stored, {live or 0} still fresh")
+    elif sys.argv[1:] == ['purge']:
+        print(f"✅ Removed {cache.purge()} expired overviews")
+    else:
+        print("Usage: python overview_cache.py stats|purge   (uses OVERVIEW_CACHE_PATH)")
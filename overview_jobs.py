@@ -0,0 +1,99 @@
+"""
+Overview Job Queue
+Runs AI overview generation on a small pool of background threads, so a slow
+AI call never holds up the Streamlit script thread.
+
+Each job collects the text chunks of a streaming generation as they arrive, so
+the page can poll it: show partial text while it streams, fall back to the
+local overview once the job's deadline passes, and swap in the AI text when
+the job completes. Running jobs are deduplicated by key (the overview cache
+key, which serves finished overviews) and the queue is bounded: when it is
+full, submit() returns None and the caller falls back straight away.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+JOB_DEADLINE = 8.0   # Seconds before the local overview is shown instead
+MAX_PENDING = 8      # Queued or running jobs across all sessions
+
+
+class OverviewJob:
+    """One background generation; chunks fill in while it runs."""
+
+    def __init__(self, key, deadline, clock=time.monotonic):
+        self.key = key
+        self.clock = clock
+        self.submitted = clock()
+        self.deadline = self.submitted + deadline
+        self.chunks = []
+        self.error = None
+        self.finished = None
+        self._done = threading.Event()
+
+    @property
+    def text(self):
+        return ''.join(self.chunks)
+
+    @property
+    def done(self):
+        return self._done.is_set()
+
+    @property
+    def expired(self):
+        """True once the deadline has passed without the job finishing."""
+        return not self.done and self.clock() >= self.deadline
+
+    def wait(self, timeout=None):
+        """Wait for the job to finish. Returns True if it did."""
+        return self._done.wait(timeout)
+
+
+class OverviewJobQueue:
+    """Bounded pool of overview jobs, shared by every session."""
+
+    def __init__(self, workers=2, max_pending=MAX_PENDING, clock=time.monotonic):
+        self.max_pending = max_pending
+        self.clock = clock
+        self.stats = {'submitted': 0, 'deduplicated': 0, 'rejected': 0, 'completed': 0, 'failed': 0}
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="overview")
+        self._running = {}  # key -> queued or running job
+        self._lock = threading.Lock()
+
+    def submit(self, key, stream, deadline=JOB_DEADLINE):
+        """Start stream() (an iterable of text chunks) in the background.
+
+        While a job for the same key is queued or running, that job is returned
+        instead of starting another. Returns None when the queue is full.
+        """
+        with self._lock:
+            job = self._running.get(key)
+            if job is not None:
+                self.stats['deduplicated'] += 1
+                return job
+            if len(self._running) >= self.max_pending:
+                self.stats['rejected'] += 1
+                return None
+            job = OverviewJob(key, deadline, self.clock)
+            self._running[key] = job
+            self.stats['submitted'] += 1
+        self._executor.submit(self._run, job, stream)
+        return job
+
+    @property
+    def pending(self):
+        return len(self._running)
+
+    def _run(self, job, stream):
+        try:
+            for chunk in stream():
+                job.chunks.append(chunk)
+        except Exception as e:
+            job.error = e
+        finally:
+            job.finished = self.clock()
+            with self._lock:
+                del self._running[job.key]
+                self.stats['failed' if job.error is not None else 'completed'] += 1
+            job._done.set()
@@ -0,0 +1,188 @@
+"""
+Precipitation Onset Detection
+Finds when precipitation starts within the next few hours and what type it is
+(rain, showers, thunderstorm, freezing rain, snow), using Open-Meteo's 15-minute
+(minutely_15) data when present and the hourly data otherwise.
+
+Forecast times are local to the location; "now" is anchored to the same local
+clock with the response's utc_offset_seconds, so the result does not depend on
+the server's timezone. Each series is classified in one vectorized pass (NumPy
+when available) and detect_onsets() runs the same engine over many locations.
+"""
+
+import bisect
+import time
+from datetime import date
+
+try:
+    # Optional; Streamlit already installs NumPy, the CLI may not have it
+    import numpy as np
+except Exception:
+    np = None
+
+RAIN, SHOWERS, THUNDERSTORM, FREEZING, SNOW = range(5)
+
+# type: (label, emoji, gradient start, gradient end)
+PRECIP_TYPES = {
+    RAIN: ('Rain', '🌧️', '#ff6b6b', '#ee5a6f'),
+    SHOWERS: ('Showers', '🌦️', '#ff6b6b', '#ee5a6f'),
+    THUNDERSTORM: ('Thunderstorm', '⛈️', '#ffa726', '#ff9800'),
+    FREEZING: ('Freezing Rain', '🧊', '#9575cd', '#7e57c2'),
+    SNOW: ('Snow', '❄️', '#64b5f6', '#42a5f5'),
+}
+
+SNOW_CODES = (71, 73, 75, 77, 85, 86)
+FREEZING_CODES = (56, 57, 66, 67)
+THUNDER_CODES = (95, 96, 99)
+SHOWER_CODES = (80, 81, 82)
+
+
+def _local_minutes(times):
+    """Minutes since 1970-01-01 for local ISO times, read as if they were UTC."""
+    if np is not None:
+        return np.array([t[:16] for t in times], dtype='datetime64[m]').astype(np.int64)
+    epoch = date(1970, 1, 1).toordinal()
+    return [
+        (date.fromisoformat(t[:10]).toordinal() - epoch) * 1440 + int(t[11:13]) * 60 + int(t[14:16])
+        for t in times
+    ]
+
+
+def _column(block, key, count):
+    """Float column of the given length (missing values -> 0)."""
+    values = (block.get(key) or [])[:count]
+    values = [0.0 if v is None else float(v) for v in values] + [0.0] * (count - len(values))
+    return np.asarray(values, dtype=np.float64) if np is not None else values
+
+
+def _classify(codes, rain, showers, snowfall):
+    """Precipitation type per step (snow > freezing > thunderstorm > showers > rain)."""
+    if np is not None:
+        codes = np.asarray(codes, dtype=np.int64)
+        types = np.where((showers > rain) | np.isin(codes, SHOWER_CODES), SHOWERS, RAIN)
+        types = np.where(np.isin(codes, THUNDER_CODES), THUNDERSTORM, types)
+        types = np.where(np.isin(codes, FREEZING_CODES), FREEZING, types)
+        return np.where((snowfall > 0) | np.isin(codes, SNOW_CODES), SNOW, types)
+
+    types = []
+    for code, r, sh, sn in zip(codes, rain, showers, snowfall):
+        if sn > 0 or code in SNOW_CODES:
+            types.append(SNOW)
+        elif code in FREEZING_CODES:
+            types.append(FREEZING)
+        elif code in THUNDER_CODES:
+            types.append(THUNDERSTORM)
+        elif sh > r or code in SHOWER_CODES:
+            types.append(SHOWERS)
+        else:
+            types.append(RAIN)
+    return types
+
+
+def _first_index(mask):
+    if np is not None:
+        hits = np.flatnonzero(mask)
+        return int(hits[0]) if hits.size else None
+    return next((i for i, hit in enumerate(mask) if hit), None)
+
+
+def _scan(block, now_minutes, window_minutes, min_probability, min_amount_mm, probability_lookup):
+    """Return (index, minutes, types, probs, amounts) for the first qualifying step, or None."""
+    times = block.get('time') or []
+    count = len(times)
+    if not count:
+        return None
+
+    minutes = _local_minutes(times)
+    precipitation = _column(block, 'precipitation', count)
+    rain = _column(block, 'rain', count)
+    showers = _column(block, 'showers', count)
+    snowfall = _column(block, 'snowfall', count)
+    codes = [int(c) if c is not None else 0 for c in (block.get('weather_code') or [])[:count]]
+    codes += [0] * (count - len(codes))
+    probs = probability_lookup(minutes)
+
+    if np is not None:
+        until = minutes - now_minutes
+        in_window = (until > 0) & (until <= window_minutes)
+        wet = (probs > min_probability) | (precipitation > min_amount_mm)
+        index = _first_index(in_window & wet)
+    else:
+        until = [m - now_minutes for m in minutes]
+        index = _first_index(
+            0 < u <= window_minutes and (p > min_probability or a > min_amount_mm)
+            for u, p, a in zip(until, probs, precipitation)
+        )
+    if index is None:
+        return None
+    types = _classify(codes, rain, showers, snowfall)
+    return index, int(until[index]), int(types[index]), float(probs[index]), float(precipitation[index])
+
+
+def detect_onset(weather_data, now=None, window_minutes=720, min_probability=30, min_amount_mm=0.1):
+    """Find the next precipitation onset for one Open-Meteo style response.
+
+    Args:
+        weather_data: Response with 'hourly' and optionally 'minutely_15' blocks and
+                      'utc_offset_seconds' (assumed 0 when missing)
+        now: Current time as Unix seconds (defaults to time.time())
+        window_minutes: How far ahead to look
+        min_probability: Hourly precipitation probability (%) that counts as an onset
+        min_amount_mm: Hourly amount that counts as an onset (scaled to 15-minute steps)
+
+    Returns a dict with minutes, probability, amount, type, emoji, color_start,
+    color_end and source ('minutely_15' or 'hourly'), or None.
+    """
+    if not weather_data or 'hourly' not in weather_data:
+        return None
+    now = time.time() if now is None else now
+    now_minutes = (now + (weather_data.get('utc_offset_seconds') or 0)) / 60.0
+
+    hourly = weather_data['hourly']
+    hourly_times = hourly.get('time') or []
+    hourly_minutes = _local_minutes(hourly_times) if hourly_times else []
+    hourly_probs = _column(hourly, 'precipitation_probability', len(hourly_times))
+
+    def hourly_probability(minutes):
+        # Probability of the hour each step falls in
+        if not len(hourly_minutes):
+            return np.zeros(len(minutes)) if np is not None else [0.0] * len(minutes)
+        if np is not None:
+            idx = np.clip(np.searchsorted(hourly_minutes, minutes, side='right') - 1, 0, len(hourly_minutes) - 1)
+            return hourly_probs[idx]
+        return [hourly_probs[max(0, bisect.bisect_right(hourly_minutes, m) - 1)] for m in minutes]
+
+    onset = None
+    source = None
+    minutely = weather_data.get('minutely_15')
+    if minutely and minutely.get('time'):
+        # 15-minute amounts only: the hourly probability is kept for display
+        onset = _scan(minutely, now_minutes, window_minutes, 101, min_amount_mm / 4, hourly_probability)
+        source = 'minutely_15'
+    if onset is None:
+        onset = _scan(hourly, now_minutes, window_minutes, min_probability, min_amount_mm, lambda _: hourly_probs)
+        source = 'hourly'
+    if onset is None:
+        return None
+
+    _, minutes, precip_type, probability, amount = onset
+    label, emoji, color_start, color_end = PRECIP_TYPES[precip_type]
+    return {
+        'minutes': minutes,
+        'probability': int(probability),
+        'amount': amount,
+        'type': label,
+        'emoji': emoji,
+        'color_start': color_start,
+        'color_end': color_end,
+        'source': source
+    }
+
+
+def detect_onsets(datasets, now=None, **kwargs):
+    """Run detect_onset over many locations with one shared "now" (e.g. for alerting jobs).
+
+    Returns results in the same order as datasets.
+    """
+    now = time.time() if now is None else now
+    return [detect_onset(data, now=now, **kwargs) for data in datasets]
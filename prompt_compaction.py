@@ -0,0 +1,162 @@
+"""
+Prompt Compaction
+Turns the 48-hour hourly slice (build_hourly_summary) into a short forecast
+summary for the AI overview prompt, instead of one line per hour:
+
+    Periods (temp °F, max precip chance, total precip, conditions):
+    Sat Dec 13 afternoon: 35-38°F, dry, partly cloudy
+    Sat Dec 13 evening: 32-34°F, 80%, 6.7 mm, heavy snow
+    Sun Dec 14 afternoon-evening: 30-36°F, dry, overcast
+    Turning points: high 38°F Sat 2 PM; low 25°F Sun 5 AM
+    Precipitation windows: Sat 6 PM-Sun 1 AM (peak 80% at 8 PM, 7.1 mm, heavy snow)
+
+Hours are bucketed into the overview's day periods (forecast_aggregates), runs of
+similar dry periods are merged, and only the daily highs/lows and the
+precipitation windows keep hour-level detail.
+"""
+
+import re
+from datetime import date
+
+from forecast_aggregates import MIN_PRECIP_MM, MIN_PRECIP_PROB, PERIOD_BY_HOUR, hour_label
+from weather_codes import describe
+
+# Dry periods merge while the combined temperature range stays within this
+STABLE_SPREAD_F = 8
+
+
+def approx_tokens(text):
+    """Rough LLM token count: words, numbers and punctuation marks each count as one."""
+    return len(re.findall(r"[A-Za-z]+|\d+|[^\sA-Za-z\d]", text))
+
+
+def _day_name(day):
+    return date.fromisoformat(day).strftime('%a %b %d').replace(' 0', ' ')
+
+
+def _short_day(day):
+    return date.fromisoformat(day).strftime('%a')
+
+
+def _periods(hourly_slice):
+    """Per (date, period) stats in time order."""
+    periods = []
+    for h in hourly_slice:
+        time_str = h.get('time') or ''
+        if len(time_str) < 13:
+            continue
+        day, hour = time_str[:10], int(time_str[11:13])
+        name = PERIOD_BY_HOUR[hour]
+        if not periods or periods[-1]['key'] != (day, name):
+            periods.append({'key': (day, name), 'temps': [], 'prob': 0, 'mm': 0.0, 'code': None})
+        period = periods[-1]
+        if h.get('temp_f') is not None:
+            period['temps'].append(h['temp_f'])
+        period['prob'] = max(period['prob'], h.get('precip_prob') or 0)
+        period['mm'] += h.get('precip_mm') or 0.0
+        code = h.get('wmo_code')
+        if code is not None and (period['code'] is None or code > period['code']):
+            period['code'] = code  # Highest WMO code = most significant weather
+    return periods
+
+
+def _is_dry(period):
+    return period['prob'] < MIN_PRECIP_PROB and period['mm'] < MIN_PRECIP_MM
+
+
+def _merge_stable(periods):
+    """Run-length encode consecutive dry periods with the same conditions and similar temps."""
+    runs = []
+    for period in periods:
+        last = runs[-1] if runs else None
+        if last and _is_dry(last) and _is_dry(period) and last['code'] == period['code'] \
+                and last['temps'] and period['temps'] \
+                and max(last['temps'] + period['temps']) - min(last['temps'] + period['temps']) <= STABLE_SPREAD_F:
+            last['end'] = period['key']
+            last['temps'] = last['temps'] + period['temps']
+            last['prob'] = max(last['prob'], period['prob'])
+            last['mm'] += period['mm']
+        else:
+            runs.append(dict(period, end=period['key']))
+    return runs
+
+
+def _run_label(run):
+    (day, start), (end_day, end) = run['key'], run['end']
+    if (day, start) == (end_day, end):
+        return f"{_day_name(day)} {start}"
+    if day == end_day:
+        return f"{_day_name(day)} {start}-{end}"
+    return f"{_day_name(day)} {start}-{_day_name(end_day)} {end}"
+
+
+def _run_line(run):
+    temps = f"{round(min(run['temps']))}-{round(max(run['temps']))}°F" if run['temps'] else "temp n/a"
+    precip = "dry" if _is_dry(run) else f"{round(run['prob'])}%, {run['mm']:.1f} mm"
+    conditions = describe(run['code']).lower() if run['code'] is not None else "conditions n/a"
+    return f"{_run_label(run)}: {temps}, {precip}, {conditions}"
+
+
+def _turning_points(hourly_slice):
+    """Daily high and low with their hour (days with at least 6 hours of data)."""
+    days = {}
+    for h in hourly_slice:
+        time_str, temp = h.get('time') or '', h.get('temp_f')
+        if temp is None or len(time_str) < 13:
+            continue
+        days.setdefault(time_str[:10], []).append((temp, int(time_str[11:13])))
+    points = []
+    for day, temps in days.items():
+        if len(temps) < 6:
+            continue
+        high, low = max(temps), min(temps)
+        points.append(f"high {round(high[0])}°F {_short_day(day)} {hour_label(high[1])}")
+        points.append(f"low {round(low[0])}°F {_short_day(day)} {hour_label(low[1])}")
+    return points
+
+
+def _precip_windows(hourly_slice):
+    """Contiguous precipitation hours: start-end, peak chance and hour, total and type."""
+    windows = []
+    current = None
+    for h in hourly_slice:
+        time_str = h.get('time') or ''
+        if len(time_str) < 13:
+            continue
+        prob, mm = h.get('precip_prob') or 0, h.get('precip_mm') or 0.0
+        label = f"{_short_day(time_str[:10])} {hour_label(int(time_str[11:13]))}"
+        if prob >= MIN_PRECIP_PROB or mm >= MIN_PRECIP_MM:
+            if current is None:
+                current = {'start': label, 'peak': (prob, label), 'mm': 0.0, 'code': None}
+                windows.append(current)
+            current['end'] = label
+            current['mm'] += mm
+            if prob > current['peak'][0]:
+                current['peak'] = (prob, label)
+            code = h.get('wmo_code')
+            if code is not None and (current['code'] is None or code > current['code']):
+                current['code'] = code
+        else:
+            current = None
+    lines = []
+    for w in windows:
+        span = w['start'] if w['start'] == w['end'] else f"{w['start']}-{w['end']}"
+        peak_day, _, peak_hour = w['peak'][1].partition(' ')
+        peak_at = peak_hour if w['start'].startswith(peak_day) else w['peak'][1]
+        kind = f", {describe(w['code']).lower()}" if w['code'] is not None else ""
+        lines.append(f"{span} (peak {round(w['peak'][0])}% at {peak_at}, {w['mm']:.1f} mm{kind})")
+    return lines
+
+
+def compact_hourly(hourly_slice, hours=48):
+    """Compact forecast summary of an hourly slice for the AI prompt."""
+    hourly_slice = hourly_slice[:hours]
+    runs = _merge_stable(_periods(hourly_slice))
+    lines = ["Periods (temp °F, max precip chance, total precip, conditions):"]
+    lines += [_run_line(run) for run in runs]
+    points = _turning_points(hourly_slice)
+    if points:
+        lines.append("Turning points: " + "; ".join(points))
+    windows = _precip_windows(hourly_slice)
+    lines.append("Precipitation windows: " + ("; ".join(windows) if windows else "none"))
+    return "\n".join(lines)
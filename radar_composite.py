@@ -0,0 +1,249 @@
+"""
+Radar Loop Compositor
+Stitches the radar tiles around a region into one animated WebP (APNG when
+Pillow has no animated WebP support), so phones play a single image instead of
+compositing a dozen frames of tiles in the browser.
+
+Regions are a block of tiles around a centre tile, so everyone whose location
+falls in the same centre tile shares one loop. Loops are cached per region and
+frame set, in memory and optionally on disk (an LRU capped at max_disk_bytes,
+since every manifest refresh adds a new loop per region).
+
+Tiles come from any callable that returns PNG bytes for (frame, z, x, y, scheme),
+e.g. RadarProxy.tile or local_tile_source() over a directory of stored tiles.
+Requires Pillow (optional dependency).
+"""
+
+import hashlib
+import io
+import math
+import os
+import threading
+from collections import OrderedDict
+
+try:
+    # Optional; only needed to build the loops
+    from PIL import Image, features
+except Exception:
+    Image = None
+    features = None
+
+from radar_proxy import tile_for
+
+TILE_SIZE = 256
+COMPOSITE_ZOOM = 7
+COMPOSITE_RADIUS = 1
+FRAME_MS = 500
+LOOP_DISK_BYTES = 50 * 1024 * 1024  # Stored loops kept on disk, least recently used evicted
+BACKGROUND = (15, 12, 41, 255)  # Matches the app's dark background
+
+
+def tile_bounds(zoom, x, y):
+    """(south, west, north, east) in degrees of a Web Mercator tile."""
+    n = 2 ** zoom
+
+    def lat(ty):
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * ty / n))))
+
+    return lat(y + 1), x / n * 360.0 - 180.0, lat(y), (x + 1) / n * 360.0 - 180.0
+
+
+def region_for(latitude, longitude, zoom=COMPOSITE_ZOOM, radius=COMPOSITE_RADIUS):
+    """The shared region around a location: centre tile, image size and map bounds."""
+    x, y = tile_for(latitude, longitude, zoom)
+    south, _, _, _ = tile_bounds(zoom, x, y + radius)
+    _, west, north, _ = tile_bounds(zoom, x - radius, y - radius)
+    _, _, _, east = tile_bounds(zoom, x + radius, y)
+    return {
+        'zoom': zoom,
+        'x': x,
+        'y': y,
+        'radius': radius,
+        'size': (2 * radius + 1) * TILE_SIZE,
+        'bounds': [[south, west], [north, east]],
+    }
+
+
+def local_tile_source(root):
+    """Tile source reading a radar_proxy TileCache directory (for offline use and tests)."""
+    def source(key):
+        frame, z, x, y, scheme = key
+        with open(os.path.join(root, str(frame), str(z), str(x), f"{y}_{scheme}.png"), 'rb') as f:
+            return f.read()
+    return source
+
+
+def stitch_frame(tile_source, frame, zoom, x, y, scheme, radius=COMPOSITE_RADIUS):
+    """One frame of the region as an RGBA image; missing tiles are left empty.
+
+    Raises RuntimeError if no tile could be loaded (e.g. an upstream outage),
+    so an empty loop is never built and cached.
+    """
+    n = 2 ** zoom
+    size = (2 * radius + 1) * TILE_SIZE
+    image = Image.new('RGBA', (size, size), BACKGROUND)
+    loaded = 0
+    for dy in range(-radius, radius + 1):
+        ty = y + dy
+        if not 0 <= ty < n:
+            continue
+        for dx in range(-radius, radius + 1):
+            try:
+                data = tile_source((frame, zoom, (x + dx) % n, ty, scheme))
+                tile = Image.open(io.BytesIO(data)).convert('RGBA')
+            except Exception:
+                continue
+            image.alpha_composite(tile, ((dx + radius) * TILE_SIZE, (dy + radius) * TILE_SIZE))
+            loaded += 1
+    if not loaded:
+        raise RuntimeError(f"No radar tiles for frame {frame}")
+    return image
+
+
+def encode_loop(images, fmt='webp', duration=FRAME_MS):
+    """Encode frames as an endlessly looping animation. Returns (bytes, content type)."""
+    if fmt == 'webp' and not features.check_module('webp'):
+        fmt = 'png'
+    buffer = io.BytesIO()
+    first, rest = images[0], images[1:]
+    if fmt == 'webp':
+        first.save(buffer, format='WEBP', save_all=True, append_images=rest, duration=duration, loop=0, quality=70)
+        return buffer.getvalue(), 'image/webp'
+    first.save(buffer, format='PNG', save_all=True, append_images=rest, duration=duration, loop=0)
+    return buffer.getvalue(), 'image/apng'
+
+
+class RadarCompositor:
+    """Builds and caches animated loops per (region, frame set)."""
+
+    def __init__(self, tile_source, cache_dir=None, max_entries=64, fmt='webp', max_disk_bytes=LOOP_DISK_BYTES):
+        if Image is None:
+            raise RuntimeError("Pillow is required for radar loops (pip install pillow)")
+        self.tile_source = tile_source
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.max_disk_bytes = max_disk_bytes
+        self.fmt = fmt
+        self.stats = {'built': 0, 'memory_hits': 0, 'disk_hits': 0}
+        self.disk_size = 0
+        self._memory = OrderedDict()
+        self._disk = OrderedDict()  # path -> size, least recently used first
+        self._lock = threading.Lock()
+        self._build_locks = {}
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+            self._load_disk_index()
+
+    def _disk_path(self, key):
+        name = hashlib.sha1(repr(key).encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, f"{name}.{self.fmt}")
+
+    def _load_disk_index(self):
+        """Rebuild the disk LRU order from the loops already stored (by modification time)."""
+        entries = []
+        for filename in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, filename)
+            if filename.endswith('.tmp') or not os.path.isfile(path):
+                continue
+            stat = os.stat(path)
+            entries.append((stat.st_mtime, path, stat.st_size))
+        for _, path, size in sorted(entries):
+            self._disk[path] = size
+            self.disk_size += size
+        with self._lock:
+            self._evict_disk()
+
+    def _read_disk(self, path):
+        """Stored loop bytes, or None if it isn't on disk (never stored or evicted)."""
+        with self._lock:
+            if path not in self._disk:
+                return None
+            self._disk.move_to_end(path)
+            try:
+                with open(path, 'rb') as f:
+                    data = f.read()
+                os.utime(path)  # Keeps the LRU order across restarts
+            except FileNotFoundError:
+                self.disk_size -= self._disk.pop(path, 0)
+                return None
+        return data
+
+    def _write_disk(self, path, data):
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, path)
+        with self._lock:
+            self.disk_size -= self._disk.pop(path, 0)
+            self._disk[path] = len(data)
+            self.disk_size += len(data)
+            self._evict_disk()
+
+    def _evict_disk(self):
+        """Remove the least recently used loops beyond max_disk_bytes; call with the lock held."""
+        while self.max_disk_bytes is not None and self.disk_size > self.max_disk_bytes and len(self._disk) > 1:
+            old_path, old_size = self._disk.popitem(last=False)
+            self.disk_size -= old_size
+            try:
+                os.remove(old_path)
+            except FileNotFoundError:
+                pass
+
+    def _remember(self, key, value):
+        with self._lock:
+            self._memory[key] = value
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def loop(self, frames, zoom, x, y, scheme=4, radius=COMPOSITE_RADIUS):
+        """Animated loop of the given frames (oldest first) for a region.
+
+        Cached under the newest frame id, so a new manifest starts a new loop.
+        Returns (bytes, content type).
+        """
+        if not frames:
+            raise ValueError("No radar frames")
+        key = (tuple(frames), zoom, x, y, scheme, radius, self.fmt)
+        with self._lock:
+            cached = self._memory.get(key)
+            if cached is not None:
+                self._memory.move_to_end(key)
+                self.stats['memory_hits'] += 1
+                return cached
+            build_lock = self._build_locks.setdefault(key, threading.Lock())
+
+        # Single flight: one build per region and frame set
+        try:
+            with build_lock:
+                return self._build(key, frames, zoom, x, y, scheme, radius)
+        finally:
+            with self._lock:
+                self._build_locks.pop(key, None)
+
+    def _build(self, key, frames, zoom, x, y, scheme, radius):
+        """Read or build one loop and remember it; called under the key's build lock."""
+        with self._lock:
+            cached = self._memory.get(key)
+        if cached is not None:
+            self.stats['memory_hits'] += 1
+            return cached
+
+        path = self._disk_path(key) if self.cache_dir else None
+        data = self._read_disk(path) if path else None
+        if data is not None:
+            content_type = 'image/webp' if data[8:12] == b'WEBP' else 'image/apng'
+            self.stats['disk_hits'] += 1
+        else:
+            images = [stitch_frame(self.tile_source, frame, zoom, x, y, scheme, radius) for frame in frames]
+            data, content_type = encode_loop(images, self.fmt)
+            self.stats['built'] += 1
+            if path:
+                self._write_disk(path, data)
+        self._remember(key, (data, content_type))
+        return data, content_type
+
+    def loop_for(self, latitude, longitude, frames, scheme=4, zoom=COMPOSITE_ZOOM, radius=COMPOSITE_RADIUS):
+        """Loop for the region containing a location."""
+        region = region_for(latitude, longitude, zoom, radius)
+        return self.loop(frames, zoom, region['x'], region['y'], scheme, radius)
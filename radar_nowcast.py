@@ -0,0 +1,296 @@
+"""
+Radar Nowcast
+Estimates when precipitation will reach a point from the recent RainViewer
+frames, which catches convective cells the hourly model probabilities miss.
+
+The raw-value tiles (colour scheme 0) around the point are decoded into dBZ
+arrays, the motion of the echoes is estimated by FFT cross-correlation between
+consecutive frames, and the latest frame is advected along that motion until an
+echo reaches the point (or the data region runs out).
+
+Decoded tiles and motion vectors are cached per frame and region (the same 3x3
+block of zoom-7 tiles as radar_composite), so every user in a region shares the
+decoding and correlation work. Requires NumPy and Pillow (optional dependencies).
+
+    python radar_nowcast.py 42.36 -71.06
+"""
+
+import io
+import json
+import math
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+try:
+    # Optional; Streamlit already installs NumPy, the CLI may not have it
+    import numpy as np
+except Exception:
+    np = None
+
+try:
+    # Optional; only needed to decode the tiles
+    from PIL import Image
+except Exception:
+    Image = None
+
+from precip_onset import PRECIP_TYPES, RAIN, SNOW, THUNDERSTORM
+from radar_proxy import MANIFEST_URL, TILE_HOST, fetch_url, tile_for
+
+TILE_SIZE = 256
+NOWCAST_ZOOM = 7
+NOWCAST_RADIUS = 1
+RAW_SCHEME = 0          # Pixel value = dBZ + 32, high bit set for snow
+RAIN_DBZ = 20           # Light rain
+STORM_DBZ = 50          # Convective core
+MOTION_FRAMES = 4       # Latest frames used for the motion estimate
+MAX_SHIFT = 24          # Pixels per frame interval (~180 km/h at mid latitudes)
+SEARCH_RADIUS = 2       # Pixels around the point that count as "here"
+HORIZON_MINUTES = 120
+STEP_MINUTES = 5
+EARTH_CIRCUMFERENCE_KM = 40075.0
+
+
+def http_tile_source(host=TILE_HOST):
+    """Tile source fetching raw tiles from RainViewer or a radar_proxy (same paths)."""
+    host = host.rstrip('/')
+
+    def source(key):
+        frame, z, x, y, scheme = key
+        return fetch_url(f"{host}/v2/radar/{frame}/256/{z}/{x}/{y}/{scheme}/1_1.png")
+    return source
+
+
+def http_manifest_source(proxy_url=''):
+    """Manifest source: the proxy's cached manifest when a proxy is set, RainViewer otherwise."""
+    url = f"{proxy_url.rstrip('/')}/manifest.json" if proxy_url else MANIFEST_URL
+    return lambda: fetch_url(url)
+
+
+def past_frames(manifest):
+    """[(frame id, unix time)] of the observed (past) frames, oldest first."""
+    data = json.loads(manifest) if isinstance(manifest, (bytes, str)) else manifest
+    frames = (data.get('radar') or {}).get('past') or []
+    return [(f['path'].rsplit('/', 1)[-1], f['time']) for f in frames if f.get('path') and f.get('time')]
+
+
+def point_in_region(latitude, longitude, zoom, x, y, radius=NOWCAST_RADIUS):
+    """(row, column) pixel of a location in the region centred on tile (x, y)."""
+    n = 2 ** zoom
+    lat = math.radians(max(-85.0511, min(85.0511, latitude)))
+    col = (longitude + 180.0) / 360.0 * n * TILE_SIZE
+    row = (1.0 - math.log(math.tan(lat) + 1 / math.cos(lat)) / math.pi) / 2.0 * n * TILE_SIZE
+    return row - (y - radius) * TILE_SIZE, col - (x - radius) * TILE_SIZE
+
+
+def decode_tile(data):
+    """Raw-scheme PNG bytes -> (dBZ as uint8 clipped at 0, snow flags as bool)."""
+    image = Image.open(io.BytesIO(data)).convert('LA')
+    pixels = np.asarray(image)
+    value, alpha = pixels[..., 0], pixels[..., 1]
+    dbz = np.where(alpha > 0, (value & 127).astype(np.int16) - 32, 0)
+    return np.clip(dbz, 0, 255).astype(np.uint8), (alpha > 0) & (value >= 128)
+
+
+def estimate_motion(previous, current, max_shift=MAX_SHIFT):
+    """Shift (dy, dx) in pixels that carries previous onto current, or None without echoes.
+
+    The peak of the FFT cross-correlation of the two (windowed) fields, searched
+    within +/- max_shift pixels.
+    """
+    a = previous.astype(np.float32)
+    b = current.astype(np.float32)
+    if not a.any() or not b.any():
+        return None
+    window = np.outer(np.hanning(a.shape[0]), np.hanning(a.shape[1])).astype(np.float32)
+    a = (a - a.mean()) * window
+    b = (b - b.mean()) * window
+    corr = np.fft.irfft2(np.fft.rfft2(b) * np.conj(np.fft.rfft2(a)), s=b.shape)
+    # Row/column k of corr is a shift of k (or k - size); roll so zero shift is at max_shift
+    corr = np.roll(corr, (max_shift, max_shift), axis=(0, 1))[:2 * max_shift + 1, :2 * max_shift + 1]
+    dy, dx = np.unravel_index(int(np.argmax(corr)), corr.shape)
+    return int(dy) - max_shift, int(dx) - max_shift
+
+
+def arrival(dbz, snow, point, velocity, age_minutes=0.0, horizon=HORIZON_MINUTES, step=STEP_MINUTES,
+            radius=SEARCH_RADIUS, threshold=RAIN_DBZ):
+    """First time an echo advected along velocity reaches point.
+
+    Args:
+        dbz, snow: Latest decoded region
+        point: (row, column) of the location in the region
+        velocity: (rows, columns) per minute
+        age_minutes: How old the latest frame already is
+
+    Returns (minutes from now, dBZ, snow) or None. Only checks the window the
+    data covers, so a long horizon with slow motion is cut off at the region edge.
+    """
+    minutes = np.arange(step, horizon + age_minutes + step, step, dtype=np.float64)
+    minutes = minutes[minutes > age_minutes]
+    rows = np.rint(point[0] - velocity[0] * minutes).astype(np.int64)
+    cols = np.rint(point[1] - velocity[1] * minutes).astype(np.int64)
+    inside = (rows >= radius) & (rows < dbz.shape[0] - radius) & (cols >= radius) & (cols < dbz.shape[1] - radius)
+    if not inside.any():
+        return None
+    minutes, rows, cols = minutes[inside], rows[inside], cols[inside]
+
+    # Max over the (2r+1)^2 neighbourhood of every sample in one gather
+    offsets = np.arange(-radius, radius + 1)
+    grid_rows = (rows[:, None, None] + offsets[None, :, None]).repeat(offsets.size, axis=2)
+    grid_cols = (cols[:, None, None] + offsets[None, None, :]).repeat(offsets.size, axis=1)
+    values = dbz[grid_rows, grid_cols].reshape(len(minutes), -1)
+    peak = values.max(axis=1)
+    hits = np.flatnonzero(peak >= threshold)
+    if not hits.size:
+        return None
+    i = int(hits[0])
+    snowy = bool(snow[grid_rows[i], grid_cols[i]][values[i].reshape(offsets.size, offsets.size) >= threshold].any())
+    return int(round(minutes[i] - age_minutes)), int(peak[i]), snowy
+
+
+class RadarNowcaster:
+    """Shared decoded-frame cache and motion estimates for radar nowcasts."""
+
+    def __init__(self, tile_source=None, manifest_source=None, max_tiles=256, clock=time.time):
+        if np is None or Image is None:
+            raise RuntimeError("NumPy and Pillow are required for radar nowcasts (pip install numpy pillow)")
+        self.tile_source = tile_source or http_tile_source()
+        self.manifest_source = manifest_source or http_manifest_source()
+        self.max_tiles = max_tiles
+        self.clock = clock
+        self.stats = {'decoded': 0, 'tile_hits': 0, 'motion_hits': 0}
+        self._tiles = OrderedDict()
+        self._motion = OrderedDict()
+        self._lock = threading.Lock()
+        self._tile_locks = {}
+
+    def _tile(self, key):
+        """Decoded tile, decoded once however many regions and users need it."""
+        with self._lock:
+            cached = self._tiles.get(key)
+            if cached is not None:
+                self._tiles.move_to_end(key)
+                self.stats['tile_hits'] += 1
+                return cached
+            lock = self._tile_locks.setdefault(key, threading.Lock())
+        with lock:
+            with self._lock:
+                cached = self._tiles.get(key)
+            if cached is None:
+                # Upstream errors propagate uncached; RainViewer serves empty tiles outside coverage
+                cached = decode_tile(self.tile_source(key))
+                with self._lock:
+                    self._tiles[key] = cached
+                    self.stats['decoded'] += 1
+                    while len(self._tiles) > self.max_tiles:
+                        self._tiles.popitem(last=False)
+        with self._lock:
+            self._tile_locks.pop(key, None)
+        return cached
+
+    def region(self, frame, zoom, x, y, radius=NOWCAST_RADIUS):
+        """(dBZ, snow) arrays of the (2 * radius + 1)^2 tiles around (x, y) for one frame."""
+        n = 2 ** zoom
+        size = (2 * radius + 1) * TILE_SIZE
+        dbz = np.zeros((size, size), dtype=np.uint8)
+        snow = np.zeros((size, size), dtype=bool)
+        for dy in range(-radius, radius + 1):
+            ty = y + dy
+            if not 0 <= ty < n:
+                continue
+            for dx in range(-radius, radius + 1):
+                tile_dbz, tile_snow = self._tile((frame, zoom, (x + dx) % n, ty, RAW_SCHEME))
+                top, left = (dy + radius) * TILE_SIZE, (dx + radius) * TILE_SIZE
+                dbz[top:top + TILE_SIZE, left:left + TILE_SIZE] = tile_dbz
+                snow[top:top + TILE_SIZE, left:left + TILE_SIZE] = tile_snow
+        return dbz, snow
+
+    def motion(self, frames, zoom, x, y, radius=NOWCAST_RADIUS):
+        """Echo motion in (rows, columns) per minute over the given [(frame, time)], or None.
+
+        The median of the shifts between consecutive frames, so one noisy pair
+        doesn't throw off the estimate. Cached per region and frame set.
+        """
+        key = (tuple(frames), zoom, x, y, radius)
+        with self._lock:
+            if key in self._motion:
+                self.stats['motion_hits'] += 1
+                return self._motion[key]
+
+        shifts = []
+        fields = [self.region(frame, zoom, x, y, radius)[0] for frame, _ in frames]
+        for (previous, (_, t0)), (current, (_, t1)) in zip(zip(fields, frames), zip(fields[1:], frames[1:])):
+            shift = estimate_motion(previous, current)
+            if shift is not None and t1 > t0:
+                minutes = (t1 - t0) / 60.0
+                shifts.append((shift[0] / minutes, shift[1] / minutes))
+        velocity = tuple(float(v) for v in np.median(shifts, axis=0)) if shifts else None
+
+        with self._lock:
+            self._motion[key] = velocity
+            while len(self._motion) > 64:
+                self._motion.popitem(last=False)
+        return velocity
+
+    def nowcast(self, latitude, longitude, frames=None, horizon=HORIZON_MINUTES):
+        """Radar-based precipitation onset at a location, in detect_onset()'s format.
+
+        Returns a dict with minutes, type, emoji, color_start, color_end, dbz,
+        speed_kmh and source 'radar' (probability and amount are None), or None
+        when it is already wet at the point, nothing is approaching or there
+        are too few frames.
+        """
+        if frames is None:
+            frames = past_frames(self.manifest_source())
+        frames = frames[-MOTION_FRAMES:]
+        if len(frames) < 2:
+            return None
+
+        zoom, radius = NOWCAST_ZOOM, NOWCAST_RADIUS
+        x, y = tile_for(latitude, longitude, zoom)
+        point = point_in_region(latitude, longitude, zoom, x, y, radius)
+
+        dbz, snow = self.region(frames[-1][0], zoom, x, y, radius)
+        row, col = int(point[0]), int(point[1])
+        if dbz[max(row - SEARCH_RADIUS, 0):row + SEARCH_RADIUS + 1,
+               max(col - SEARCH_RADIUS, 0):col + SEARCH_RADIUS + 1].max() >= RAIN_DBZ:
+            return None  # Already precipitating; the current conditions say so
+
+        velocity = self.motion(frames, zoom, x, y, radius)
+        if velocity is None:
+            return None
+        age = max(0.0, (self.clock() - frames[-1][1]) / 60.0)
+        hit = arrival(dbz, snow, point, velocity, age_minutes=age, horizon=horizon)
+        if hit is None:
+            return None
+
+        minutes, peak, snowy = hit
+        lat = math.radians(latitude)
+        kind = SNOW if snowy else THUNDERSTORM if peak >= STORM_DBZ else RAIN
+        label, emoji, color_start, color_end = PRECIP_TYPES[kind]
+        km_per_pixel = EARTH_CIRCUMFERENCE_KM * math.cos(lat) / (2 ** zoom * TILE_SIZE)
+        return {
+            'minutes': max(minutes, 1),
+            'probability': None,
+            'amount': None,
+            'type': label,
+            'emoji': emoji,
+            'color_start': color_start,
+            'color_end': color_end,
+            'dbz': peak,
+            'speed_kmh': math.hypot(*velocity) * km_per_pixel * 60.0,
+            'source': 'radar',
+        }
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("Usage: python radar_nowcast.py <lat> <lon>")
+        sys.exit(1)
+    result = RadarNowcaster().nowcast(float(sys.argv[1]), float(sys.argv[2]))
+    if result:
+        print(f"{result['emoji']} {result['type']} in ~{result['minutes']} min "
+              f"({result['dbz']} dBZ, cells moving {result['speed_kmh']:.0f} km/h)")
+    else:
+        print("✅ Nothing approaching on radar")
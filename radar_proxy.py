@@ -0,0 +1,358 @@
+"""
+Radar Tile Proxy
+A small caching proxy in front of RainViewer, so browsers stop fetching the
+frame manifest and the same tiles independently.
+
+    GET /manifest.json                                  cached weather-maps.json (refreshed every MANIFEST_TTL)
+    GET /v2/radar/<frame>/256/<z>/<x>/<y>/<scheme>/1_1.png
+                                                        tile from a disk LRU keyed by (frame, z, x, y, scheme)
+    GET /composite/<z>/<x>/<y>/<scheme>?past=<n>&nowcast=<0|1>
+                                                        animated loop of the region around a tile: the latest
+                                                        n past frames (all if 0) plus, unless nowcast=0, the
+                                                        nowcast frames (radar_composite.py, needs Pillow and --loops)
+
+Tile paths mirror tilecache.rainviewer.com, so the radar viewer only swaps the
+host (RADAR_PROXY_URL). Frames never change once published, so tiles are served
+with long cache headers. Once per manifest interval the latest frames are
+prewarmed around popular locations (one "lat,lon" per line in a file).
+
+    python radar_proxy.py serve --port 8765 --cache-dir radar_cache --max-mb 500 --prewarm locations.txt --loops
+"""
+
+import json
+import math
+import os
+import re
+import sys
+import threading
+import time
+import urllib.request
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+MANIFEST_URL = "https://api.rainviewer.com/public/weather-maps.json"
+TILE_HOST = "https://tilecache.rainviewer.com"
+MANIFEST_TTL = 300
+USER_AGENT = "Weather-App radar proxy"
+
+TILE_PATH = re.compile(r'^/v2/radar/(\w+)/256/(\d{1,2})/(\d+)/(\d+)/(\d{1,2})/1_1\.png$')
+COMPOSITE_PATH = re.compile(r'^/composite/(\d{1,2})/(\d+)/(\d+)/(\d{1,2})$')
+PREWARM_ZOOMS = (6, 7, 8)
+PREWARM_FRAMES = 4
+LOOP_CACHE_SHARE = 0.1  # Of --max-mb, for stored loops when --loops is on
+
+
+def fetch_url(url, timeout=15):
+    """Default upstream fetcher: returns the response body, raises on HTTP errors."""
+    request = urllib.request.Request(url, headers={'User-Agent': USER_AGENT})
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        return response.read()
+
+
+def tile_for(latitude, longitude, zoom):
+    """Web Mercator tile (x, y) containing a location."""
+    n = 2 ** zoom
+    lat = math.radians(max(-85.0511, min(85.0511, latitude)))
+    x = int((longitude + 180.0) / 360.0 * n)
+    y = int((1.0 - math.log(math.tan(lat) + 1 / math.cos(lat)) / math.pi) / 2.0 * n)
+    return min(max(x, 0), n - 1), min(max(y, 0), n - 1)
+
+
+def tiles_around(latitude, longitude, zoom, radius=1):
+    """Tiles in a (2 * radius + 1)^2 block centred on a location (wrapping in x)."""
+    n = 2 ** zoom
+    cx, cy = tile_for(latitude, longitude, zoom)
+    return [
+        ((cx + dx) % n, cy + dy)
+        for dy in range(-radius, radius + 1)
+        for dx in range(-radius, radius + 1)
+        if 0 <= cy + dy < n
+    ]
+
+
+class TileCache:
+    """Disk cache of tiles with least-recently-used eviction by total size."""
+
+    def __init__(self, root, max_bytes=500 * 1024 * 1024):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._index = OrderedDict()  # key -> size, oldest first
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+        self._load_index()
+
+    def _path(self, key):
+        frame, z, x, y, scheme = key
+        return os.path.join(self.root, str(frame), str(z), str(x), f"{y}_{scheme}.png")
+
+    def _load_index(self):
+        """Rebuild the LRU order from the files already on disk (by modification time)."""
+        entries = []
+        for dirpath, _, filenames in os.walk(self.root):
+            for filename in filenames:
+                if not filename.endswith('.png'):
+                    continue
+                path = os.path.join(dirpath, filename)
+                parts = os.path.relpath(path, self.root).split(os.sep)
+                if len(parts) != 4:
+                    continue
+                frame, z, x, name = parts
+                y, scheme = name[:-4].split('_', 1)
+                stat = os.stat(path)
+                entries.append((stat.st_mtime, (frame, int(z), int(x), int(y), int(scheme)), stat.st_size))
+        for _, key, size in sorted(entries):
+            self._index[key] = size
+            self.size += size
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._index
+
+    def __len__(self):
+        return len(self._index)
+
+    def get(self, key):
+        """Tile bytes, or None if not cached."""
+        with self._lock:
+            if key not in self._index:
+                return None
+            self._index.move_to_end(key)
+        try:
+            with open(self._path(key), 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            with self._lock:
+                self.size -= self._index.pop(key, 0)
+            return None
+        try:
+            os.utime(self._path(key))  # Keeps the LRU order across restarts
+        except FileNotFoundError:
+            pass  # Evicted by a concurrent put() since it was read; the bytes are still good
+        return data
+
+    def put(self, key, data):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, path)
+        with self._lock:
+            self.size -= self._index.pop(key, 0)
+            self._index[key] = len(data)
+            self.size += len(data)
+            while self.size > self.max_bytes and len(self._index) > 1:
+                old_key, old_size = self._index.popitem(last=False)
+                self.size -= old_size
+                try:
+                    os.remove(self._path(old_key))
+                except FileNotFoundError:
+                    pass
+
+
+class RadarProxy:
+    """Manifest cache, tile cache and prewarming; independent of the HTTP layer."""
+
+    def __init__(self, cache, fetch=fetch_url, manifest_ttl=MANIFEST_TTL, prewarm_locations=(),
+                 clock=time.monotonic):
+        self.cache = cache
+        self.compositor = None  # Optional radar_composite.RadarCompositor over self.tile
+        self.fetch = fetch
+        self.manifest_ttl = manifest_ttl
+        self.prewarm_locations = list(prewarm_locations)
+        self.clock = clock
+        self.stats = {'manifest_fetches': 0, 'tile_hits': 0, 'tile_misses': 0, 'prewarmed': 0}
+        self._manifest = None
+        self._manifest_at = None
+        self._manifest_lock = threading.Lock()
+        self._tile_locks = {}
+        self._tile_locks_lock = threading.Lock()
+
+    def manifest(self):
+        """Frame manifest bytes, fetched from upstream at most once per TTL."""
+        with self._manifest_lock:
+            now = self.clock()
+            if self._manifest is None or now - self._manifest_at >= self.manifest_ttl:
+                try:
+                    self._manifest = self.fetch(MANIFEST_URL)
+                    self.stats['manifest_fetches'] += 1
+                except Exception:
+                    if self._manifest is None:
+                        raise
+                    # Keep serving the previous manifest until upstream recovers
+                self._manifest_at = now
+            return self._manifest
+
+    def frames(self, past=0, nowcast=True):
+        """Frame ids (e.g. '1700000000' or 'a1b2c3') from the current manifest, oldest first.
+
+        past keeps only the latest n past frames (0 for all); nowcast adds the nowcast frames.
+        """
+        data = json.loads(self.manifest())
+        radar = data.get('radar') or {}
+        past_frames = radar.get('past') or []
+        selected = (past_frames[-past:] if past else past_frames) + ((radar.get('nowcast') or []) if nowcast else [])
+        paths = [f.get('path', '') for f in selected]
+        return [p.rsplit('/', 1)[-1] for p in paths if p]
+
+    def tile(self, key):
+        """Tile bytes for (frame, z, x, y, scheme), from disk or fetched once from upstream."""
+        data = self.cache.get(key)
+        if data is not None:
+            self.stats['tile_hits'] += 1
+            return data
+
+        # Single flight: concurrent requests for the same tile share one upstream fetch
+        with self._tile_locks_lock:
+            lock = self._tile_locks.setdefault(key, threading.Lock())
+        with lock:
+            data = self.cache.get(key)
+            if data is None:
+                frame, z, x, y, scheme = key
+                data = self.fetch(f"{TILE_HOST}/v2/radar/{frame}/256/{z}/{x}/{y}/{scheme}/1_1.png")
+                self.cache.put(key, data)
+                self.stats['tile_misses'] += 1
+            else:
+                self.stats['tile_hits'] += 1
+        with self._tile_locks_lock:
+            self._tile_locks.pop(key, None)
+        return data
+
+    def prewarm(self, schemes=(4, 6), zooms=PREWARM_ZOOMS, frames=PREWARM_FRAMES, radius=1):
+        """Fetch the latest frames' tiles around every prewarm location. Returns tiles fetched."""
+        fetched = 0
+        for frame in self.frames()[-frames:]:
+            for latitude, longitude in self.prewarm_locations:
+                for zoom in zooms:
+                    for x, y in tiles_around(latitude, longitude, zoom, radius):
+                        for scheme in schemes:
+                            key = (frame, zoom, x, y, scheme)
+                            if key in self.cache:
+                                continue
+                            try:
+                                self.tile(key)
+                                fetched += 1
+                            except Exception:
+                                pass
+        self.stats['prewarmed'] += fetched
+        return fetched
+
+
+def start_prewarming(proxy, interval=MANIFEST_TTL):
+    """Prewarm in a daemon thread after every manifest interval. Returns a stop Event."""
+    stop = threading.Event()
+
+    def loop():
+        while not stop.is_set():
+            try:
+                proxy.prewarm()
+            except Exception as e:
+                print(f"Radar prewarm failed: {e}", flush=True)
+            stop.wait(interval)
+
+    threading.Thread(target=loop, name='radar-prewarm', daemon=True).start()
+    return stop
+
+
+def make_handler(proxy):
+    """HTTP request handler class bound to a RadarProxy."""
+
+    class RadarProxyHandler(BaseHTTPRequestHandler):
+        def _send(self, status, body, content_type, cache_control):
+            self.send_response(status)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            self.send_header('Cache-Control', cache_control)
+            self.send_header('Access-Control-Allow-Origin', '*')
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            path, _, query = self.path.partition('?')
+            try:
+                if path == '/manifest.json':
+                    self._send(200, proxy.manifest(), 'application/json', f'public, max-age={min(60, proxy.manifest_ttl)}')
+                    return
+                match = TILE_PATH.match(path)
+                if match:
+                    frame, z, x, y, scheme = match.groups()
+                    key = (frame, int(z), int(x), int(y), int(scheme))
+                    # Published frames never change
+                    self._send(200, proxy.tile(key), 'image/png', 'public, max-age=86400, immutable')
+                    return
+                match = COMPOSITE_PATH.match(path)
+                if match and proxy.compositor is not None:
+                    z, x, y, scheme = (int(g) for g in match.groups())
+                    params = parse_qs(query)
+                    past = params.get('past', ['0'])[0]
+                    frames = proxy.frames(past=int(past) if past.isdigit() else 0,
+                                          nowcast=params.get('nowcast', ['1'])[0] != '0')
+                    body, content_type = proxy.compositor.loop(frames, z, x, y, scheme)
+                    # Changes with every manifest refresh
+                    self._send(200, body, content_type, f'public, max-age={min(60, proxy.manifest_ttl)}')
+                    return
+                if path == '/stats.json':
+                    stats = dict(proxy.stats, tiles=len(proxy.cache), bytes=proxy.cache.size)
+                    if proxy.compositor is not None:
+                        stats['loops'] = dict(proxy.compositor.stats, bytes=proxy.compositor.disk_size)
+                    body = json.dumps(stats).encode('utf-8')
+                    self._send(200, body, 'application/json', 'no-store')
+                    return
+                self._send(404, b'Not found', 'text/plain', 'no-store')
+            except Exception as e:
+                self._send(502, f"Upstream error: {e}".encode('utf-8'), 'text/plain', 'no-store')
+
+        def log_message(self, format, *args):
+            pass  # Tile requests are far too chatty for stderr
+
+    return RadarProxyHandler
+
+
+def serve(proxy, host='127.0.0.1', port=8765):
+    """Create (but don't start) a threaded HTTP server for a proxy."""
+    return ThreadingHTTPServer((host, port), make_handler(proxy))
+
+
+def read_locations(path):
+    """Read "lat,lon" lines (blank lines and # comments ignored)."""
+    locations = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.split('#', 1)[0].strip()
+            if line:
+                lat, lon = line.split(',')[:2]
+                locations.append((float(lat), float(lon)))
+    return locations
+
+
+def _option(argv, name, default):
+    return argv[argv.index(name) + 1] if name in argv else default
+
+
+if __name__ == "__main__":
+    argv = sys.argv[1:]
+    if argv[:1] == ['serve']:
+        port = int(_option(argv, '--port', 8765))
+        max_bytes = int(_option(argv, '--max-mb', 500)) * 1024 * 1024
+        # Stored loops take a share of --max-mb, tiles the rest
+        loop_bytes = int(max_bytes * LOOP_CACHE_SHARE) if '--loops' in argv else 0
+        cache = TileCache(_option(argv, '--cache-dir', 'radar_cache'), max_bytes - loop_bytes)
+        prewarm_file = _option(argv, '--prewarm', None)
+        proxy = RadarProxy(cache, prewarm_locations=read_locations(prewarm_file) if prewarm_file else ())
+        if '--loops' in argv:
+            from radar_composite import RadarCompositor
+            proxy.compositor = RadarCompositor(proxy.tile, cache_dir=os.path.join(cache.root, 'loops'),
+                                               max_disk_bytes=loop_bytes)
+        server = serve(proxy, _option(argv, '--host', '127.0.0.1'), port)
+        if proxy.prewarm_locations:
+            start_prewarming(proxy)
+        print(f"✅ Radar proxy on http://{server.server_address[0]}:{port} ({len(cache)} cached tiles)")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            server.server_close()
+    else:
+        print("Usage: python radar_proxy.py serve [--host 127.0.0.1] [--port 8765] [--cache-dir radar_cache]")
+        print("                                   [--max-mb 500] [--prewarm locations.txt] [--loops]")
@@ -0,0 +1,67 @@
+// Hourly strip component: renders the scrollable hourly cards from typed arrays.
+//
+// Streamlit sends the series as little-endian binary args (Uint8Array here):
+// times (int32 local minutes since 1970, read as UTC), temps (float32 in the
+// display unit, NaN when missing), emoji (uint8 index into the emojis list),
+// probs (uint8 %) and amounts (float32 inches). See app_components.hourly_strip().
+(function () {
+    "use strict";
+
+    var DAYS = ["Sun", "Mon", "Tue", "Wed", "Thu", "Fri", "Sat"];
+    var strip = document.getElementById("strip");
+    var rendered = null;
+
+    function send(type, data) {
+        window.parent.postMessage(Object.assign({ isStreamlitMessage: true, type: type }, data || {}), "*");
+    }
+
+    // Copy first: the bytes may be a view at an offset that isn't aligned for the type
+    function view(bytes, Type) {
+        return new Type(bytes.slice().buffer);
+    }
+
+    function hourLabel(hour) {
+        return (hour % 12 || 12) + (hour < 12 ? "AM" : "PM");
+    }
+
+    function render(args) {
+        var times = view(args.times, Int32Array);
+        var temps = view(args.temps, Float32Array);
+        var emoji = args.emoji;
+        var probs = args.probs;
+        var amounts = view(args.amounts, Float32Array);
+        var cards = [];
+        var lastDay = null;
+
+        for (var i = 0; i < times.length; i++) {
+            var date = new Date(times[i] * 60000);
+            var day = DAYS[date.getUTCDay()];
+            var dayLabel = day !== lastDay && i > 0 ? "<div class='day'>" + day + "</div>" : "";
+            lastDay = day;
+            var temp = isNaN(temps[i]) ? "N/A" : Math.round(temps[i]) + "°";
+            // Amount shown whenever there is any chance (even 0.00")
+            var amount = probs[i] > 0 ? "<br><span class='amount'>" + amounts[i].toFixed(2) + "\"</span>" : "";
+            cards.push(
+                "<div class='card'>" + dayLabel +
+                "<div class='time" + (i === 0 ? " now" : "") + "'>" + (i === 0 ? "Now" : hourLabel(date.getUTCHours())) + "</div>" +
+                "<div class='emoji'>" + (args.emojis[emoji[i]] || "🌤️") + "</div>" +
+                "<div class='temp'>" + temp + "</div>" +
+                "<div class='precip'>💧 " + probs[i] + "%" + amount + "</div></div>"
+            );
+        }
+        strip.innerHTML = cards.join("");
+    }
+
+    window.addEventListener("message", function (event) {
+        if (event.data && event.data.type === "streamlit:render") {
+            var args = event.data.args;
+            // Reruns resend the same payload; only rebuild the cards when it changed
+            if (args.version !== rendered) {
+                render(args);
+                rendered = args.version;
+            }
+            send("streamlit:setFrameHeight", { height: args.height || 250 });
+        }
+    });
+    send("streamlit:componentReady", { apiVersion: 1 });
+})();
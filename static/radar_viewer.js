@@ -0,0 +1,298 @@
+// Radar viewer component: Leaflet map with animated RainViewer frames.
+//
+// Streamlit sends only small props (latitude, longitude, label, variant, proxy);
+// the page, this script and Leaflet are static files the browser caches. Leaflet
+// is loaded from static/vendor/leaflet when the app reports it has been vendored
+// (local_leaflet), unpkg otherwise.
+// With a proxy (radar_proxy.py) the manifest and tiles come from its shared cache,
+// and narrow screens show its pre-composited loop (one image) when it has --loops.
+(function () {
+    "use strict";
+
+    var LEAFLET_VERSION = "1.9.4";
+    var LOCAL_LEAFLET = "../../app/static/vendor/leaflet/";
+    var CDN_LEAFLET = "https://unpkg.com/leaflet@" + LEAFLET_VERSION + "/dist/";
+    var FRAMES_URL = "https://api.rainviewer.com/public/weather-maps.json";
+    var TILE_HOST = "https://tilecache.rainviewer.com";
+    var REFRESH_MS = 300000;  // Reload frames every 5 minutes
+    var FRAME_MS = 500;       // 2 frames/second
+    var LOOP_ZOOM = 7;        // Matches radar_composite.COMPOSITE_ZOOM / COMPOSITE_RADIUS
+    var LOOP_RADIUS = 1;
+    var LOOP_MAX_WIDTH = 640; // Screens up to this wide get the single-image loop
+
+    // 'animated': 2 hours past + nowcast, Weather Channel colors
+    // 'recent': last 4 past frames, NEXRAD colors
+    var VARIANTS = {
+        animated: { title: "🌧️ Radar Animation", scheme: 4, lastFrames: 0, nowcast: true },
+        recent: { title: "🌦️ Precipitation Radar", scheme: 6, lastFrames: 4, nowcast: false }
+    };
+
+    function send(type, data) {
+        window.parent.postMessage(Object.assign({ isStreamlitMessage: true, type: type }, data || {}), "*");
+    }
+
+    function loadScript(src) {
+        return new Promise(function (resolve, reject) {
+            var script = document.createElement("script");
+            script.src = src;
+            script.onload = resolve;
+            script.onerror = reject;
+            document.head.appendChild(script);
+        });
+    }
+
+    function loadStyle(href) {
+        var link = document.createElement("link");
+        link.rel = "stylesheet";
+        link.href = href;
+        document.head.appendChild(link);
+    }
+
+    function loadCdnLeaflet() {
+        loadStyle(CDN_LEAFLET + "leaflet.css");
+        return loadScript(CDN_LEAFLET + "leaflet.js");
+    }
+
+    // Only asks the app for Leaflet when it is vendored, so there is no request that is bound to 404
+    function loadLeaflet(local) {
+        if (!local) {
+            return loadCdnLeaflet();
+        }
+        var version = "?v=" + LEAFLET_VERSION;
+        return loadScript(LOCAL_LEAFLET + "leaflet.js" + version).then(function () {
+            loadStyle(LOCAL_LEAFLET + "leaflet.css" + version);
+        }, loadCdnLeaflet);
+    }
+
+    var map = null;
+    var marker = null;
+    var props = null;
+    var variant = VARIANTS.animated;
+    var frames = [];
+    var layers = [];
+    var pastCount = 0;
+    var current = 0;
+    var visible = true;
+    var timer = null;
+    var refreshTimer = null;
+    var looping = false;
+
+    var timestamp = document.getElementById("timestamp");
+    var playBtn = document.getElementById("playBtn");
+
+    function frameLabel(index) {
+        var frame = frames[index];
+        if (!frame) {
+            return "";
+        }
+        var date = new Date(frame.time * 1000);
+        if (!variant.nowcast) {
+            var minutesAgo = Math.round((Date.now() - date.getTime()) / 60000);
+            return minutesAgo < 5 ? "Current" : minutesAgo + " min ago";
+        }
+        var label = index < pastCount ? "📊 PAST" : "🔮 FUTURE";
+        var now = index === pastCount - 1 ? " (NOW)" : "";
+        return label + now + " - " + date.toLocaleTimeString();
+    }
+
+    function updateTimestamp() {
+        var text = looping ? "🔁 Last " + frames.length + " frames" : frameLabel(current);
+        if (map.getZoom() > 13 && visible && frames.length) {
+            text += " ⚠️ Scaled";  // Radar tiles stop at zoom 13
+        }
+        timestamp.textContent = text;
+    }
+
+    function showFrame(index) {
+        if (layers[current]) {
+            layers[current].setOpacity(0);
+        }
+        current = index;
+        if (visible && layers[current]) {
+            layers[current].setOpacity(0.7);
+        }
+        updateTimestamp();
+    }
+
+    function stop() {
+        if (timer) {
+            clearInterval(timer);
+            timer = null;
+        }
+        playBtn.textContent = "▶️ Play";
+    }
+
+    function toggleAnimation() {
+        if (timer) {
+            stop();
+            return;
+        }
+        playBtn.textContent = "⏸️ Pause";
+        timer = setInterval(function () {
+            showFrame((current + 1) % layers.length);
+        }, FRAME_MS);
+    }
+
+    function toggleRadar() {
+        visible = !visible;
+        layers.forEach(function (layer, index) {
+            layer.setOpacity(visible && index === current ? 0.7 : 0);
+        });
+    }
+
+    function tileToLatLng(x, y) {
+        var n = Math.pow(2, LOOP_ZOOM);
+        var lat = Math.atan(Math.sinh(Math.PI * (1 - 2 * y / n))) * 180 / Math.PI;
+        return [lat, x / n * 360 - 180];
+    }
+
+    // Same region as radar_composite.region_for(), so the URL is shared by everyone nearby
+    function loopRegion() {
+        var n = Math.pow(2, LOOP_ZOOM);
+        var latRad = props.latitude * Math.PI / 180;
+        var x = Math.floor((props.longitude + 180) / 360 * n);
+        var y = Math.floor((1 - Math.log(Math.tan(latRad) + 1 / Math.cos(latRad)) / Math.PI) / 2 * n);
+        return {
+            x: x,
+            y: y,
+            bounds: [tileToLatLng(x - LOOP_RADIUS, y + LOOP_RADIUS + 1), tileToLatLng(x + LOOP_RADIUS + 1, y - LOOP_RADIUS)]
+        };
+    }
+
+    function addTileLayers(proxy) {
+        looping = false;
+        var loaded = 0;
+        frames.forEach(function (frame, index) {
+            var url = (proxy || TILE_HOST) + frame.path + "/256/{z}/{x}/{y}/" + variant.scheme + "/1_1.png";
+            var layer = L.tileLayer(url, {
+                opacity: 0,
+                zIndex: 10 + index,
+                maxZoom: 15,
+                maxNativeZoom: 13,  // Radar tiles exist up to level 13
+                tileSize: 256,
+                keepBuffer: 4,
+                updateWhenIdle: true,
+                updateWhenZooming: true,
+                updateInterval: 200
+            });
+            // Added invisible so every frame preloads
+            layer.addTo(map);
+            layer.once("load", function () {
+                loaded++;
+                if (loaded === frames.length) {
+                    playBtn.disabled = false;
+                    showFrame(pastCount - 1);
+                } else {
+                    timestamp.textContent = "Loading... " + loaded + "/" + frames.length;
+                }
+            });
+            layers.push(layer);
+        });
+        current = pastCount - 1;
+    }
+
+    // One animated image instead of a tile layer per frame; tiles if the proxy has no loops
+    function addLoopLayer(proxy) {
+        var region = loopRegion();
+        var url = proxy + "/composite/" + LOOP_ZOOM + "/" + region.x + "/" + region.y + "/" +
+            variant.scheme + "?past=" + (variant.lastFrames || 0) + "&nowcast=" + (variant.nowcast ? 1 : 0);
+        var overlay = L.imageOverlay(url, region.bounds, { opacity: 0, zIndex: 10 });
+        overlay.once("load", function () {
+            looping = true;
+            layers = [overlay];
+            showFrame(0);
+        });
+        overlay.once("error", function () {
+            map.removeLayer(overlay);
+            addTileLayers(proxy);
+        });
+        overlay.addTo(map);
+    }
+
+    function loadFrames() {
+        stop();
+        layers.forEach(function (layer) { map.removeLayer(layer); });
+        layers = [];
+        frames = [];
+        looping = false;
+        playBtn.disabled = true;
+        timestamp.textContent = "Loading frames...";
+
+        var proxy = (props.proxy || "").replace(/\/$/, "");
+        fetch(proxy ? proxy + "/manifest.json" : FRAMES_URL)
+            .then(function (response) { return response.json(); })
+            .then(function (data) {
+                var radar = data.radar || {};
+                var past = radar.past || [];
+                if (variant.lastFrames) {
+                    past = past.slice(-variant.lastFrames);
+                }
+                var nowcast = variant.nowcast ? (radar.nowcast || []) : [];
+                frames = past.concat(nowcast);
+                pastCount = past.length;
+                if (!frames.length) {
+                    timestamp.textContent = "No radar data available";
+                    return;
+                }
+
+                if (proxy && window.innerWidth <= LOOP_MAX_WIDTH) {
+                    addLoopLayer(proxy);
+                } else {
+                    addTileLayers(proxy);
+                }
+            })
+            .catch(function (error) {
+                console.error("Error loading radar:", error);
+                timestamp.textContent = "Radar unavailable";
+            });
+    }
+
+    function render(args) {
+        var changedVariant = !props || props.variant !== args.variant || props.proxy !== args.proxy;
+        var moved = !props || props.latitude !== args.latitude || props.longitude !== args.longitude;
+        props = args;
+        variant = VARIANTS[args.variant] || VARIANTS.animated;
+        document.getElementById("title").textContent = variant.title;
+
+        if (!map) {
+            map = L.map("map", { maxZoom: 15, zoomControl: true });
+            L.tileLayer("https://{s}.basemaps.cartocdn.com/dark_all/{z}/{x}/{y}{r}.png", {
+                attribution: '&copy; <a href="https://www.openstreetmap.org/copyright">OpenStreetMap</a> contributors &copy; <a href="https://carto.com/attributions">CARTO</a>',
+                maxZoom: 19
+            }).addTo(map);
+            map.on("zoomend", function () {
+                if (frames.length) {
+                    updateTimestamp();
+                }
+            });
+            marker = L.marker([args.latitude, args.longitude]).addTo(map);
+            playBtn.onclick = toggleAnimation;
+            document.getElementById("toggleBtn").onclick = toggleRadar;
+            document.getElementById("centerBtn").onclick = function () {
+                map.setView([props.latitude, props.longitude], map.getZoom());
+            };
+            refreshTimer = setInterval(loadFrames, REFRESH_MS);
+        }
+        if (moved) {
+            map.setView([args.latitude, args.longitude], 8);
+            marker.setLatLng([args.latitude, args.longitude]);
+        }
+        marker.bindPopup(args.label || "").openPopup();
+        if (changedVariant) {
+            loadFrames();
+        }
+        send("streamlit:setFrameHeight", { height: args.height || 520 });
+    }
+
+    var leaflet = null;
+    window.addEventListener("message", function (event) {
+        if (event.data && event.data.type === "streamlit:render") {
+            var args = event.data.args;
+            leaflet = leaflet || loadLeaflet(args.local_leaflet);
+            leaflet.then(function () { render(args); }, function () {
+                timestamp.textContent = "Map library unavailable";
+            });
+        }
+    });
+    send("streamlit:componentReady", { apiVersion: 1 });
+})();
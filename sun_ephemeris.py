@@ -0,0 +1,160 @@
+"""
+Sun Ephemeris
+Computes sunrise, sunset and civil twilight locally for any latitude/longitude and
+range of dates (NOAA solar position equations, accurate to about a minute), and
+classifies forecast hours as day or night from them.
+
+Times are returned as minutes after local midnight, using the location's
+utc_offset_seconds as reported by Open-Meteo. Events that do not happen on a date
+(polar day/night) are NaN. Uses NumPy when it is installed, plain math otherwise.
+"""
+
+import math
+from datetime import date
+
+try:
+    # Optional; Streamlit already installs NumPy, the CLI may not have it
+    import numpy as np
+except Exception:
+    np = None
+
+SUNRISE_ZENITH = 90.833  # Refraction + solar disc radius
+CIVIL_ZENITH = 96.0      # Sun 6° below the horizon
+_JD_OFFSET = 1721424.5   # date.toordinal() -> Julian day at 00:00 UTC
+
+
+def _clip(value, xp):
+    if xp is math:
+        return max(-1.0, min(1.0, value))
+    return xp.clip(value, -1.0, 1.0)
+
+
+def _solar_terms(ordinal, longitude, xp):
+    """Declination (radians) and equation of time (minutes) around local solar noon."""
+    jd = ordinal + _JD_OFFSET + 0.5 - longitude / 360.0
+    t = (jd - 2451545.0) / 36525.0
+
+    mean_long = xp.radians((280.46646 + t * (36000.76983 + t * 0.0003032)) % 360)
+    mean_anom = xp.radians(357.52911 + t * (35999.05029 - 0.0001537 * t))
+    eccent = 0.016708634 - t * (0.000042037 + 0.0000001267 * t)
+    center = (xp.sin(mean_anom) * (1.914602 - t * (0.004817 + 0.000014 * t))
+              + xp.sin(2 * mean_anom) * (0.019993 - 0.000101 * t)
+              + xp.sin(3 * mean_anom) * 0.000289)
+    omega = xp.radians(125.04 - 1934.136 * t)
+    app_long = xp.radians(xp.degrees(mean_long) + center - 0.00569 - 0.00478 * xp.sin(omega))
+    mean_obliq = 23 + (26 + (21.448 - t * (46.815 + t * (0.00059 - t * 0.001813))) / 60) / 60
+    obliq = xp.radians(mean_obliq + 0.00256 * xp.cos(omega))
+
+    declination = xp.asin(xp.sin(obliq) * xp.sin(app_long)) if xp is math else \
+        xp.arcsin(xp.sin(obliq) * xp.sin(app_long))
+    y = xp.tan(obliq / 2) ** 2
+    eq_time = 4 * xp.degrees(
+        y * xp.sin(2 * mean_long)
+        - 2 * eccent * xp.sin(mean_anom)
+        + 4 * eccent * y * xp.sin(mean_anom) * xp.cos(2 * mean_long)
+        - 0.5 * y * y * xp.sin(4 * mean_long)
+        - 1.25 * eccent * eccent * xp.sin(2 * mean_anom)
+    )
+    return declination, eq_time
+
+
+def _hour_angle(latitude, declination, zenith, xp):
+    """Hour angle in degrees for a zenith angle; also the raw cosine (|cos| > 1 = no event)."""
+    lat = math.radians(latitude)
+    cos_ha = (math.cos(math.radians(zenith)) / (math.cos(lat) * xp.cos(declination))
+              - math.tan(lat) * xp.tan(declination))
+    acos = xp.acos if xp is math else xp.arccos
+    return xp.degrees(acos(_clip(cos_ha, xp))), cos_ha
+
+
+def _events(ordinal, latitude, longitude, offset_minutes, xp):
+    declination, eq_time = _solar_terms(ordinal, longitude, xp)
+    noon = 720 - 4 * longitude - eq_time + offset_minutes
+    ha_sun, cos_sun = _hour_angle(latitude, declination, SUNRISE_ZENITH, xp)
+    ha_civil, cos_civil = _hour_angle(latitude, declination, CIVIL_ZENITH, xp)
+    return noon, ha_sun, cos_sun, ha_civil, cos_civil
+
+
+def _ordinals(dates):
+    return [date.fromisoformat(str(d)[:10]).toordinal() for d in dates]
+
+
+def sun_times(latitude, longitude, dates, utc_offset_seconds=0):
+    """Sun events for each date ("YYYY-MM-DD" strings or date objects).
+
+    Returns a dict of lists, one value per date, in minutes after local midnight:
+        'dawn', 'sunrise', 'solar_noon', 'sunset', 'dusk'  (NaN when the event doesn't occur)
+        'daylight_seconds'                                    (0 in polar night, 86400 in polar day)
+    """
+    ordinals = _ordinals(dates)
+    offset_minutes = (utc_offset_seconds or 0) / 60.0
+    # Keep clear of the poles where the hour-angle formula divides by cos(lat)
+    latitude = max(-89.99, min(89.99, latitude))
+
+    if np is not None:
+        noon, ha_sun, cos_sun, ha_civil, cos_civil = _events(
+            np.asarray(ordinals, dtype=np.float64), latitude, longitude, offset_minutes, np)
+        no_sun_event = np.abs(cos_sun) > 1
+        no_civil_event = np.abs(cos_civil) > 1
+        daylight = np.where(cos_sun > 1, 0.0, np.where(cos_sun < -1, 86400.0, 8 * ha_sun * 60))
+        return {
+            'dawn': np.where(no_civil_event, np.nan, noon - 4 * ha_civil).tolist(),
+            'sunrise': np.where(no_sun_event, np.nan, noon - 4 * ha_sun).tolist(),
+            'solar_noon': noon.tolist(),
+            'sunset': np.where(no_sun_event, np.nan, noon + 4 * ha_sun).tolist(),
+            'dusk': np.where(no_civil_event, np.nan, noon + 4 * ha_civil).tolist(),
+            'daylight_seconds': daylight.tolist(),
+        }
+
+    result = {key: [] for key in ('dawn', 'sunrise', 'solar_noon', 'sunset', 'dusk', 'daylight_seconds')}
+    for ordinal in ordinals:
+        noon, ha_sun, cos_sun, ha_civil, cos_civil = _events(
+            float(ordinal), latitude, longitude, offset_minutes, math)
+        sun_ok = abs(cos_sun) <= 1
+        civil_ok = abs(cos_civil) <= 1
+        result['dawn'].append(noon - 4 * ha_civil if civil_ok else math.nan)
+        result['sunrise'].append(noon - 4 * ha_sun if sun_ok else math.nan)
+        result['solar_noon'].append(noon)
+        result['sunset'].append(noon + 4 * ha_sun if sun_ok else math.nan)
+        result['dusk'].append(noon + 4 * ha_civil if civil_ok else math.nan)
+        result['daylight_seconds'].append(0.0 if cos_sun > 1 else 86400.0 if cos_sun < -1 else 8 * ha_sun * 60)
+    return result
+
+
+def daylight_flags(times, latitude, longitude, utc_offset_seconds=0):
+    """True for each local ISO time ("YYYY-MM-DDTHH:MM") between sunrise and sunset.
+
+    Sun events are computed once per distinct date in the series.
+    """
+    dates = sorted({t[:10] for t in times if t and len(t) >= 16})
+    if not dates:
+        return [False] * len(times)
+    events = sun_times(latitude, longitude, dates, utc_offset_seconds)
+    by_date = {
+        d: (events['sunrise'][i], events['daylight_seconds'][i] / 60.0)
+        for i, d in enumerate(dates)
+    }
+
+    flags = []
+    for t in times:
+        if not t or len(t) < 16 or t[:10] not in by_date:
+            flags.append(False)
+            continue
+        sunrise, day_minutes = by_date[t[:10]]
+        if math.isnan(sunrise):
+            # Polar day (all daylight) or polar night (none)
+            flags.append(day_minutes >= 1440)
+            continue
+        minute_of_day = int(t[11:13]) * 60 + int(t[14:16])
+        flags.append((minute_of_day - sunrise) % 1440 < day_minutes)
+    return flags
+
+
+def format_minutes(minutes):
+    """Format minutes after local midnight as '7:15 AM' (None for missing events)."""
+    if minutes is None or math.isnan(minutes):
+        return None
+    total = int(round(minutes)) % 1440
+    hour, minute = divmod(total, 60)
+    suffix = 'AM' if hour < 12 else 'PM'
+    return f"{hour % 12 or 12}:{minute:02d} {suffix}"
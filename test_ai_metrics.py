@@ -0,0 +1,149 @@
+"""Test AI call metrics: recording, summaries, cost, export and the instrumented overview calls."""
+import csv
+import io
+import json
+from types import SimpleNamespace
+
+import ai_overview
+import weather
+from ai_metrics import METRICS, MetricsRegistry, estimate_cost
+from test_overview_stream import LOCATION, WEATHER, event, fake_openai, with_fake
+
+
+class Timer:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_track_and_summary():
+    timer = Timer()
+    metrics = MetricsRegistry(clock=lambda: 1000.0, timer=timer)
+    for latency, tokens in ((1.2, (800, 300)), (2.0, (900, 400))):
+        with metrics.track('perplexity', 'sonar-pro') as call:
+            timer.now += latency
+            call.set_usage({'prompt_tokens': tokens[0], 'completion_tokens': tokens[1]})
+            call.cache = 'miss'
+    with metrics.track('perplexity', 'sonar-pro') as call:
+        timer.now += 0.001
+        call.cache = 'hit'
+    metrics.record('perplexity', 'sonar-pro', fallback='deadline')
+    try:
+        with metrics.track('openai', 'gpt-4o-mini') as call:
+            raise RuntimeError("boom")
+    except RuntimeError:
+        pass
+
+    calls = metrics.calls()
+    assert len(calls) == 5 and calls[0]['latency_ms'] == 1200.0
+    assert calls[0]['cost_usd'] == estimate_cost('sonar-pro', 800, 300)
+    assert calls[4]['error'] == "boom" and calls[4]['fallback'] == 'error'
+
+    openai, perplexity = metrics.summary()
+    assert perplexity['calls'] == 4 and perplexity['cache_hit_rate'] == round(1 / 3, 3)
+    # Cache hits don't count towards API latency
+    assert perplexity['latency_p50_ms'] == 2000.0 and perplexity['latency_p95_ms'] == 2000.0
+    assert perplexity['prompt_tokens'] == 1700 and perplexity['completion_tokens'] == 700
+    assert perplexity['fallbacks'] == "deadline: 1"
+    assert openai['calls'] == 1 and openai['fallbacks'] == "error: 1"
+
+
+def test_cost():
+    assert estimate_cost('gpt-4o-mini', 1_000_000, 1_000_000) == 0.75
+    assert estimate_cost('unknown-model', 100, 100) is None
+    assert estimate_cost('sonar-pro', None, 100) is None
+
+
+def test_export():
+    metrics = MetricsRegistry(max_calls=2)
+    for tokens in (10, 20, 30):
+        metrics.record('openai', 'gpt-4o-mini', latency_ms=5.0, prompt_tokens=tokens, completion_tokens=1)
+    rows = list(csv.DictReader(io.StringIO(metrics.to_csv())))
+    # Only the most recent calls are kept
+    assert [row['prompt_tokens'] for row in rows] == ['20', '30']
+    exported = json.loads(metrics.to_json())
+    assert exported['summary'][0]['prompt_tokens'] == 50 and len(exported['calls']) == 2
+
+
+def test_openai_usage_recorded():
+    completion = SimpleNamespace(
+        choices=[SimpleNamespace(message=SimpleNamespace(content="Sunny."))],
+        usage=SimpleNamespace(prompt_tokens=90, completion_tokens=12),
+    )
+    client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=lambda **kw: completion)))
+
+    def check():
+        METRICS.clear()
+        assert weather.generate_ai_overview(LOCATION, WEATHER) == "Sunny."
+        call = METRICS.calls()[-1]
+        assert (call['provider'], call['model']) == ('openai', 'gpt-4o-mini')
+        assert call['prompt_tokens'] == 90 and call['completion_tokens'] == 12 and call['fallback'] is None
+    with_fake(lambda api_key: client, check)
+
+    # Streams ask for usage and record it from the final event
+    usage = SimpleNamespace(choices=[], usage=SimpleNamespace(prompt_tokens=90, completion_tokens=4))
+    fake, made = fake_openai([event("Sunny."), usage])
+
+    def check_stream():
+        METRICS.clear()
+        assert list(weather.stream_ai_overview(LOCATION, WEATHER)) == ["Sunny."]
+        assert made[0]['stream_options'] == {"include_usage": True}
+        assert METRICS.calls()[-1]['completion_tokens'] == 4
+    with_fake(fake, check_stream)
+
+    fake, _ = fake_openai(error=RuntimeError("Error code: 429 - insufficient_quota"))
+
+    def check_quota():
+        METRICS.clear()
+        list(weather.stream_ai_overview(LOCATION, WEATHER))
+        assert METRICS.calls()[-1]['fallback'] == 'quota'
+    with_fake(fake, check_quota)
+
+
+def test_perplexity_stream_usage():
+    class Response:
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+        def raise_for_status(self):
+            pass
+
+        def iter_lines(self, decode_unicode=False):
+            for text, completion_tokens in (("Rain ", 1), ("later.", 2)):
+                yield "data: " + json.dumps({
+                    'choices': [{'delta': {'content': text}}],
+                    'usage': {'prompt_tokens': 210, 'completion_tokens': completion_tokens},
+                })
+            yield "data: [DONE]"
+
+    original = ai_overview.requests.post
+    ai_overview.requests.post = lambda url, **kwargs: Response()
+    try:
+        metrics = MetricsRegistry()
+        with metrics.track('perplexity', ai_overview.PERPLEXITY_MODEL) as call:
+            hourly_slice = [{'time': '2024-07-04T12:00', 'temp_f': 70, 'wmo_code': 61, 'precip_prob': 80, 'precip_mm': 1.0}]
+            text = ''.join(ai_overview.stream_perplexity_overview(LOCATION, hourly_slice, 'key', call=call))
+        assert text == "Rain later."
+        assert metrics.calls()[0]['prompt_tokens'] == 210 and metrics.calls()[0]['completion_tokens'] == 2
+    finally:
+        ai_overview.requests.post = original
+
+
+if __name__ == "__main__":
+    print("Testing AI call metrics")
+    print("=" * 60)
+    test_track_and_summary()
+    print("✅ Calls, cache hits, latency and fallbacks summarised")
+    test_cost()
+    print("✅ Cost estimates")
+    test_export()
+    print("✅ CSV and JSON export of the latest calls")
+    test_openai_usage_recorded()
+    print("✅ OpenAI usage recorded (plain and streamed)")
+    test_perplexity_stream_usage()
+    print("✅ Perplexity stream usage recorded")
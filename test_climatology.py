@@ -0,0 +1,124 @@
+"""Test archive backfill into the climatology store and the precomputed normals."""
+import math
+import random
+import tempfile
+from array import array
+from datetime import date, timedelta
+
+from climatology import DAYS, VARIABLES, ClimatologyStore, DayAccumulator, _parse_args, cell_key, compute_normals, day_index
+
+
+def fake_archive(latitude, longitude, year, session=None):
+    """Daily data where every value is the year offset, so normals are easy to check."""
+    day = date(year, 1, 1)
+    daily = {'time': [], 'temperature_2m_max': [], 'temperature_2m_min': [], 'precipitation_sum': []}
+    while day.year == year:
+        daily['time'].append(day.isoformat())
+        daily['temperature_2m_max'].append(70.0 + (year - 2000))
+        daily['temperature_2m_min'].append(50.0)
+        daily['precipitation_sum'].append(None if day.month == 7 else 1.0)
+        day += timedelta(days=1)
+    return daily
+
+
+def test_day_index():
+    assert day_index('2023-01-01') == 0
+    assert day_index('2024-02-29') == 59
+    assert day_index('2023-03-01') == day_index('2024-03-01') == 60
+    assert day_index('2023-12-31') == 365
+
+
+def test_cell_key():
+    assert cell_key(40.71, -74.01) == cell_key(40.76, -73.98) == "40.75_-74.00"
+
+
+def test_backfill_and_normals():
+    with tempfile.TemporaryDirectory() as root:
+        store = ClimatologyStore(root)
+        calls = []
+
+        def fetch(lat, lon, year, session=None):
+            calls.append(year)
+            return fake_archive(lat, lon, year)
+
+        assert store.backfill(40.71, -74.01, 2000, 2002, fetch=fetch) == 3
+        normals = store.normals(40.71, -74.01)
+        assert normals.meta['normals']['years'] == 3
+        assert round(normals.get('temperature_2m_max', '2024-04-10'), 3) == 71.0
+        assert normals.get('temperature_2m_max', '2024-04-10', 'p10') < 71.0 < \
+            normals.get('temperature_2m_max', '2024-04-10', 'p90')
+        assert normals.get('temperature_2m_min', '2024-02-29') == 50.0
+        assert normals.anomaly('temperature_2m_max', '2024-04-10', 79.0) == 8.0
+        assert normals.get('precipitation_sum', '2024-07-15') is None
+
+        # Resumes after the last stored year
+        assert store.backfill(40.71, -74.01, 2000, 2003, fetch=fetch) == 1
+        assert calls == [2000, 2001, 2002, 2003]
+        assert round(store.normals(40.76, -73.98).get('temperature_2m_max', '2024-04-10'), 3) == 71.5
+
+
+def exact_percentile(values, q):
+    ordered = sorted(values)
+    pos = (len(ordered) - 1) * q / 100.0
+    lo, hi = int(pos), min(int(pos) + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (pos - lo)
+
+
+def test_streaming_percentiles():
+    rng = random.Random(7)
+    accumulator = DayAccumulator(-100.0, 150.0, 0.25)
+    values = [rng.gauss(60, 15) for _ in range(450)]
+    for value in values:
+        accumulator.add(100, value)
+    assert abs(accumulator.mean(100) - sum(values) / len(values)) < 1e-9
+    for q, estimate in zip((10, 50, 90), accumulator.percentiles(100, (10, 50, 90))):
+        assert abs(estimate - exact_percentile(values, q)) <= 0.25
+    assert math.isnan(accumulator.mean(101)) and math.isnan(accumulator.percentiles(101, (50,))[0])
+
+    # Whole normals over 30 years match the exact windowed percentiles to within a bin
+    rows = [{v: array('f', [rng.gauss(60, 15) for _ in range(DAYS)]) for v in VARIABLES} for _ in range(30)]
+    normals, years = compute_normals(iter(rows), window_days=7)
+    window = [row['temperature_2m_max'][(200 + offset) % DAYS] for row in rows for offset in range(-7, 8)]
+    assert years == 30
+    assert abs(normals['temperature_2m_max']['p90'][200] - exact_percentile(window, 90)) <= 0.25
+
+
+def test_late_backfill_visible():
+    with tempfile.TemporaryDirectory() as root:
+        app_store = ClimatologyStore(root)
+        assert app_store.normals(40.71, -74.01) is None
+        # Another process (the CLI) backfills after the app has looked the cell up
+        ClimatologyStore(root).backfill(40.71, -74.01, 2000, 2001, fetch=fake_archive)
+        normals = app_store.normals(40.71, -74.01)
+        assert normals is not None and normals.meta['normals']['years'] == 2
+        assert app_store.normals(40.71, -74.01) is normals
+
+
+def test_parse_args():
+    # The value after --years is removed, not the first positional that equals it
+    assert _parse_args(['backfill', '30', '-74', '--years', '30']) == (['backfill', '30', '-74'], 30)
+    assert _parse_args(['backfill', '30', '-74', '--years', '030']) == (['backfill', '30', '-74'], 30)
+    assert _parse_args(['lookup', '40.7', '-74.0', '2024-07-04']) == (['lookup', '40.7', '-74.0', '2024-07-04'], 30)
+    for argv in (['backfill', '1', '2', '--years'], ['--years', 'ten'], ['--years', '0']):
+        try:
+            _parse_args(argv)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError(f"{argv} accepted")
+
+
+if __name__ == "__main__":
+    print("Testing climatology normals store")
+    print("=" * 60)
+    test_day_index()
+    test_cell_key()
+    print("✅ Day-of-year and grid cell keys")
+    test_backfill_and_normals()
+    print("✅ Backfill, resume and normals lookup")
+    test_streaming_percentiles()
+    print("✅ Streaming mean and percentiles within one bin of exact")
+    test_late_backfill_visible()
+    print("✅ Cells backfilled after a miss are picked up")
+    test_parse_args()
+    print("✅ --years parsing and bad values")
@@ -0,0 +1,138 @@
+"""Test the daily briefing job: panel-compatible keys, cache reuse, quota and rate limits."""
+import threading
+from datetime import datetime, timedelta, timezone
+
+from ai_overview import PROMPT_VERSION, build_hourly_summary, current_hour_index
+from daily_briefings import RateLimiter, _parse_args, run_briefings
+from overview_cache import OverviewCache, overview_key
+
+START = datetime(2024, 7, 4, 0, tzinfo=timezone.utc)
+NOW = START + timedelta(hours=6, minutes=20)
+BOSTON = {'city': 'Boston', 'region': 'Massachusetts', 'country': 'United States',
+          'latitude': 42.36, 'longitude': -71.06}
+DENVER = {'city': 'Denver', 'region': 'Colorado', 'country': 'United States',
+          'latitude': 39.74, 'longitude': -104.99}
+
+
+def forecast(base_temp, utc_offset_hours):
+    """Open-Meteo style forecast: local times starting at local midnight on July 4."""
+    times = [(START + timedelta(hours=h)).strftime('%Y-%m-%dT%H:%M') for h in range(72)]
+    return {
+        'utc_offset_seconds': utc_offset_hours * 3600,
+        'hourly': {
+            'time': times,
+            'temperature_2m': [base_temp + (h % 24) / 2 for h in range(72)],
+            'weather_code': [61 if 30 <= h < 34 else 2 for h in range(72)],
+            'precipitation_probability': [70 if 30 <= h < 34 else 10 for h in range(72)],
+            'precipitation': [1.2 if 30 <= h < 34 else 0.0 for h in range(72)],
+        },
+    }
+
+
+FORECASTS = {BOSTON['city']: forecast(60, -4), DENVER['city']: forecast(50, -6)}
+
+
+def fake_fetch(locations):
+    return [FORECASTS.get(loc['city']) for loc in locations]
+
+
+class FakeAI:
+    def __init__(self, error=None):
+        self.calls = []
+        self.error = error
+        self.lock = threading.Lock()
+
+    def __call__(self, location, hourly_slice, api_key):
+        with self.lock:
+            self.calls.append((location['city'], hourly_slice[0]['time']))
+        if self.error:
+            raise self.error
+        return f"Overview for {location['city']} from {hourly_slice[0]['time']}"
+
+
+def test_keys_match_panel():
+    cache = OverviewCache()
+    ai = FakeAI()
+    stats = run_briefings([BOSTON, DENVER], cache, 'key', hours=3, rate=0,
+                          fetch=fake_fetch, generate=ai, now=NOW)
+    assert stats['generated'] == 6 and stats['failed'] == 0
+    # The panel's slice an hour from now is already cached
+    boston = FORECASTS['Boston']
+    start = current_hour_index(boston['hourly']['time'], boston['utc_offset_seconds'], NOW + timedelta(hours=1))
+    later = build_hourly_summary(boston['hourly'], start, 48)
+    text = cache.get(overview_key(BOSTON, later, PROMPT_VERSION, kind='perplexity'))
+    assert text == "Overview for Boston from 2024-07-04T03:00"
+
+
+def test_current_hour_is_local():
+    # 06:20 UTC is 02:20 in Boston (UTC-4): the slice starts at the 02:00 local hour
+    times = FORECASTS['Boston']['hourly']['time']
+    assert times[current_hour_index(times, -4 * 3600, NOW)] == "2024-07-04T02:00"
+    assert times[current_hour_index(times, 0, NOW)] == "2024-07-04T06:00"
+    assert times[current_hour_index(times, 5.5 * 3600, NOW)] == "2024-07-04T11:00"
+    # Past the end of the forecast: start at the beginning
+    assert current_hour_index(times, 0, NOW + timedelta(days=5)) == 0
+
+
+def test_rerun_hits_cache():
+    cache = OverviewCache()
+    ai = FakeAI()
+    run_briefings([BOSTON], cache, 'key', hours=2, rate=0, fetch=fake_fetch, generate=ai, now=NOW)
+    stats = run_briefings([BOSTON], cache, 'key', hours=2, rate=0, fetch=fake_fetch, generate=ai, now=NOW)
+    assert len(ai.calls) == 2
+    assert stats['cached'] == 2 and stats['generated'] == 0
+
+
+def test_missing_forecast_and_quota():
+    cache = OverviewCache()
+    ai = FakeAI(error=RuntimeError("429 Client Error: Too Many Requests"))
+    unknown = dict(BOSTON, city='Nowhere')
+    stats = run_briefings([unknown, BOSTON, DENVER], cache, 'key', hours=3, workers=1, rate=0,
+                          fetch=fake_fetch, generate=ai, now=NOW)
+    assert stats['no_forecast'] == 1
+    # The first quota error stops the AI calls; nothing is cached
+    assert len(ai.calls) == 1 and stats['failed'] == 1 and stats['skipped'] == 5
+    assert cache.stats['stored'] == 0
+
+
+def test_rate_limiter():
+    clock = [100.0]
+    sleeps = []
+
+    def sleep(seconds):
+        sleeps.append(seconds)
+        clock[0] += seconds
+
+    limiter = RateLimiter(2.0, clock=lambda: clock[0], sleep=sleep)
+    for _ in range(3):
+        limiter.wait()
+    assert sleeps == [0.5, 0.5]
+
+
+def test_parse_args():
+    args, options = _parse_args(['cities.json', '--hours', '2', '--rate', '0.5'])
+    assert args == ['cities.json'] and options['hours'] == 2 and options['rate'] == 0.5
+    for argv in (['--hours'], ['--workers', '--rate', '1'], ['--rate', 'fast'], ['--workers', '0']):
+        try:
+            _parse_args(argv)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError(f"{argv} accepted")
+
+
+if __name__ == "__main__":
+    print("Testing daily briefings")
+    print("=" * 60)
+    test_keys_match_panel()
+    print("✅ Briefings are stored under the overview panel's keys")
+    test_current_hour_is_local()
+    print("✅ Slices start at the location's current local hour")
+    test_rerun_hits_cache()
+    print("✅ Cached locations are not generated again")
+    test_missing_forecast_and_quota()
+    print("✅ Missing forecasts and quota errors are handled")
+    test_rate_limiter()
+    print("✅ AI requests are rate limited")
+    test_parse_args()
+    print("✅ Flags without a valid value are rejected")
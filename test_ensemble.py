@@ -0,0 +1,39 @@
+"""Test streaming decode and percentile reduction of ensemble members."""
+from ensemble import decode_ensemble_csv, reduce_ensemble
+
+SAMPLE_CSV = """latitude,longitude,elevation,utc_offset_seconds,timezone,timezone_abbreviation
+42.36,-71.06,12.0,-18000,America/New_York,EST
+
+time,temperature_2m (°F),temperature_2m_member01 (°F),temperature_2m_member02 (°F),temperature_2m_member03 (°F),temperature_2m_member04 (°F),precipitation (mm),precipitation_member01 (mm),precipitation_member02 (mm),precipitation_member03 (mm),precipitation_member04 (mm)
+2024-01-15T00:00,30.0,31.0,32.0,33.0,34.0,0.0,0.0,0.0,0.0,0.0
+2024-01-15T01:00,40.0,30.0,20.0,10.0,50.0,0.0,0.2,1.5,6.0,
+""".splitlines()
+
+
+def test_decode_is_compact():
+    decoded = decode_ensemble_csv(SAMPLE_CSV)
+    assert decoded['time'] == ['2024-01-15T00:00', '2024-01-15T01:00']
+    assert decoded['utc_offset_seconds'] == -18000
+    assert decoded['members'] == {'temperature_2m': 5, 'precipitation': 5}
+    assert decoded['temperature_2m'].typecode == 'f' and len(decoded['temperature_2m']) == 10
+
+
+def test_bands_and_exceedance():
+    bands = reduce_ensemble(decode_ensemble_csv(SAMPLE_CSV))
+    temps = bands['temperature_2m']
+    assert [round(v, 1) for v in temps['p50']] == [32.0, 30.0]
+    assert [round(v, 1) for v in temps['p10']] == [30.4, 14.0]
+    assert [round(v, 1) for v in temps['p90']] == [33.6, 46.0]
+    # Hour 2 has one missing member: 3 of 4 valid members reach 0.1 mm
+    assert bands['exceedance']['0.1'] == [0, 75]
+    assert bands['exceedance']['1'] == [0, 50]
+    assert bands['exceedance']['5'] == [0, 25]
+
+
+if __name__ == "__main__":
+    print("Testing ensemble percentile bands")
+    print("=" * 60)
+    test_decode_is_compact()
+    print("✅ CSV members decode line by line into float32 arrays")
+    test_bands_and_exceedance()
+    print("✅ p10/p50/p90 and exceedance probabilities")
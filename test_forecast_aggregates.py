@@ -0,0 +1,39 @@
+"""Test single-pass daily/period aggregation of hourly forecast data."""
+from forecast_aggregates import aggregate_columns, aggregate_summary
+
+TIMES = [f"2024-01-15T{h:02d}:00" for h in range(20, 24)] + [f"2024-01-16T{h:02d}:00" for h in range(0, 14)]
+TEMPS = [40, 39, None, 37] + [36 - h * 0.5 for h in range(6)] + [33 + h for h in range(8)]
+PROBS = [0, 10, 30, 50] + [60, 40, 20, 0, 0, 0] + [0, 0, 0, 0, 0, 0, 70, 80]
+AMOUNTS = [0, 0, 0.2, 0.6] + [1.0, 0.4, 0, 0, 0, 0] + [0, 0, 0, 0, 0, 0, 0.3, None]
+
+
+def test_days_and_periods():
+    result = aggregate_columns(TIMES, TEMPS, PROBS, AMOUNTS)
+    first, second = result['days']
+    assert first['date'] == '2024-01-15' and first['hours'] == 4
+    assert (first['temp_min'], first['temp_max'], first['temp_first']) == (37, 40, 40)
+    assert first['periods']['evening']['precip_hours'] == [('10 PM', 30, 0.2), ('11 PM', 50, 0.6)]
+    # 12 AM - 5 AM is night, 11 AM is morning (not night), 12 PM is afternoon
+    assert [h for h, _, _ in second['periods']['night']['precip_hours']] == ['12 AM', '1 AM']
+    assert [h for h, _, _ in second['periods']['morning']['precip_hours']] == []
+    assert [h for h, _, _ in second['periods']['afternoon']['precip_hours']] == ['12 PM', '1 PM']
+    assert second['prob_max'] == 80 and round(second['precip_total'], 2) == 1.7
+
+
+def test_overall_and_summary_input():
+    slice_ = [{'time': t, 'temp_f': tf, 'precip_prob': p, 'precip_mm': a}
+              for t, tf, p, a in zip(TIMES, TEMPS, PROBS, AMOUNTS)]
+    overall = aggregate_summary(slice_)['overall']
+    assert overall['hours'] == len(TIMES)
+    assert overall['temp_min'] == 33 and overall['temp_max'] == 40
+    assert round(overall['precip_total'], 2) == 2.5
+    assert overall['prob_sum'] == sum(PROBS)
+
+
+if __name__ == "__main__":
+    print("Testing forecast aggregation engine")
+    print("=" * 60)
+    test_days_and_periods()
+    print("✅ Per-day and per-period stats in one pass")
+    test_overall_and_summary_input()
+    print("✅ Overall totals from build_hourly_summary() slices")
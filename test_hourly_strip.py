@@ -0,0 +1,45 @@
+"""Test the binary hourly strip payload (app_components.pack_hourly_strip)."""
+import math
+import struct
+from datetime import datetime, timedelta
+
+from app_components import pack_hourly_strip
+
+
+def unpack(payload, typecode, key):
+    data = payload[key]
+    return list(struct.unpack(f"<{len(data) // 4}{typecode}", data))
+
+
+def test_round_trip():
+    times = ["2024-07-04T22:00", "2024-07-04T23:00", "bad", "2024-07-05T00:00"]
+    payload = pack_hourly_strip(
+        times, [71.4, None, 70.0, 68.6], ["🌙", "🌧️", "☀️", "🌙"], [0, 60, 10, None], [0.0, 0.12, 0.0, 0.0]
+    )
+    minutes = unpack(payload, 'i', 'times')
+    # The unparseable hour is dropped; times stay on the local wall clock
+    assert [datetime(1970, 1, 1) + timedelta(minutes=m) for m in minutes] == [
+        datetime(2024, 7, 4, 22), datetime(2024, 7, 4, 23), datetime(2024, 7, 5, 0)]
+    temps = unpack(payload, 'f', 'temps')
+    assert round(temps[0], 1) == 71.4 and math.isnan(temps[1]) and round(temps[2], 1) == 68.6
+    assert [payload['emojis'][i] for i in payload['emoji']] == ["🌙", "🌧️", "🌙"]
+    assert list(payload['probs']) == [0, 60, 0]
+    assert [round(a, 2) for a in unpack(payload, 'f', 'amounts')] == [0.0, 0.12, 0.0]
+
+
+def test_payload_size():
+    start = datetime(2024, 7, 4, 0)
+    times = [(start + timedelta(hours=h)).isoformat(timespec='minutes') for h in range(72)]
+    payload = pack_hourly_strip(times, [70.0] * 72, ["☀️", "🌙"] * 36, [20] * 72, [0.01] * 72)
+    size = sum(len(v) for k, v in payload.items() if k != 'emojis')
+    # 14 bytes per hour, against ~330 bytes of markup per card before
+    assert size == 72 * 14
+
+
+if __name__ == "__main__":
+    print("Testing hourly strip payload")
+    print("=" * 60)
+    test_round_trip()
+    print("✅ Times, temperatures, emojis, probabilities and amounts round-trip")
+    test_payload_size()
+    print("✅ 72 hours in about 1 KB")
@@ -0,0 +1,59 @@
+"""Test the offline IP range table used by "Use Current Location"."""
+import os
+import tempfile
+import time
+
+from ip_geolocation import IPRangeDatabase, build_ip_range_database
+
+SAMPLE_RANGES = [
+    ('8.8.8.0', '8.8.8.255', 37.386, -122.0838, 'Mountain View', 'California', 'United States'),
+    ('1.1.1.0', '1.1.1.255', -33.494, 143.2104, 'Sydney', 'New South Wales', 'Australia'),
+    ('81.2.69.0', '81.2.69.255', 51.5142, -0.0931, 'London', 'England', 'United Kingdom'),
+    ('2001:db8::', '2001:db8::ffff', 0.0, 0.0, 'Skipped', '', ''),  # IPv6 rows are ignored
+]
+
+
+def _build_sample_db(directory):
+    path = os.path.join(directory, 'ip_ranges.bin')
+    count = build_ip_range_database(SAMPLE_RANGES, path)
+    assert count == 3, f"expected 3 IPv4 ranges, got {count}"
+    return path
+
+
+def test_lookup_hits_and_misses():
+    with tempfile.TemporaryDirectory() as tmp:
+        db = IPRangeDatabase(_build_sample_db(tmp))
+        try:
+            london = db.lookup('81.2.69.160')
+            assert london['city'] == 'London' and london['country'] == 'United Kingdom'
+            assert db.lookup('8.8.8.0')['city'] == 'Mountain View'   # range start
+            assert db.lookup('1.1.1.255')['city'] == 'Sydney'        # range end
+            assert db.lookup('1.1.2.0') is None                      # gap between ranges
+            assert db.lookup('0.0.0.1') is None                      # before first range
+            assert db.lookup('2001:db8::1') is None                  # IPv6 not covered
+            assert db.lookup('not-an-ip') is None
+        finally:
+            db.close()
+
+
+def test_lookup_speed():
+    with tempfile.TemporaryDirectory() as tmp:
+        db = IPRangeDatabase(_build_sample_db(tmp))
+        try:
+            start = time.perf_counter()
+            for _ in range(10000):
+                db.lookup('81.2.69.160')
+            per_lookup_us = (time.perf_counter() - start) / 10000 * 1e6
+            print(f"   Average lookup: {per_lookup_us:.1f} µs")
+            assert per_lookup_us < 1000
+        finally:
+            db.close()
+
+
+if __name__ == "__main__":
+    print("Testing offline IP range database")
+    print("=" * 60)
+    test_lookup_hits_and_misses()
+    print("✅ Lookups return the right ranges and misses")
+    test_lookup_speed()
+    print("✅ Lookups are local and fast")
@@ -0,0 +1,83 @@
+"""Test alignment and spread/disagreement flags across forecast models."""
+import math
+
+import model_consensus
+from model_consensus import align_models, compute_consensus, consensus_summary
+
+
+def _model(times, temps, probs, precip):
+    return {'hourly': {'time': times, 'temperature_2m': temps,
+                       'precipitation_probability': probs, 'precipitation': precip}}
+
+
+DATASETS = {
+    'ECMWF': _model(['2024-01-15T00:00', '2024-01-15T01:00', '2024-01-15T02:00'],
+                    [30.0, 32.0, 34.0], [10, 20, 80], [0.0, 0.0, 2.0]),
+    'GFS': _model(['2024-01-15T00:00', '2024-01-15T01:00', '2024-01-15T02:00'],
+                  [31.0, 40.0, 35.0], [10, 70, 90], [0.0, 0.0, 0.0]),
+    # Visual Crossing times carry seconds and start an hour later
+    'Visual Crossing': _model(['2024-01-15T01:00:00', '2024-01-15T02:00:00', '2024-01-15T03:00:00'],
+                              [33.0, 35.0, 36.0], [None, 85, 50], [0.0, 1.0, 0.5]),
+    'ICON': None,
+}
+
+
+def check_consensus():
+    aligned = align_models(DATASETS)
+    assert aligned['models'] == ['ECMWF', 'GFS', 'Visual Crossing']
+    assert aligned['time'] == ['2024-01-15T00:00', '2024-01-15T01:00', '2024-01-15T02:00', '2024-01-15T03:00']
+    assert math.isnan(aligned['temperature_2m'][2][0])
+
+    consensus = compute_consensus(aligned)
+    temp = consensus['temperature_2m']
+    assert temp['count'] == [2, 3, 3, 1]
+    assert [round(v, 2) for v in temp['mean']] == [30.5, 35.0, 34.67, 36.0]
+    assert temp['spread'] == [1.0, 8.0, 1.0, 0.0]
+    assert consensus['reasons'][0] == []
+    assert consensus['reasons'][1] == ['temperature', 'precipitation chance']
+    assert consensus['reasons'][2] == ['wet vs dry']
+    # A single model can't disagree with itself
+    assert consensus['disagree'] == [False, True, True, False]
+    return consensus
+
+
+def test_consensus():
+    check_consensus()
+
+
+def test_consensus_without_numpy():
+    saved = model_consensus.np
+    model_consensus.np = None
+    try:
+        check_consensus()
+    finally:
+        model_consensus.np = saved
+
+
+def test_no_models():
+    consensus = compute_consensus(align_models({'ICON': None}))
+    assert consensus['time'] == [] and consensus['disagree'] == []
+    assert consensus_summary(consensus)['max_temp_spread'] is None
+
+
+def test_summary():
+    consensus = compute_consensus(align_models(DATASETS))
+    summary = consensus_summary(consensus, start_time='2024-01-15T01:00', hours=2)
+    assert summary['hours'] == 2
+    assert summary['max_temp_spread'] == 8.0
+    assert summary['max_temp_spread_time'] == '2024-01-15T01:00'
+    assert summary['disagree_hours'] == 2
+    assert summary['first_disagreement'] == '2024-01-15T01:00'
+
+
+if __name__ == "__main__":
+    print("Testing cross-model consensus")
+    print("=" * 60)
+    test_consensus()
+    print("✅ Models aligned on a common time axis with per-hour mean and spread")
+    test_consensus_without_numpy()
+    print("✅ Pure-Python fallback matches")
+    test_no_models()
+    print("✅ No models available")
+    test_summary()
+    print("✅ Window summary")
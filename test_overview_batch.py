@@ -0,0 +1,182 @@
+"""Test the shared OpenAI client and batch overviews in weather.py with a fake client."""
+import contextlib
+import io
+import threading
+import time
+from types import SimpleNamespace
+
+import weather
+from test_overview_stream import WEATHER, with_fake
+
+CITIES = ['Boston', 'Denver', 'Austin', 'Seattle', 'Miami', 'Chicago']
+
+
+def fake_openai(fail=None, delay=0.0):
+    """OpenAI stand-in answering "Overview of <city>"; fail(city, attempt) may raise."""
+    built, attempts = [], {}
+    lock = threading.Lock()
+    running = [0, 0]  # now, peak
+
+    def create(**kwargs):
+        city = kwargs['messages'][1]['content'].split(' for ')[1].split(',')[0]
+        with lock:
+            attempts[city] = attempts.get(city, 0) + 1
+            running[0] += 1
+            running[1] = max(running[1], running[0])
+        try:
+            time.sleep(delay)
+            if fail:
+                fail(city, attempts[city])
+            return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=f" Overview of {city} "))])
+        finally:
+            with lock:
+                running[0] -= 1
+
+    client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    client.with_options = lambda **options: built.append(options) or client
+
+    def factory(api_key):
+        built.append(api_key)
+        return client
+    return factory, built, attempts, running
+
+
+def items(cities):
+    return [({'city': city, 'region': '', 'country': 'US'}, WEATHER) for city in cities]
+
+
+def test_client_reused():
+    fake, built, _, _ = fake_openai()
+
+    def check():
+        for city in CITIES[:3]:
+            assert weather.generate_ai_overview(items([city])[0][0], WEATHER) == f"Overview of {city}"
+        assert weather.stream_ai_overview(items(['Boston'])[0][0], WEATHER) is not None
+        assert built == ['test-key']
+        # A new key gets a new client
+        weather.os.environ['OPENAI_API_KEY'] = 'other-key'
+        weather.generate_ai_overview(items(['Boston'])[0][0], WEATHER)
+        assert built == ['test-key', 'other-key']
+    with_fake(fake, check)
+
+
+def test_batch_order_and_parallelism():
+    fake, built, _, running = fake_openai(delay=0.05)
+
+    def check():
+        results = weather.generate_ai_overviews(items(CITIES), workers=3)
+        assert results == [f"Overview of {city}" for city in CITIES]
+        assert running[1] == 3 and built == ['test-key', {'max_retries': 0}]
+    with_fake(fake, check)
+
+
+def api_error(base, message, status_code=None):
+    """An openai exception without the HTTP objects its constructor needs."""
+    error = type(base.__name__, (base,), {'__init__': lambda self: Exception.__init__(self, message)})()
+    if status_code is not None:
+        error.status_code = status_code
+    return error
+
+
+def test_batch_retries():
+    if weather.APIStatusError is None:
+        print("⚠️ openai not installed, skipping")
+        return
+    import openai
+
+    def fail(city, attempt):
+        if city == 'Denver' and attempt < 3:
+            raise api_error(openai.APIConnectionError, "connection reset")
+        if city == 'Austin':
+            raise api_error(openai.InternalServerError, "server error", 500)
+        if city == 'Miami':
+            raise RuntimeError("Error code: 429 - insufficient_quota")
+        if city == 'Seattle':
+            raise api_error(openai.AuthenticationError, "invalid api key", 401)
+    fake, built, attempts, _ = fake_openai(fail)
+    sleeps = []
+
+    def check():
+        results = weather.generate_ai_overviews(items(['Boston', 'Denver', 'Austin', 'Miami', 'Seattle']),
+                                                retries=2, backoff=0.5, sleep=sleeps.append)
+        assert results[0] == "Overview of Boston"
+        assert results[1] == "Overview of Denver" and attempts['Denver'] == 3
+        assert results[2] == "(AI overview error: server error)" and attempts['Austin'] == 3
+        assert results[3].startswith("Brief: Miami") and attempts['Miami'] == 1
+        # Errors that can't succeed on retry fail at once
+        assert results[4] == "(AI overview error: invalid api key)" and attempts['Seattle'] == 1
+        assert sorted(sleeps) == [0.5, 0.5, 1.0, 1.0]
+        # The SDK's retries are off, so these are the only ones
+        assert {'max_retries': 0} in built
+    with_fake(fake, check)
+
+
+def test_batch_unavailable_without_key():
+    original = weather.os.environ.pop('OPENAI_API_KEY', None)
+    try:
+        assert weather.generate_ai_overviews(items(CITIES)) is None
+    finally:
+        if original is not None:
+            weather.os.environ['OPENAI_API_KEY'] = original
+
+
+def test_batch_mode_output_order():
+    delays = {'Boston': 0.05, 'Nowhere': 0.0, 'Denver': 0.0}
+
+    def lookup(name, log=print):
+        time.sleep(delays[name])
+        log(f"⚠️ looking up {name}")
+        return None if name == 'Nowhere' else {'city': name, 'region': '', 'country': 'US', 'latitude': 0, 'longitude': 0}
+
+    generated = []
+    originals = weather.get_location_by_name, weather.get_weather, weather.generate_ai_overviews
+    weather.get_location_by_name = lookup
+    weather.get_weather = lambda latitude, longitude, log=print: WEATHER
+    weather.generate_ai_overviews = lambda found, **kwargs: generated.extend(found) or ["AI text"] * len(found)
+    try:
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            weather.batch_mode(['Boston', 'Nowhere', 'Denver'], workers=3)
+        lines = [line for line in out.getvalue().splitlines() if line]
+        # Each location's lookup messages come right before it, in input order
+        assert [line for line in lines if line.startswith(('⚠️', '📍', '❌'))] == [
+            "⚠️ looking up Boston", "📍 Boston, , US",
+            "⚠️ looking up Nowhere", "❌ Nowhere: not found",
+            "⚠️ looking up Denver", "📍 Denver, , US",
+        ]
+        # No AI overviews without --ai
+        assert not generated and "🤖" not in out.getvalue()
+        with contextlib.redirect_stdout(io.StringIO()) as out:
+            weather.batch_mode(['Boston', 'Denver'], ai=True)
+        assert len(generated) == 2 and out.getvalue().count("🤖 AI text") == 2
+    finally:
+        weather.get_location_by_name, weather.get_weather, weather.generate_ai_overviews = originals
+
+
+def test_workers_flag():
+    flags, remaining = weather._parse_cli_flags(['--batch', '--workers', '2', 'Boston'])
+    assert flags['workers'] == 2 and remaining == ['Boston'] and not flags['ai']
+    for argv in (['--workers', 'four'], ['--workers=0'], ['Boston', '--workers']):
+        try:
+            weather._parse_cli_flags(argv)
+        except ValueError as e:
+            assert "--workers" in str(e)
+        else:
+            raise AssertionError(f"{argv} accepted")
+
+
+if __name__ == "__main__":
+    print("Testing batch AI overviews (weather.py)")
+    print("=" * 60)
+    test_client_reused()
+    print("✅ One OpenAI client per API key")
+    test_batch_order_and_parallelism()
+    print("✅ Batch results in input order with bounded parallelism")
+    test_batch_retries()
+    print("✅ Retries transient errors with backoff, quota fallback")
+    test_batch_unavailable_without_key()
+    print("✅ No key: unavailable")
+    test_batch_mode_output_order()
+    print("✅ Batch output in input order; AI only with --ai")
+    test_workers_flag()
+    print("✅ Invalid --workers is a usage error")
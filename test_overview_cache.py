@@ -0,0 +1,113 @@
+"""Test the AI overview cache: keys, expiry, SQLite persistence and single flight."""
+import os
+import tempfile
+import threading
+import time
+
+from overview_cache import OverviewCache, overview_key
+
+BOSTON = {'latitude': 42.36, 'longitude': -71.06}
+SLICE = [{'time': f"2024-07-04T{h:02d}:00", 'temp_f': 70 + h, 'wmo_code': 0, 'precip_prob': 10, 'precip_mm': 0.0}
+         for h in range(24)]
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_keys():
+    key = overview_key(BOSTON, SLICE, 1)
+    # Same grid cell and forecast: same key; new forecast or prompt: new key
+    assert overview_key({'latitude': 42.33, 'longitude': -71.10}, SLICE, 1) == key
+    changed = [dict(h) for h in SLICE]
+    changed[5]['precip_prob'] = 80
+    assert overview_key(BOSTON, changed, 1) != key
+    assert overview_key(BOSTON, SLICE, 2) != key
+    assert overview_key(BOSTON, SLICE, 1, kind='openai') != key
+
+
+def test_expiry_and_persistence():
+    with tempfile.TemporaryDirectory() as root:
+        path = os.path.join(root, 'overviews.sqlite')
+        clock = Clock()
+        cache = OverviewCache(path, ttl=600, clock=clock)
+        assert cache.get('k') is None
+        cache.put('k', 'Sunny.')
+        assert cache.get('k') == 'Sunny.'
+
+        # A new process reads it from disk
+        reopened = OverviewCache(path, ttl=600, clock=clock)
+        assert reopened.get('k') == 'Sunny.' and reopened.stats['disk_hits'] == 1
+
+        clock.now += 601
+        assert cache.get('k') is None and reopened.get('k') is None
+        assert cache.purge() == 1
+
+
+def test_single_flight():
+    cache = OverviewCache()
+    calls = []
+    started = threading.Event()
+
+    def build():
+        calls.append(1)
+        started.set()
+        time.sleep(0.05)
+        return "Rain by noon."
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_create('k', build)))
+               for _ in range(5)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(calls) == 1
+    assert sorted(hit for _, hit in results) == [False, True, True, True, True]
+    assert {text for text, _ in results} == {"Rain by noon."}
+
+
+def test_errors_not_cached():
+    cache = OverviewCache()
+
+    def fail():
+        raise RuntimeError("429 Client Error")
+    try:
+        cache.get_or_create('k', fail)
+        assert False, "expected the error"
+    except RuntimeError:
+        pass
+    assert cache.get_or_create('k', lambda: "ok") == ("ok", False)
+
+
+def test_stream_or_create():
+    cache = OverviewCache()
+    chunks = list(cache.stream_or_create('k', lambda: iter(["Rain ", "by ", "noon."])))
+    assert chunks == ["Rain ", "by ", "noon."]
+    # Stored once complete; the next request is one cached chunk
+    assert list(cache.stream_or_create('k', lambda: iter(["never"]))) == ["Rain by noon."]
+
+    # An abandoned stream stores nothing
+    stream = cache.stream_or_create('partial', lambda: iter(["a", "b"]))
+    next(stream)
+    stream.close()
+    assert cache.get('partial') is None
+
+
+if __name__ == "__main__":
+    print("Testing AI overview cache")
+    print("=" * 60)
+    test_keys()
+    print("✅ Keys by grid cell, forecast and prompt version")
+    test_expiry_and_persistence()
+    print("✅ Expiry and SQLite persistence")
+    test_single_flight()
+    print("✅ One generation for concurrent requests")
+    test_errors_not_cached()
+    print("✅ Failures are not cached")
+    test_stream_or_create()
+    print("✅ Streams pass through and are cached when complete")
@@ -0,0 +1,114 @@
+"""Test the overview job queue: partial text, deduplication, bounds and deadlines."""
+import threading
+
+from overview_jobs import OverviewJobQueue
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def gated_stream(gate, chunks):
+    """Stream that yields its first chunk, then waits for the gate before the rest."""
+    def stream():
+        yield chunks[0]
+        gate.wait(5)
+        yield from chunks[1:]
+    return stream
+
+
+def wait_for(condition, timeout=5):
+    event = threading.Event()
+    for _ in range(int(timeout / 0.01)):
+        if condition():
+            return True
+        event.wait(0.01)
+    return False
+
+
+def test_partial_text_and_completion():
+    queue = OverviewJobQueue(workers=1)
+    gate = threading.Event()
+    job = queue.submit('k', gated_stream(gate, ["Sunny ", "and warm."]))
+    assert wait_for(lambda: job.chunks)
+    assert job.text == "Sunny " and not job.done
+    gate.set()
+    assert job.wait(5)
+    assert job.text == "Sunny and warm." and job.error is None
+    assert queue.stats['completed'] == 1 and queue.pending == 0
+
+
+def test_deduplicates_running_jobs():
+    queue = OverviewJobQueue(workers=2)
+    gate = threading.Event()
+    calls = []
+
+    def stream():
+        calls.append(1)
+        return gated_stream(gate, ["a", "b"])()
+
+    first = queue.submit('k', stream)
+    assert queue.submit('k', stream) is first
+    gate.set()
+    assert first.wait(5)
+    # Finished jobs are not reused; the overview cache serves those
+    second = queue.submit('k', stream)
+    assert second is not first and second.wait(5)
+    assert len(calls) == 2 and queue.stats['deduplicated'] == 1
+
+
+def test_bounded():
+    queue = OverviewJobQueue(workers=1, max_pending=2)
+    gate = threading.Event()
+    jobs = [queue.submit(f"k{i}", gated_stream(gate, ["x", "y"])) for i in range(3)]
+    assert jobs[0] is not None and jobs[1] is not None
+    assert jobs[2] is None and queue.stats['rejected'] == 1
+    gate.set()
+    assert all(job.wait(5) for job in jobs[:2])
+    assert queue.submit('k2', gated_stream(gate, ["x", "y"])) is not None
+
+
+def test_deadline():
+    clock = Clock()
+    queue = OverviewJobQueue(workers=1, clock=clock)
+    gate = threading.Event()
+    job = queue.submit('k', gated_stream(gate, ["a", "b"]), deadline=8)
+    assert not job.expired
+    clock.now += 8
+    assert job.expired
+    gate.set()
+    assert job.wait(5)
+    # A job that finishes late is done, not expired: its text replaces the fallback
+    assert not job.expired and job.text == "ab"
+
+
+def test_errors_recorded():
+    queue = OverviewJobQueue(workers=1)
+
+    def stream():
+        yield "Partial"
+        raise RuntimeError("upstream 500")
+
+    job = queue.submit('k', stream)
+    assert job.wait(5)
+    assert isinstance(job.error, RuntimeError) and job.text == "Partial"
+    assert queue.stats['failed'] == 1 and queue.pending == 0
+
+
+if __name__ == "__main__":
+    print("Testing overview job queue")
+    print("=" * 60)
+    test_partial_text_and_completion()
+    print("✅ Partial text while streaming, full text when done")
+    test_deduplicates_running_jobs()
+    print("✅ One job per key while it runs")
+    test_bounded()
+    print("✅ Full queue rejects new jobs")
+    test_deadline()
+    print("✅ Deadline expiry and late completion")
+    test_errors_recorded()
+    print("✅ Failures are recorded on the job")
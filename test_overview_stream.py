@@ -0,0 +1,127 @@
+"""Test streamed AI overviews: OpenAI in weather.py with a fake client, Perplexity SSE with a fake response."""
+import io
+import json
+from types import SimpleNamespace
+
+import requests
+
+import ai_overview
+import weather
+from ai_metrics import Call
+
+LOCATION = {'city': 'Boston', 'region': 'Massachusetts', 'country': 'United States'}
+WEATHER = {'current': {'temperature_2m': 71.2, 'relative_humidity_2m': 60, 'wind_speed_10m': 8, 'weather_code': 0}}
+
+
+def event(text):
+    return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text))])
+
+
+def fake_openai(events=None, error=None):
+    """OpenAI stand-in whose streaming completion yields events, then raises error."""
+    requests_made = []
+
+    def create(**kwargs):
+        requests_made.append(kwargs)
+
+        def stream():
+            yield from events or []
+            if error:
+                raise error
+        return stream()
+
+    client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    return (lambda api_key: client), requests_made
+
+
+def with_fake(fake, test):
+    original = weather.OpenAI, weather.os.environ.get('OPENAI_API_KEY')
+    weather.OpenAI = fake
+    weather.os.environ['OPENAI_API_KEY'] = 'test-key'
+    weather._openai_client = None
+    try:
+        test()
+    finally:
+        weather.OpenAI = original[0]
+        weather._openai_client = None
+        if original[1] is None:
+            del weather.os.environ['OPENAI_API_KEY']
+        else:
+            weather.os.environ['OPENAI_API_KEY'] = original[1]
+
+
+def test_stream_chunks():
+    fake, made = fake_openai([event(" Sunny"), event(None), event(" and 71°F.")])
+
+    def check():
+        assert list(weather.stream_ai_overview(LOCATION, WEATHER)) == ["Sunny", " and 71°F."]
+        assert made[0]['stream'] is True and made[0]['model'] == 'gpt-4o-mini'
+    with_fake(fake, check)
+
+
+def test_quota_fallback():
+    for message in ("Error code: 429 - insufficient_quota", "429 Client Error: Too Many Requests"):
+        fake, _ = fake_openai(error=RuntimeError(message))
+
+        def check():
+            chunks = list(weather.stream_ai_overview(LOCATION, WEATHER))
+            assert len(chunks) == 1 and chunks[0].startswith("Brief: Boston")
+        with_fake(fake, check)
+
+    # Failing part-way keeps the text so far and reports the error
+    fake, _ = fake_openai([event("Sunny")], error=RuntimeError("connection reset"))
+
+    def check_partial():
+        assert list(weather.stream_ai_overview(LOCATION, WEATHER)) == ["Sunny", "(AI overview error: connection reset)"]
+    with_fake(fake, check_partial)
+
+
+def test_unavailable_without_key():
+    original = weather.os.environ.pop('OPENAI_API_KEY', None)
+    try:
+        assert weather.stream_ai_overview(LOCATION, WEATHER) is None
+    finally:
+        if original is not None:
+            weather.os.environ['OPENAI_API_KEY'] = original
+
+
+def test_perplexity_sse():
+    events = [
+        {'choices': [{'delta': {'content': "🌨️ Snow, "}}]},
+        {'choices': [{'delta': {}}]},
+        {'choices': [{'delta': {'content': "then 71°F."}}], 'usage': {'prompt_tokens': 300, 'completion_tokens': 9}},
+    ]
+    body = ''.join(f"data: {json.dumps(e, ensure_ascii=False)}\n\n" for e in events) + "data: [DONE]\n\ndata: ignored\n\n"
+
+    def post(url, **kwargs):
+        # What requests builds for a text/event-stream response with no charset
+        response = requests.Response()
+        response.status_code = 200
+        response.headers['Content-Type'] = 'text/event-stream'
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+        response.raw = io.BytesIO(body.encode('utf-8'))
+        return response
+
+    original = ai_overview.requests.post
+    ai_overview.requests.post = post
+    try:
+        call = Call('perplexity', ai_overview.PERPLEXITY_MODEL)
+        hourly_slice = [{'time': '2024-07-04T12:00', 'temp_f': 71, 'wmo_code': 71, 'precip_prob': 80, 'precip_mm': 1.0}]
+        chunks = list(ai_overview.stream_perplexity_overview(LOCATION, hourly_slice, 'key', call=call))
+        assert chunks == ["🌨️ Snow, ", "then 71°F."]
+        assert call.prompt_tokens == 300 and call.completion_tokens == 9
+    finally:
+        ai_overview.requests.post = original
+
+
+if __name__ == "__main__":
+    print("Testing streamed AI overviews")
+    print("=" * 60)
+    test_stream_chunks()
+    print("✅ Chunks pass through as they arrive")
+    test_quota_fallback()
+    print("✅ Quota errors fall back to the local overview")
+    test_unavailable_without_key()
+    print("✅ No key: unavailable")
+    test_perplexity_sse()
+    print("✅ Perplexity SSE decoded as UTF-8, usage recorded, stops at [DONE]")
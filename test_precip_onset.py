@@ -0,0 +1,61 @@
+"""Test timezone-anchored precipitation onset detection."""
+from datetime import datetime, timezone
+
+from precip_onset import detect_onset, detect_onsets
+
+# 2024-01-15 12:00 local in New York (UTC-5) == 17:00 UTC
+NOW = datetime(2024, 1, 15, 17, 0, tzinfo=timezone.utc).timestamp()
+
+
+def _hourly(hours, probs, precip, codes, start_hour=12):
+    times = [f"2024-01-15T{start_hour + h:02d}:00" for h in range(hours)]
+    return {'time': times, 'precipitation_probability': probs,
+            'precipitation': precip, 'weather_code': codes}
+
+
+def test_hourly_onset_uses_location_clock():
+    data = {
+        'utc_offset_seconds': -5 * 3600,
+        'hourly': _hourly(6, [0, 10, 20, 60, 80, 40], [0, 0, 0, 0.4, 1.2, 0.2], [0, 1, 3, 61, 63, 61]),
+    }
+    onset = detect_onset(data, now=NOW)
+    assert onset['minutes'] == 180 and onset['type'] == 'Rain' and onset['source'] == 'hourly'
+    # Read as UTC, the same hours would already be in the past
+    data['utc_offset_seconds'] = 0
+    assert detect_onset(data, now=NOW) is None
+
+
+def test_minutely_onset_and_type():
+    data = {
+        'utc_offset_seconds': -5 * 3600,
+        'hourly': _hourly(3, [10, 50, 50], [0, 0.5, 0.5], [3, 71, 71]),
+        'minutely_15': {
+            'time': ['2024-01-15T12:15', '2024-01-15T12:30', '2024-01-15T12:45', '2024-01-15T13:00'],
+            'precipitation': [0, 0, 0.3, 0.4],
+            'snowfall': [0, 0, 0.2, 0.3],
+            'weather_code': [3, 3, 73, 73],
+        },
+    }
+    onset = detect_onset(data, now=NOW)
+    assert onset['minutes'] == 45 and onset['type'] == 'Snow' and onset['source'] == 'minutely_15'
+    assert onset['probability'] == 10  # probability of the 12:00 hour
+
+
+def test_batch_and_types():
+    dry = {'utc_offset_seconds': 0, 'hourly': _hourly(3, [0, 0, 0], [0, 0, 0], [0, 0, 0], start_hour=17)}
+    storm = {'utc_offset_seconds': 0, 'hourly': _hourly(3, [0, 90, 90], [0, 5, 5], [0, 95, 95], start_hour=17)}
+    freezing = {'utc_offset_seconds': 0, 'hourly': _hourly(3, [0, 70, 70], [0, 1, 1], [0, 66, 66], start_hour=17)}
+    results = detect_onsets([dry, storm, freezing], now=NOW)
+    assert results[0] is None
+    assert results[1]['type'] == 'Thunderstorm' and results[2]['type'] == 'Freezing Rain'
+
+
+if __name__ == "__main__":
+    print("Testing precipitation onset detection")
+    print("=" * 60)
+    test_hourly_onset_uses_location_clock()
+    print("✅ Onset is anchored to the location's UTC offset")
+    test_minutely_onset_and_type()
+    print("✅ 15-minute data gives the onset and type")
+    test_batch_and_types()
+    print("✅ Batch detection over several locations")
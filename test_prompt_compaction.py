@@ -0,0 +1,76 @@
+"""Token benchmark and content checks for the compact AI prompt (prompt_compaction)."""
+from datetime import datetime, timedelta
+
+from prompt_compaction import approx_tokens, compact_hourly
+
+
+def fixture(start, temps, probs, amounts, codes):
+    t0 = datetime.fromisoformat(start)
+    return [
+        {'time': (t0 + timedelta(hours=i)).isoformat(timespec='minutes'), 'temp_f': t,
+         'wmo_code': c, 'precip_prob': p, 'precip_mm': a}
+        for i, (t, p, a, c) in enumerate(zip(temps, probs, amounts, codes))
+    ]
+
+
+def verbose_prompt(hourly_slice):
+    """The previous prompt encoding: one line per hour."""
+    lines = []
+    for h in hourly_slice[:48]:
+        temp_str = f"{int(h['temp_f'])}°F" if h['temp_f'] else "N/A"
+        lines.append(f"{h['time']} -> {temp_str}, {h['precip_prob']}% precip, {h['precip_mm']}mm")
+    return "\n".join(lines)
+
+
+# Dry, sunny Saturday, then snow Saturday evening into Sunday night, clearing Sunday
+DIURNAL = [30, 29, 29, 28, 28, 27, 28, 29, 31, 33, 35, 36, 37, 38, 38, 37, 36, 35, 34, 34, 33, 33, 32, 32]
+SNOW_DAY = fixture(
+    "2025-12-13T00:00",
+    DIURNAL + [t - 2 for t in DIURNAL],
+    [0] * 18 + [40, 60, 80, 80, 70, 60] + [50, 30] + [0] * 22,
+    [0] * 18 + [0.4, 1.2, 2.0, 1.5, 1.0, 0.6] + [0.3, 0.1] + [0] * 22,
+    [0] * 6 + [1] * 6 + [2] * 6 + [71, 73, 75, 75, 73, 71] + [71, 71] + [3] * 22,
+)
+# Two settled days: everything merges
+SETTLED = fixture("2025-07-04T00:00", DIURNAL * 2, [0] * 48, [0.0] * 48, [1] * 48)
+
+
+def test_token_reduction():
+    for hourly in (SNOW_DAY, SETTLED):
+        verbose, compact = approx_tokens(verbose_prompt(hourly)), approx_tokens(compact_hourly(hourly))
+        assert compact * 5 <= verbose, (compact, verbose)
+
+
+def test_snow_day_content():
+    text = compact_hourly(SNOW_DAY)
+    # Each period keeps its range, chance, total and conditions; similar dry ones merge
+    assert "Sat Dec 13 evening: 32-34°F, 80%, 6.7 mm, heavy snow" in text
+    assert "Sun Dec 14 night: 25-28°F, 50%, 0.4 mm, slight snow" in text
+    assert "Sun Dec 14 afternoon-evening: 30-36°F, dry, overcast" in text
+    # Highs/lows with hours and the precipitation window with its peak survive
+    assert "high 38°F Sat 2 PM" in text and "low 25°F Sun 5 AM" in text
+    assert "Sat 6 PM-Sun 1 AM (peak 80% at 8 PM, 7.1 mm, heavy snow)" in text
+
+
+def test_settled_content():
+    text = compact_hourly(SETTLED)
+    # Afternoon and evening merge; the diurnal range keeps night and morning apart
+    assert "Fri Jul 4 afternoon-evening: 32-38°F, dry, mainly clear" in text
+    assert "Fri Jul 4 night: 27-30°F, dry, mainly clear" in text
+    assert "Precipitation windows: none" in text
+
+
+if __name__ == "__main__":
+    print("Testing compact AI prompt encoding")
+    print("=" * 60)
+    for name, hourly in (("Snow day", SNOW_DAY), ("Settled", SETTLED)):
+        verbose, compact = approx_tokens(verbose_prompt(hourly)), approx_tokens(compact_hourly(hourly))
+        print(f"   {name}: {verbose} -> {compact} tokens ({verbose / compact:.1f}x smaller)")
+    test_token_reduction()
+    print("✅ At least 5x fewer prompt tokens")
+    test_snow_day_content()
+    print("✅ Periods, turning points and precipitation windows preserved")
+    test_settled_content()
+    print("✅ Settled weather stays short")
+    print()
+    print(compact_hourly(SNOW_DAY))
@@ -0,0 +1,159 @@
+"""Test animated radar loops built offline from locally stored tiles (needs Pillow)."""
+import io
+import os
+import tempfile
+
+from radar_composite import Image, RadarCompositor, local_tile_source, region_for
+
+FRAMES = ['1700000000', '1700000600', '1700001200']
+
+
+def write_tiles(root, region, scheme=4):
+    """One red tile per frame, moving one tile east each frame; other tiles missing."""
+    for i, frame in enumerate(FRAMES):
+        x = region['x'] - 1 + i
+        path = os.path.join(root, frame, str(region['zoom']), str(x), f"{region['y']}_{scheme}.png")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        Image.new('RGBA', (256, 256), (255, 0, 0, 255)).save(path)
+
+
+def test_region():
+    region = region_for(42.36, -71.06)
+    assert (region['zoom'], region['x'], region['y'], region['size']) == (7, 38, 47, 768)
+    (south, west), (north, east) = region['bounds']
+    assert south < 42.36 < north and west < -71.06 < east
+    # Nearby users share the region
+    assert region_for(42.0, -71.5)['x'] == region['x']
+
+
+def test_loop_from_local_tiles():
+    if Image is None:
+        print("⚠️ Pillow not installed, skipping")
+        return
+    with tempfile.TemporaryDirectory() as root:
+        region = region_for(42.36, -71.06)
+        write_tiles(root, region)
+        compositor = RadarCompositor(local_tile_source(root), cache_dir=os.path.join(root, 'loops'))
+
+        data, content_type = compositor.loop(FRAMES, region['zoom'], region['x'], region['y'])
+        assert content_type in ('image/webp', 'image/apng')
+        loop = Image.open(io.BytesIO(data))
+        assert loop.size == (768, 768) and loop.n_frames == 3
+
+        # The red tile moves across the middle row, frame by frame
+        for i in range(3):
+            loop.seek(i)
+            pixels = loop.convert('RGB')
+            assert pixels.getpixel((128 + 256 * i, 384))[0] > 200
+            assert pixels.getpixel((128 + 256 * ((i + 1) % 3), 384))[0] < 60
+
+        # Same region and frames: memory hit; a fresh compositor reuses the disk copy
+        assert compositor.loop(FRAMES, region['zoom'], region['x'], region['y'])[0] == data
+        assert compositor.stats == {'built': 1, 'memory_hits': 1, 'disk_hits': 0}
+        reopened = RadarCompositor(local_tile_source(root), cache_dir=os.path.join(root, 'loops'))
+        assert reopened.loop_for(42.0, -71.5, FRAMES) == (data, content_type)
+        assert reopened.stats['disk_hits'] == 1
+
+        # A new manifest (new newest frame) builds a new loop
+        compositor.loop(FRAMES[:2], region['zoom'], region['x'], region['y'])
+        assert compositor.stats['built'] == 2
+
+
+def test_no_tiles_not_cached():
+    if Image is None:
+        return
+    with tempfile.TemporaryDirectory() as root:
+        region = region_for(42.36, -71.06)
+
+        def outage(key):
+            raise OSError("upstream unavailable")
+        compositor = RadarCompositor(outage, cache_dir=os.path.join(root, 'loops'))
+        for _ in range(2):
+            try:
+                compositor.loop(FRAMES, region['zoom'], region['x'], region['y'])
+            except RuntimeError:
+                pass
+            else:
+                raise AssertionError("Loop without radar built")
+        assert compositor.stats['built'] == 0 and not os.listdir(os.path.join(root, 'loops'))
+
+        # Once upstream recovers the loop is built
+        write_tiles(root, region)
+        compositor.tile_source = local_tile_source(root)
+        assert compositor.loop(FRAMES, region['zoom'], region['x'], region['y'])
+        assert compositor.stats['built'] == 1
+
+
+def test_disk_loops_capped():
+    if Image is None:
+        return
+    with tempfile.TemporaryDirectory() as root:
+        region = region_for(42.36, -71.06)
+        write_tiles(root, region)
+        loops = os.path.join(root, 'loops')
+        compositor = RadarCompositor(local_tile_source(root), cache_dir=loops)
+        data, _ = compositor.loop(FRAMES, region['zoom'], region['x'], region['y'])
+        # Room for two loops: each manifest refresh (new frame set) evicts the oldest
+        capped = RadarCompositor(local_tile_source(root), cache_dir=loops, max_entries=0,
+                                 max_disk_bytes=2 * len(data) + 1)
+        for frames in (FRAMES[:1], FRAMES[:2]):
+            capped.loop(frames, region['zoom'], region['x'], region['y'])
+        assert len(os.listdir(loops)) == 2 and capped.disk_size <= capped.max_disk_bytes
+        capped.loop(FRAMES[:2], region['zoom'], region['x'], region['y'])
+        assert capped.stats['disk_hits'] == 1
+        capped.loop(FRAMES, region['zoom'], region['x'], region['y'])
+        assert capped.stats['built'] == 3
+        # The index is rebuilt from disk on restart
+        assert RadarCompositor(local_tile_source(root), cache_dir=loops).disk_size == capped.disk_size
+
+
+def test_proxy_endpoint():
+    if Image is None:
+        return
+    import threading
+    import urllib.error
+    import urllib.request
+    from radar_proxy import RadarProxy, TileCache, serve
+    from test_radar_proxy import FakeUpstream
+
+    with tempfile.TemporaryDirectory() as root:
+        region = region_for(42.36, -71.06)
+        write_tiles(root, region)
+        upstream = FakeUpstream()
+        proxy = RadarProxy(TileCache(root), fetch=upstream)
+        proxy.compositor = RadarCompositor(proxy.tile)
+        server = serve(proxy, port=0)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            base = f"http://127.0.0.1:{server.server_address[1]}/composite/7/{region['x']}/{region['y']}/4"
+            # Past frames only: the nowcast frame is not animated
+            for _ in range(2):
+                with urllib.request.urlopen(base + "?past=2&nowcast=0") as response:
+                    assert Image.open(io.BytesIO(response.read())).n_frames == 2
+            assert proxy.compositor.stats['built'] == 1
+            # The nowcast frame has no tiles (the fake upstream returns no images): 502, nothing cached
+            try:
+                urllib.request.urlopen(base + "?past=1")
+            except urllib.error.HTTPError as e:
+                assert e.code == 502
+            else:
+                raise AssertionError("Loop without radar served")
+            assert proxy.compositor.stats['built'] == 1
+        finally:
+            server.shutdown()
+            server.server_close()
+
+
+if __name__ == "__main__":
+    print("Testing radar loop compositor")
+    print("=" * 60)
+    test_region()
+    print("✅ Shared regions")
+    test_loop_from_local_tiles()
+    print("✅ Animated loop from local tiles, cached in memory and on disk")
+    test_no_tiles_not_cached()
+    print("✅ Frames without any tiles fail instead of caching an empty loop")
+    test_disk_loops_capped()
+    print("✅ Stored loops are evicted beyond the disk cap")
+    test_proxy_endpoint()
+    print("✅ Served by the radar proxy")
@@ -0,0 +1,107 @@
+"""Test the radar nowcast on synthetic raw-value tiles (needs NumPy and Pillow)."""
+import io
+
+from radar_nowcast import (
+    Image, RadarNowcaster, decode_tile, estimate_motion, np, point_in_region, tile_for,
+)
+
+LAT, LON = 42.36, -71.06
+T0 = 1700000000
+STEP = 600  # 10 minutes between frames
+FRAMES = [(f"f{i}", T0 + STEP * i) for i in range(4)]
+CENTER = tile_for(LAT, LON, 7)
+
+
+def encode_tile(dbz):
+    """Raw colour scheme 0 tile: value = dBZ + 32, transparent without echo."""
+    value = np.where(dbz > 0, dbz + 32, 0).astype(np.uint8)
+    alpha = np.where(dbz > 0, 255, 0).astype(np.uint8)
+    buffer = io.BytesIO()
+    Image.fromarray(np.dstack([value, alpha]), 'LA').save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+def storm_source(dbz_value=45, distance=120, speed=1.0, calls=None):
+    """Square cell 30 px wide, west of the point, moving east at speed px/min."""
+    row, col = (int(v) for v in point_in_region(LAT, LON, 7, *CENTER))
+    times = dict(FRAMES)
+
+    def source(key):
+        if calls is not None:
+            calls.append(key)
+        frame, z, x, y, scheme = key
+        assert scheme == 0 and z == 7
+        field = np.zeros((768, 768), dtype=np.int16)
+        centre = col - distance + int(speed * (times[frame] - T0) / 60)
+        field[row - 15:row + 15, centre - 15:centre + 15] = dbz_value
+        top, left = (y - CENTER[1] + 1) * 256, (x - CENTER[0] + 1) * 256
+        return encode_tile(field[top:top + 256, left:left + 256])
+    return source
+
+
+def test_decode_tile():
+    if Image is None or np is None:
+        print("⚠️ NumPy/Pillow not installed, skipping")
+        return
+    dbz = np.zeros((256, 256), dtype=np.int16)
+    dbz[10, 20] = 35
+    decoded, snow = decode_tile(encode_tile(dbz))
+    assert decoded[10, 20] == 35 and decoded.sum() == 35
+    assert not snow.any()
+
+
+def test_estimate_motion():
+    if np is None:
+        return
+    field = np.zeros((128, 128), dtype=np.uint8)
+    field[40:60, 30:50] = 40
+    moved = np.roll(field, (3, -7), axis=(0, 1))
+    assert estimate_motion(field, moved) == (3, -7)
+    assert estimate_motion(field, np.zeros_like(field)) is None
+
+
+def test_approaching_cell():
+    if Image is None or np is None:
+        return
+    calls = []
+    nowcaster = RadarNowcaster(storm_source(calls=calls), clock=lambda: FRAMES[-1][1])
+    result = nowcaster.nowcast(LAT, LON, FRAMES)
+    # Leading edge 120 - 30 - 15 = 75 px away at 1 px/min, seen from 2 px away
+    assert result and result['source'] == 'radar' and result['type'] == 'Rain'
+    assert 70 <= result['minutes'] <= 75, result
+    assert result['dbz'] == 45 and result['probability'] is None
+    assert 40 < result['speed_kmh'] < 70  # ~0.9 km/px at this latitude
+
+    # A nearby user reuses the decoded tiles and the motion estimate
+    decoded = nowcaster.stats['decoded']
+    assert decoded == len(calls) == 36
+    nowcaster.nowcast(LAT + 0.01, LON + 0.01, FRAMES)
+    assert nowcaster.stats['decoded'] == decoded and nowcaster.stats['motion_hits'] == 1
+
+    # Older frames: part of the journey has already happened
+    later = RadarNowcaster(storm_source(), clock=lambda: FRAMES[-1][1] + 1800)
+    assert 40 <= later.nowcast(LAT, LON, FRAMES)['minutes'] <= 45
+
+
+def test_storm_and_no_arrival():
+    if Image is None or np is None:
+        return
+    clock = lambda: FRAMES[-1][1]
+    assert RadarNowcaster(storm_source(dbz_value=55), clock=clock).nowcast(LAT, LON, FRAMES)['type'] == 'Thunderstorm'
+    # Moving away, already overhead, or too few frames: nothing to report
+    assert RadarNowcaster(storm_source(speed=-1.0), clock=clock).nowcast(LAT, LON, FRAMES) is None
+    assert RadarNowcaster(storm_source(distance=0), clock=clock).nowcast(LAT, LON, FRAMES) is None
+    assert RadarNowcaster(storm_source(), clock=clock).nowcast(LAT, LON, FRAMES[:1]) is None
+
+
+if __name__ == "__main__":
+    print("Testing radar nowcast")
+    print("=" * 60)
+    test_decode_tile()
+    print("✅ Raw tiles decode to dBZ")
+    test_estimate_motion()
+    print("✅ Motion from cross-correlation")
+    test_approaching_cell()
+    print("✅ Approaching cell and shared frame cache")
+    test_storm_and_no_arrival()
+    print("✅ Storm type, receding cells and overhead rain")
@@ -0,0 +1,150 @@
+"""Test the radar proxy's manifest cache, tile LRU and HTTP endpoints (no network)."""
+import json
+import tempfile
+import threading
+import urllib.request
+
+from radar_proxy import RadarProxy, TileCache, serve, tile_for, tiles_around
+
+MANIFEST = json.dumps({
+    'host': 'https://tilecache.rainviewer.com',
+    'radar': {
+        'past': [{'time': 1700000000, 'path': '/v2/radar/1700000000'},
+                 {'time': 1700000600, 'path': '/v2/radar/1700000600'}],
+        'nowcast': [{'time': 1700001200, 'path': '/v2/radar/nowcast_abc'}],
+    },
+}).encode('utf-8')
+
+
+class FakeUpstream:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, url, timeout=15):
+        self.calls.append(url)
+        if url.endswith('weather-maps.json'):
+            return MANIFEST
+        return url.encode('utf-8').ljust(100, b'.')  # 100-byte "tile"
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_tile_math():
+    # Boston at zoom 8
+    assert tile_for(42.36, -71.06, 8) == (77, 94)
+    assert len(tiles_around(42.36, -71.06, 8)) == 9
+    # Wraps around the antimeridian
+    assert (0, 94) in tiles_around(42.0, 179.9, 8)
+
+
+def test_manifest_fetched_once_per_ttl():
+    with tempfile.TemporaryDirectory() as root:
+        upstream, clock = FakeUpstream(), FakeClock()
+        proxy = RadarProxy(TileCache(root), fetch=upstream, manifest_ttl=300, clock=clock)
+        for _ in range(5):
+            assert proxy.manifest() == MANIFEST
+        clock.now = 299
+        proxy.manifest()
+        assert proxy.stats['manifest_fetches'] == 1
+        clock.now = 300
+        proxy.manifest()
+        assert proxy.stats['manifest_fetches'] == 2
+        assert proxy.frames() == ['1700000000', '1700000600', 'nowcast_abc']
+        # Latest past frames only, as the "recent" radar variant asks
+        assert proxy.frames(past=1, nowcast=False) == ['1700000600']
+        assert proxy.frames(past=1) == ['1700000600', 'nowcast_abc']
+
+
+def test_tile_lru():
+    with tempfile.TemporaryDirectory() as root:
+        upstream = FakeUpstream()
+        proxy = RadarProxy(TileCache(root, max_bytes=250), fetch=upstream)
+        a, b, c = ('1700000000', 8, 77, 94, 4), ('1700000000', 8, 78, 94, 4), ('1700000000', 8, 79, 94, 4)
+        proxy.tile(a)
+        proxy.tile(b)
+        proxy.tile(a)  # Hit; a becomes most recently used
+        proxy.tile(c)  # Over 250 bytes: evicts b
+        assert len(upstream.calls) == 3
+        assert a in proxy.cache and c in proxy.cache and b not in proxy.cache
+
+        # The index is rebuilt from disk on restart
+        reopened = TileCache(root, max_bytes=250)
+        assert len(reopened) == 2 and reopened.size == 200
+
+
+def test_tile_evicted_while_read():
+    import radar_proxy
+    with tempfile.TemporaryDirectory() as root:
+        cache = TileCache(root)
+        key = ('1700000000', 8, 77, 94, 4)
+        cache.put(key, b'tile')
+        original = radar_proxy.os.utime
+
+        def evicted_then_utime(path):
+            # A concurrent put() evicts the tile between the read and the utime
+            radar_proxy.os.remove(path)
+            original(path)
+        radar_proxy.os.utime = evicted_then_utime
+        try:
+            assert cache.get(key) == b'tile'
+        finally:
+            radar_proxy.os.utime = original
+
+
+def test_prewarm():
+    with tempfile.TemporaryDirectory() as root:
+        upstream = FakeUpstream()
+        proxy = RadarProxy(TileCache(root), fetch=upstream, prewarm_locations=[(42.36, -71.06)])
+        fetched = proxy.prewarm(schemes=(4,), zooms=(8,), frames=2)
+        assert fetched == 2 * 9
+        # A second pass finds everything cached
+        assert proxy.prewarm(schemes=(4,), zooms=(8,), frames=2) == 0
+
+
+def test_http_endpoints():
+    with tempfile.TemporaryDirectory() as root:
+        upstream = FakeUpstream()
+        server = serve(RadarProxy(TileCache(root), fetch=upstream), port=0)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        base = f"http://127.0.0.1:{server.server_address[1]}"
+        try:
+            with urllib.request.urlopen(f"{base}/manifest.json") as response:
+                assert response.read() == MANIFEST
+            url = f"{base}/v2/radar/1700000600/256/8/77/94/4/1_1.png"
+            for _ in range(2):
+                with urllib.request.urlopen(url) as response:
+                    assert 'immutable' in response.headers['Cache-Control']
+                    assert response.read().startswith(b'https://tilecache.rainviewer.com/v2/radar/1700000600/')
+            assert sum('tilecache' in u for u in upstream.calls) == 1
+            try:
+                urllib.request.urlopen(f"{base}/../../etc/passwd")
+                assert False, "expected 404"
+            except urllib.error.HTTPError as e:
+                assert e.code == 404
+        finally:
+            server.shutdown()
+            server.server_close()
+
+
+if __name__ == "__main__":
+    print("Testing radar tile proxy")
+    print("=" * 60)
+    test_tile_math()
+    print("✅ Tile coordinates")
+    test_manifest_fetched_once_per_ttl()
+    print("✅ Manifest fetched once per interval")
+    test_tile_lru()
+    print("✅ Disk LRU eviction and index rebuild")
+    test_tile_evicted_while_read()
+    print("✅ A tile evicted while it is read is still served")
+    test_prewarm()
+    print("✅ Prewarming around popular locations")
+    test_http_endpoints()
+    print("✅ HTTP endpoints with cache headers")
@@ -0,0 +1,52 @@
+"""Test locally computed sunrise/sunset/civil twilight and day/night classification."""
+import math
+
+from sun_ephemeris import daylight_flags, format_minutes, sun_times
+
+# (lat, lon, date, utc offset seconds, expected sunrise, expected sunset) from NOAA tables
+REFERENCE_CASES = [
+    (40.7128, -74.0060, '2024-06-21', -4 * 3600, '5:25 AM', '8:31 PM'),   # New York, EDT
+    (51.5074, -0.1278, '2024-12-21', 0, '8:04 AM', '3:54 PM'),            # London, GMT
+    (-33.8688, 151.2093, '2024-01-15', 11 * 3600, '6:00 AM', '8:09 PM'),  # Sydney, AEDT
+]
+
+
+def _minutes(label):
+    clock, suffix = label.split()
+    hour, minute = map(int, clock.split(':'))
+    return (hour % 12 + (12 if suffix == 'PM' else 0)) * 60 + minute
+
+
+def test_reference_sun_times():
+    for lat, lon, day, offset, sunrise, sunset in REFERENCE_CASES:
+        events = sun_times(lat, lon, [day], offset)
+        assert abs(events['sunrise'][0] - _minutes(sunrise)) <= 3, (day, format_minutes(events['sunrise'][0]))
+        assert abs(events['sunset'][0] - _minutes(sunset)) <= 3, (day, format_minutes(events['sunset'][0]))
+        # Civil twilight brackets the sunrise/sunset
+        assert events['dawn'][0] < events['sunrise'][0] < events['sunset'][0] < events['dusk'][0]
+
+
+def test_polar_day_and_night():
+    events = sun_times(69.65, 18.96, ['2024-06-21', '2024-12-21'], 7200)  # Tromsø
+    assert math.isnan(events['sunrise'][0]) and events['daylight_seconds'][0] == 86400
+    assert math.isnan(events['sunrise'][1]) and events['daylight_seconds'][1] == 0
+    flags = daylight_flags(['2024-06-21T00:00', '2024-12-21T12:00'], 69.65, 18.96, 7200)
+    assert flags == [True, False]
+
+
+def test_daylight_flags_follow_season():
+    # 7 PM is daylight in June and dark in December in New York
+    times = ['2024-06-21T19:00', '2024-12-21T19:00', '2024-12-21T12:00']
+    flags = daylight_flags(times, 40.7128, -74.0060, -5 * 3600)
+    assert flags == [True, False, True]
+
+
+if __name__ == "__main__":
+    print("Testing local sun ephemeris")
+    print("=" * 60)
+    test_reference_sun_times()
+    print("✅ Sunrise/sunset within 3 minutes of reference tables")
+    test_polar_day_and_night()
+    print("✅ Polar day and polar night handled")
+    test_daylight_flags_follow_season()
+    print("✅ Day/night flags follow the actual sunrise/sunset")
@@ -0,0 +1,35 @@
+"""Test whole-series unit conversion and per-dataset memoization."""
+from units import is_missing, unit_series
+
+sample_weather_data = {
+    'hourly': {
+        'time': ['2024-01-15T00:00', '2024-01-15T01:00', '2024-01-15T02:00'],
+        'temperature_2m': [32.0, 212.0, None],
+        'precipitation': [25.4, None, 2.54],
+    }
+}
+
+
+def test_series_conversions():
+    series = unit_series(sample_weather_data)
+    celsius = series.temperature('C')
+    assert round(celsius[0], 6) == 0.0 and round(celsius[1], 6) == 100.0
+    assert is_missing(celsius[2])
+    inches = series.precipitation('in')
+    assert [round(v, 3) for v in inches] == [1.0, 0.0, 0.1]
+
+
+def test_variants_are_memoized():
+    series = unit_series(sample_weather_data)
+    assert unit_series(sample_weather_data) is series
+    assert series.temperature('C') is series.temperature('C')
+    assert series.temperature('F') is series.temperature('F')
+
+
+if __name__ == "__main__":
+    print("Testing unit conversion layer")
+    print("=" * 60)
+    test_series_conversions()
+    print("✅ °F→°C and mm→in convert whole series, None stays missing")
+    test_variants_are_memoized()
+    print("✅ Unit variants are computed once per dataset")
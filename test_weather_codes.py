@@ -0,0 +1,44 @@
+"""Test the precompiled WMO code table against the original per-call lookups."""
+from test_night_emoji import get_weather_emoji as legacy_get_weather_emoji
+from weather_codes import DESCRIPTIONS, classify_series, describe, emoji_for_description
+
+LEGACY_CODES = [0, 1, 2, 3, 45, 48, 51, 53, 55, 61, 63, 65, 71, 73, 75, 77,
+                80, 81, 82, 85, 86, 95, 96, 99]
+TIMES = ['2024-12-12T03:00', '2024-12-12T08:00', '2024-12-12T14:00',
+         '2024-12-12T18:00', '2024-12-12T22:00', None, 'not-a-time']
+NIGHT_TIMES = {'2024-12-12T03:00', '2024-12-12T18:00', '2024-12-12T22:00'}
+
+
+def test_matches_legacy_emojis():
+    for code in LEGACY_CODES:
+        conditions = describe(code)
+        for time_str in TIMES:
+            expected = legacy_get_weather_emoji(conditions, time_str)
+            is_night = time_str in NIGHT_TIMES
+            assert emoji_for_description(conditions, is_night) == expected, (code, time_str)
+
+
+def test_batch_classify():
+    codes = [0, 0, 61, None, 150]
+    times = ['2024-12-12T12:00', '2024-12-12T23:00', '2024-12-12T23:00',
+             '2024-12-12T12:00', '2024-12-12T02:00']
+    descriptions, emojis = classify_series(codes, times=times)
+    assert descriptions == ["Clear sky", "Clear sky", "Slight rain", "Unknown", "Unknown"]
+    assert emojis == ["☀️", "🌙", "🌧️", "🌤️", "🌙"]
+
+
+def test_table_covers_all_codes():
+    assert len(DESCRIPTIONS) == 100
+    assert describe(66) == "Light freezing rain"
+    assert describe(-1) == "Unknown" and describe("x") == "Unknown"
+
+
+if __name__ == "__main__":
+    print("Testing precompiled WMO code table")
+    print("=" * 60)
+    test_matches_legacy_emojis()
+    print("✅ Table lookups match the original day/night emoji dictionaries")
+    test_batch_classify()
+    print("✅ Batch classify maps a whole code/time series")
+    test_table_covers_all_codes()
+    print("✅ Table is indexed 0-99 with safe defaults")
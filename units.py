@@ -0,0 +1,105 @@
+"""
+Unit Conversion
+Converts whole forecast series between °F/°C, mph/km/h and mm/inches in one step.
+Uses NumPy when it is installed and falls back to the standard array module.
+"""
+
+import math
+from array import array
+
+try:
+    # Optional; Streamlit already installs NumPy, the CLI may not have it
+    import numpy as np
+except Exception:
+    np = None
+
+MM_PER_INCH = 25.4
+KMH_PER_MPH = 1.60934
+
+
+def to_series(values, fill=math.nan):
+    """Convert a list from the API into a float series (None -> fill)."""
+    values = [fill if v is None else v for v in (values or [])]
+    if np is not None:
+        return np.asarray(values, dtype=np.float64)
+    return array('d', values)
+
+
+def _scale(series, factor, offset=0.0):
+    """Return (series + offset) * factor for a whole series at once."""
+    if np is not None:
+        return (np.asarray(series, dtype=np.float64) + offset) * factor
+    return array('d', [(v + offset) * factor for v in series])
+
+
+def fahrenheit_to_celsius(series):
+    """Convert a series of °F values to °C."""
+    return _scale(series, 5 / 9, -32.0)
+
+
+def mph_to_kmh(series):
+    """Convert a series of mph values to km/h."""
+    return _scale(series, KMH_PER_MPH)
+
+
+def mm_to_inches(series):
+    """Convert a series of millimetre values to inches."""
+    return _scale(series, 1 / MM_PER_INCH)
+
+
+def is_missing(value):
+    """True for values that were None in the API response."""
+    return value is None or (isinstance(value, float) and math.isnan(value))
+
+
+class UnitSeries:
+    """Hourly series for one dataset, converted once per unit and then reused.
+
+    Open-Meteo (and the converted Visual Crossing data) is requested in °F and
+    returns precipitation in mm, so those are the base units.
+    """
+
+    def __init__(self, hourly):
+        self._hourly = hourly or {}
+        self._cache = {}
+
+    def _get(self, key, build):
+        if key not in self._cache:
+            self._cache[key] = build()
+        return self._cache[key]
+
+    def temperature(self, unit='F'):
+        """Hourly temperatures in 'F' or 'C' (missing values are NaN)."""
+        base = self._get('temp_F', lambda: to_series(self._hourly.get('temperature_2m')))
+        if unit == 'C':
+            return self._get('temp_C', lambda: fahrenheit_to_celsius(base))
+        return base
+
+    def precipitation(self, unit='mm'):
+        """Hourly precipitation amounts in 'mm' or 'in' (missing values are 0)."""
+        base = self._get('precip_mm', lambda: to_series(self._hourly.get('precipitation'), fill=0.0))
+        if unit == 'in':
+            return self._get('precip_in', lambda: mm_to_inches(base))
+        return base
+
+    def wind(self, unit='mph'):
+        """Hourly wind speeds in 'mph' or 'kmh' (missing values are NaN)."""
+        base = self._get('wind_mph', lambda: to_series(self._hourly.get('wind_speed_10m')))
+        if unit == 'kmh':
+            return self._get('wind_kmh', lambda: mph_to_kmh(base))
+        return base
+
+
+def unit_series(weather_data):
+    """Return the memoized UnitSeries for a weather dataset.
+
+    The series is stored on the dataset itself, so every tab and every unit
+    toggle for the same dataset reuses the already-converted arrays. That only
+    lasts as long as the dict: st.cache_data hands out a fresh copy per rerun,
+    so the Streamlit app keeps its series per dataset fingerprint instead.
+    """
+    series = weather_data.get('_unit_series')
+    if series is None:
+        series = UnitSeries(weather_data.get('hourly'))
+        weather_data['_unit_series'] = series
+    return series
@@ -6,16 +6,24 @@ Gets current temperature for any location using Open-Meteo API (free, no API key
 import os
 import requests
 import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
+from ai_metrics import METRICS, format_summary
+from ai_overview import is_quota_error
+from weather_codes import describe
+
 try:
     # Lazy import; only used if OPENAI_API_KEY is set
-    from openai import OpenAI
+    from openai import APIConnectionError, APIStatusError, OpenAI
 except Exception:
     OpenAI = None
+    APIConnectionError = APIStatusError = None
 
-def get_location_by_name(location_name, auto_select=True):
-    """Get coordinates for a location name using geocoding API."""
+def get_location_by_name(location_name, auto_select=True, log=print):
+    """Get coordinates for a location name using geocoding API (messages go to log)."""
     try:
         url = "https://geocoding-api.open-meteo.com/v1/search"
         params = {
@@ -62,7 +70,7 @@ def get_location_by_name(location_name, auto_select=True):
         # If not found, try just the first part (city name)
         if ',' in location_name or ' ' in location_name:
             city_only = location_name.split(',')[0].strip() if ',' in location_name else location_name.split()[0].strip()
-            print(f"⚠️ '{location_name}' not found, trying just '{city_only}'...")
+            log(f"⚠️ '{location_name}' not found, trying just '{city_only}'...")
             
             params['name'] = city_only
             response = requests.get(url, params=params)
@@ -70,10 +78,10 @@ def get_location_by_name(location_name, auto_select=True):
             
             if 'results' in data and len(data['results']) > 0:
                 results = data['results']
-                print(f"\n📍 Found {len(results)} possible locations for '{city_only}':")
+                log(f"\n📍 Found {len(results)} possible locations for '{city_only}':")
                 for i, r in enumerate(results[:3], 1):
-                    print(f"   {i}. {r.get('name')}, {r.get('admin1', '')}, {r.get('country')}")
-                print(f"\n✅ Using: {results[0].get('name')}, {results[0].get('admin1', '')}, {results[0].get('country')}")
+                    log(f"   {i}. {r.get('name')}, {r.get('admin1', '')}, {r.get('country')}")
+                log(f"\n✅ Using: {results[0].get('name')}, {results[0].get('admin1', '')}, {results[0].get('country')}")
                 
                 result = results[0]
                 return {
@@ -84,11 +92,11 @@ def get_location_by_name(location_name, auto_select=True):
                     'country': result.get('country')
                 }
         
-        print(f"❌ Location '{location_name}' not found")
-        print("💡 Try: 'City' or 'City, Country' (e.g., 'Boston' or 'Boston, USA')")
+        log(f"❌ Location '{location_name}' not found")
+        log("💡 Try: 'City' or 'City, Country' (e.g., 'Boston' or 'Boston, USA')")
         return None
     except Exception as e:
-        print(f"❌ Error searching for location: {e}")
+        log(f"❌ Error searching for location: {e}")
         return None
 
 def get_current_location():
@@ -112,7 +120,7 @@ def get_current_location():
         print(f"❌ Error getting location: {e}")
         return None
 
-def get_weather(latitude, longitude):
+def get_weather(latitude, longitude, log=print):
     """Get current weather data from Open-Meteo API."""
     try:
         url = "https://api.open-meteo.com/v1/forecast"
@@ -128,38 +136,12 @@ def get_weather(latitude, longitude):
         response.raise_for_status()
         return response.json()
     except Exception as e:
-        print(f"❌ Error getting weather: {e}")
+        log(f"❌ Error getting weather: {e}")
         return None
 
 def get_weather_description(weather_code):
     """Convert weather code to description."""
-    weather_codes = {
-        0: "Clear sky",
-        1: "Mainly clear",
-        2: "Partly cloudy",
-        3: "Overcast",
-        45: "Foggy",
-        48: "Depositing rime fog",
-        51: "Light drizzle",
-        53: "Moderate drizzle",
-        55: "Dense drizzle",
-        61: "Slight rain",
-        63: "Moderate rain",
-        65: "Heavy rain",
-        71: "Slight snow",
-        73: "Moderate snow",
-        75: "Heavy snow",
-        77: "Snow grains",
-        80: "Slight rain showers",
-        81: "Moderate rain showers",
-        82: "Violent rain showers",
-        85: "Slight snow showers",
-        86: "Heavy snow showers",
-        95: "Thunderstorm",
-        96: "Thunderstorm with slight hail",
-        99: "Thunderstorm with heavy hail"
-    }
-    return weather_codes.get(weather_code, "Unknown")
+    return describe(weather_code)
 
 def _build_local_overview(location, weather_data, style: str = "concise") -> str:
     """Create a simple local overview without AI (used on quota errors)."""
@@ -178,56 +160,176 @@ def _build_local_overview(location, weather_data, style: str = "concise") -> str
         f"Temp {temperature}°F, humidity {humidity}%, wind {wind} mph."
     )
 
+def _overview_messages(location, weather_data, style: str = "concise"):
+    """Chat messages asking for a short overview of the current conditions."""
+    current = weather_data.get('current', {}) if weather_data else {}
+    temperature = current.get('temperature_2m')
+    humidity = current.get('relative_humidity_2m')
+    wind = current.get('wind_speed_10m')
+    code = current.get('weather_code')
+    conditions = get_weather_description(code)
+
+    city = location.get('city') if location else 'Unknown'
+    region = location.get('region') if location else ''
+    country = location.get('country') if location else ''
+
+    tone = "concise, friendly" if style == "concise" else style
+    prompt = (
+        f"Provide a {tone} weather overview for {city}, {region}, {country}. "
+        f"Current conditions: {conditions}, temp {temperature}°F, humidity {humidity}%, wind {wind} mph. "
+        "Avoid speculation beyond available current data; do not fabricate forecasts. "
+        "Keep it short (1-2 sentences)."
+    )
+    return [
+        {"role": "system", "content": "You are a helpful weather assistant."},
+        {"role": "user", "content": prompt},
+    ]
+
+def _is_transient_error(error):
+    """Connection errors, timeouts (an APIConnectionError) and 5xx responses; others won't succeed on retry."""
+    if APIConnectionError is not None and isinstance(error, APIConnectionError):
+        return True
+    return APIStatusError is not None and isinstance(error, APIStatusError) and error.status_code >= 500
+
+_openai_client = None  # (api_key, client), shared by every overview request
+_openai_lock = threading.Lock()
+
+def get_openai_client():
+    """Long-lived OpenAI client, so every overview reuses one HTTP connection pool.
+
+    Reads OPENAI_API_KEY from environment and builds a new client only when the
+    key changes. Returns None if no key is set or `openai` isn't installed.
+    """
+    global _openai_client
+    api_key = os.getenv('OPENAI_API_KEY')
+    if not api_key or OpenAI is None:
+        return None
+    with _openai_lock:
+        if _openai_client is None or _openai_client[0] != api_key:
+            _openai_client = (api_key, OpenAI(api_key=api_key))
+        return _openai_client[1]
+
+def _request_overview(client, location, weather_data, model, style, call=None):
+    """One overview completion, with its token usage recorded on `call`. Raises on API errors."""
+    completion = client.chat.completions.create(
+        model=model,
+        messages=_overview_messages(location, weather_data, style),
+        temperature=0.2,
+        max_tokens=120,
+    )
+    if call is not None:
+        call.set_usage(getattr(completion, 'usage', None))
+    return completion.choices[0].message.content.strip()
+
 def generate_ai_overview(location, weather_data, model: str = "gpt-4o-mini", style: str = "concise"):
     """Generate an AI-powered weather overview using OpenAI.
 
     Reads OPENAI_API_KEY from environment. Requires `openai` package.
-    Returns a string with the overview, or None if unavailable.
+    Returns a string with the overview, or None if unavailable. Each call is
+    recorded in the AI metrics (see ai_metrics).
     """
-    api_key = os.getenv('OPENAI_API_KEY')
-    if not api_key or OpenAI is None:
+    with METRICS.track('openai', model) as call:
+        client = get_openai_client()
+        if client is None:
+            call.fallback = 'no_key'
+            return None
+
+        try:
+            return _request_overview(client, location, weather_data, model, style, call)
+        except Exception as e:
+            call.error = str(e)
+            # If quota exceeded or 429, return local summary instead of error text
+            if is_quota_error(e):
+                call.fallback = 'quota'
+                return _build_local_overview(location, weather_data, style=style)
+            # Generic fallback keeps things graceful
+            call.fallback = 'error'
+            return f"(AI overview error: {e})"
+
+def generate_ai_overviews(items, model: str = "gpt-4o-mini", style: str = "concise",
+                          workers: int = 4, retries: int = 2, backoff: float = 1.0, sleep=time.sleep):
+    """Overviews for many (location, weather_data) pairs, returned in input order.
+
+    Up to `workers` requests run at once on the shared client. Connection
+    errors, timeouts and 5xx responses are retried up to `retries` times with
+    exponential backoff (the SDK's own retries are turned off, so this is the
+    only retry policy); quota errors and other failures get
+    generate_ai_overview()'s fallbacks straight away. Returns None if unavailable.
+    """
+    client = get_openai_client()
+    if client is None:
         return None
+    # Same connection pool, no SDK retries stacked under ours
+    client = client.with_options(max_retries=0)
+
+    def overview(item):
+        location, weather_data = item
+        with METRICS.track('openai', model) as call:
+            for attempt in range(retries + 1):
+                call.retries = attempt
+                try:
+                    return _request_overview(client, location, weather_data, model, style, call)
+                except Exception as e:
+                    call.error = str(e)
+                    if is_quota_error(e):
+                        call.fallback = 'quota'
+                        return _build_local_overview(location, weather_data, style=style)
+                    if attempt == retries or not _is_transient_error(e):
+                        call.fallback = 'error'
+                        return f"(AI overview error: {e})"
+                    sleep(backoff * 2 ** attempt)
 
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        return list(executor.map(overview, items))
+
+def stream_ai_overview(location, weather_data, model: str = "gpt-4o-mini", style: str = "concise"):
+    """Like generate_ai_overview(), but yields the text in chunks as OpenAI streams it.
+
+    Returns None if unavailable (no key or package), otherwise a generator. Errors
+    end the stream with the same fallbacks as generate_ai_overview().
+    """
+    client = get_openai_client()
+    if client is None:
+        METRICS.record('openai', model, fallback='no_key')
+        return None
+
+    def chunks():
+        started = False
+        with METRICS.track('openai', model) as call:
+            try:
+                stream = client.chat.completions.create(
+                    model=model,
+                    messages=_overview_messages(location, weather_data, style),
+                    temperature=0.2,
+                    max_tokens=120,
+                    stream=True,
+                    stream_options={"include_usage": True},  # Usage arrives in a final, choice-less event
+                )
+                for event in stream:
+                    call.set_usage(getattr(event, 'usage', None))
+                    text = event.choices[0].delta.content if event.choices else None
+                    if text:
+                        yield text.lstrip() if not started else text
+                        started = True
+            except Exception as e:
+                call.error = str(e)
+                if is_quota_error(e) and not started:
+                    call.fallback = 'quota'
+                    yield _build_local_overview(location, weather_data, style=style)
+                else:
+                    call.fallback = 'error'
+                    yield f"(AI overview error: {e})"
+    return chunks()
+
+def _parse_workers(value: str) -> int:
+    """--workers value as a positive int; raises ValueError with a usage message otherwise."""
     try:
-        client = OpenAI(api_key=api_key)
-
-        # Build a compact context from available data
-        current = weather_data.get('current', {}) if weather_data else {}
-        temperature = current.get('temperature_2m')
-        humidity = current.get('relative_humidity_2m')
-        wind = current.get('wind_speed_10m')
-        code = current.get('weather_code')
-        conditions = get_weather_description(code)
-
-        city = location.get('city') if location else 'Unknown'
-        region = location.get('region') if location else ''
-        country = location.get('country') if location else ''
-
-        tone = "concise, friendly" if style == "concise" else style
-        prompt = (
-            f"Provide a {tone} weather overview for {city}, {region}, {country}. "
-            f"Current conditions: {conditions}, temp {temperature}°F, humidity {humidity}%, wind {wind} mph. "
-            "Avoid speculation beyond available current data; do not fabricate forecasts. "
-            "Keep it short (1-2 sentences)."
-        )
-
-        completion = client.chat.completions.create(
-            model=model,
-            messages=[
-                {"role": "system", "content": "You are a helpful weather assistant."},
-                {"role": "user", "content": prompt},
-            ],
-            temperature=0.2,
-            max_tokens=120,
-        )
-        return completion.choices[0].message.content.strip()
-    except Exception as e:
-        # If quota exceeded or 429, return local summary instead of error text
-        msg = str(e).lower()
-        if 'insufficient_quota' in msg or 'code: 429' in msg or 'status code: 429' in msg:
-            return _build_local_overview(location, weather_data, style=style)
-        # Generic fallback keeps things graceful
-        return f"(AI overview error: {e})"
+        workers = int(value)
+    except ValueError:
+        workers = 0
+    if workers < 1:
+        raise ValueError(f"--workers needs a positive number, got {value!r}")
+    return workers
 
 def _parse_cli_flags(argv: list[str]):
     """Parse CLI flags and return a dict and remaining args for location.
@@ -237,15 +339,20 @@ def _parse_cli_flags(argv: list[str]):
       --ai          : enable AI overview
       --model NAME  : choose OpenAI model (default gpt-4o-mini)
       --style NAME  : overview style (default concise)
+      --batch       : every remaining argument is a location; print overviews for all
+      --workers N   : concurrent lookups and AI requests in batch mode (default 4)
+      --metrics     : print AI call latency, tokens and cost at the end
+      --metrics=FILE: also export the recorded calls (.json or .csv)
     """
-    flags = {"interactive": ('--select' in argv or '-s' in argv), "ai": ('--ai' in argv), "model": "gpt-4o-mini", "style": "concise"}
+    flags = {"interactive": ('--select' in argv or '-s' in argv), "ai": ('--ai' in argv), "batch": ('--batch' in argv),
+             "model": "gpt-4o-mini", "style": "concise", "workers": 4, "metrics": None}
     remaining = []
     skip_next = False
     for i, arg in enumerate(argv):
         if skip_next:
             skip_next = False
             continue
-        if arg in ('--select', '-s', '--ai'):
+        if arg in ('--select', '-s', '--ai', '--batch'):
             continue
         if arg.startswith('--model='):
             flags['model'] = arg.split('=', 1)[1]
@@ -261,6 +368,19 @@ def _parse_cli_flags(argv: list[str]):
             flags['style'] = argv[i + 1]
             skip_next = True
             continue
+        if arg == '--metrics':
+            flags['metrics'] = ''
+            continue
+        if arg.startswith('--metrics='):
+            flags['metrics'] = arg.split('=', 1)[1]
+            continue
+        if arg.startswith('--workers='):
+            flags['workers'] = _parse_workers(arg.split('=', 1)[1])
+            continue
+        if arg == '--workers':
+            flags['workers'] = _parse_workers(argv[i + 1] if i + 1 < len(argv) else '')
+            skip_next = True
+            continue
         # non-flag
         remaining.append(arg)
     return flags, remaining
@@ -296,14 +416,59 @@ def main(custom_location=None, interactive=False):
     # Optionally generate AI overview if requested via CLI flags
     flags, _ = _parse_cli_flags(sys.argv[1:])
     if flags.get('ai'):
-        overview = generate_ai_overview(location, weather_data, model=flags.get('model', 'gpt-4o-mini'), style=flags.get('style', 'concise'))
+        # Printed as it streams in
+        overview = stream_ai_overview(location, weather_data, model=flags.get('model', 'gpt-4o-mini'), style=flags.get('style', 'concise'))
         if overview:
-            print("\n🤖 AI Weather Overview:\n" + overview)
+            print("\n🤖 AI Weather Overview:")
+            for chunk in overview:
+                print(chunk, end='', flush=True)
+            print()
         else:
             print("\n🤖 AI Weather Overview unavailable (missing API key or client).")
     
     return temperature
 
+def batch_mode(location_names, model="gpt-4o-mini", style="concise", workers=4, ai=False):
+    """Look up several locations and print each one (with an AI overview if ai), in the order given.
+
+    Lookups run on a thread pool; their messages are collected and printed
+    from the main thread with the location they belong to.
+    """
+    def lookup(name):
+        messages = []
+        log = lambda *args: messages.append(' '.join(str(a) for a in args))
+        location = get_location_by_name(name, log=log)
+        weather_data = get_weather(location['latitude'], location['longitude'], log=log) if location else None
+        return name, location, weather_data, messages
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(lookup, location_names))
+    overviews = None
+    if ai:
+        found = [(location, weather_data) for _, location, weather_data, _ in results if location and weather_data]
+        overviews = iter(generate_ai_overviews(found, model=model, style=style, workers=workers) or [])
+
+    for name, location, weather_data, messages in results:
+        for message in messages:
+            print(message)
+        print(f"\n📍 {location['city']}, {location['region']}, {location['country']}" if location else f"\n❌ {name}: not found")
+        if not location or not weather_data:
+            continue
+        current = weather_data.get('current', {})
+        print(f"🌡️  {current.get('temperature_2m')}°F | 💧 {current.get('relative_humidity_2m')}% | "
+              f"💨 {current.get('wind_speed_10m')} mph | {get_weather_description(current.get('weather_code'))}")
+        if overviews is not None:
+            print(f"🤖 {next(overviews, 'AI Weather Overview unavailable (missing API key or client).')}")
+
+def report_metrics(path=''):
+    """Print the AI call summary, and write the recorded calls to path (.json or .csv) if given."""
+    print("\n📈 AI calls:")
+    print(format_summary(METRICS.summary()))
+    if path:
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            f.write(METRICS.to_csv() if path.lower().endswith('.csv') else METRICS.to_json())
+        print(f"✅ Wrote {len(METRICS.calls())} calls to {path}")
+
 def interactive_mode():
     """Interactive mode to input city and state."""
     print("=" * 50)
@@ -336,12 +501,20 @@ def interactive_mode():
         print("❌ Invalid choice. Please enter 1, 2, or 3")
 
 if __name__ == "__main__":
-    if len(sys.argv) > 1:
+    try:
         flags, remaining = _parse_cli_flags(sys.argv[1:])
+    except ValueError as e:
+        print(f"❌ {e}")
+        print("Usage: python weather.py [--select] [--ai] [--model NAME] [--style NAME] "
+              "[--batch LOCATION ...] [--workers N] [--metrics[=FILE]]")
+        sys.exit(1)
+    if len(sys.argv) > 1:
         interactive = flags['interactive']
         location_arg = ' '.join(remaining) if remaining else None
         
-        if location_arg:
+        if flags['batch'] and remaining:
+            batch_mode(remaining, model=flags['model'], style=flags['style'], workers=flags['workers'], ai=flags['ai'])
+        elif location_arg:
             main(custom_location=location_arg, interactive=interactive)
         else:
             # Just the flag, go to interactive mode
@@ -351,3 +524,5 @@ if __name__ == "__main__":
         # Interactive mode - prompt user for input
         custom_location = interactive_mode()
         main(custom_location=custom_location, interactive=True)
+    if flags['metrics'] is not None:
+        report_metrics(flags['metrics'])
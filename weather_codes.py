@@ -0,0 +1,118 @@
+"""
+WMO Weather Codes
+Precompiled lookup table for the WMO weather interpretation codes (0-99) used by
+Open-Meteo: description, daytime emoji and nighttime emoji per code.
+Shared by weather.py and the Streamlit app.
+"""
+
+UNKNOWN_DESCRIPTION = "Unknown"
+DEFAULT_DAY_EMOJI = "🌤️"
+DEFAULT_NIGHT_EMOJI = "🌙"
+
+# code: (description, day emoji, night emoji)
+_WMO_CODES = {
+    0: ("Clear sky", "☀️", "🌙"),
+    1: ("Mainly clear", "🌤️", "🌙"),
+    2: ("Partly cloudy", "⛅", "☁️"),
+    3: ("Overcast", "☁️", "☁️"),
+    45: ("Foggy", "🌫️", "🌫️"),
+    48: ("Depositing rime fog", "🌫️", "🌫️"),
+    51: ("Light drizzle", "🌦️", "🌧️"),
+    53: ("Moderate drizzle", "🌧️", "🌧️"),
+    55: ("Dense drizzle", "🌧️", "🌧️"),
+    56: ("Light freezing drizzle", "🌧️", "🌧️"),
+    57: ("Dense freezing drizzle", "🌧️", "🌧️"),
+    61: ("Slight rain", "🌧️", "🌧️"),
+    63: ("Moderate rain", "🌧️", "🌧️"),
+    65: ("Heavy rain", "⛈️", "⛈️"),
+    66: ("Light freezing rain", "🌧️", "🌧️"),
+    67: ("Heavy freezing rain", "🌧️", "🌧️"),
+    71: ("Slight snow", "🌨️", "🌨️"),
+    73: ("Moderate snow", "❄️", "❄️"),
+    75: ("Heavy snow", "❄️", "❄️"),
+    77: ("Snow grains", "❄️", "❄️"),
+    80: ("Slight rain showers", "🌦️", "🌧️"),
+    81: ("Moderate rain showers", "🌧️", "🌧️"),
+    82: ("Violent rain showers", "⛈️", "⛈️"),
+    85: ("Slight snow showers", "🌨️", "🌨️"),
+    86: ("Heavy snow showers", "❄️", "❄️"),
+    95: ("Thunderstorm", "⛈️", "⛈️"),
+    96: ("Thunderstorm with slight hail", "⛈️", "⛈️"),
+    99: ("Thunderstorm with heavy hail", "⛈️", "⛈️"),
+}
+
+# Flat tables indexed by code, built once at import
+DESCRIPTIONS = [UNKNOWN_DESCRIPTION] * 100
+DAY_EMOJI = [DEFAULT_DAY_EMOJI] * 100
+NIGHT_EMOJI = [DEFAULT_NIGHT_EMOJI] * 100
+for _code, (_description, _day, _night) in _WMO_CODES.items():
+    DESCRIPTIONS[_code] = _description
+    DAY_EMOJI[_code] = _day
+    NIGHT_EMOJI[_code] = _night
+
+# Reverse lookup for callers that only have the description text
+_CODE_BY_DESCRIPTION = {description: code for code, (description, _, _) in _WMO_CODES.items()}
+
+
+def _index(code):
+    """Table index for a code, or None if it is missing/out of range."""
+    try:
+        code = int(code)
+    except (TypeError, ValueError):
+        return None
+    return code if 0 <= code < 100 else None
+
+
+def describe(code):
+    """Convert a weather code to its description."""
+    i = _index(code)
+    return DESCRIPTIONS[i] if i is not None else UNKNOWN_DESCRIPTION
+
+
+def emoji_for(code, is_night=False):
+    """Emoji for a weather code, using the night variant when is_night is set."""
+    i = _index(code)
+    if i is None:
+        return DEFAULT_NIGHT_EMOJI if is_night else DEFAULT_DAY_EMOJI
+    return NIGHT_EMOJI[i] if is_night else DAY_EMOJI[i]
+
+
+def emoji_for_description(conditions, is_night=False):
+    """Emoji for a description string such as "Clear sky"."""
+    return emoji_for(_CODE_BY_DESCRIPTION.get(conditions), is_night)
+
+
+def is_night_hour(time_str):
+    """Fixed-clock night check (6 PM to 6 AM) for an ISO time like "2024-12-12T22:00"."""
+    if not time_str or len(time_str) < 13 or time_str[10] != 'T':
+        return False
+    try:
+        hour = int(time_str[11:13])
+    except ValueError:
+        return False
+    return hour >= 18 or hour < 6
+
+
+def classify_series(codes, times=None, night_flags=None):
+    """Map a whole code series to (descriptions, emojis) in one pass.
+
+    Day/night comes from night_flags when given, otherwise from the fixed-clock
+    check on times. Missing flags/times are treated as daytime.
+    """
+    count = len(codes)
+    if night_flags is None:
+        times = times or []
+        night_flags = [is_night_hour(times[i]) if i < len(times) else False for i in range(count)]
+
+    descriptions = []
+    emojis = []
+    for i, code in enumerate(codes):
+        idx = _index(code)
+        night = bool(night_flags[i]) if i < len(night_flags) else False
+        if idx is None:
+            descriptions.append(UNKNOWN_DESCRIPTION)
+            emojis.append(DEFAULT_NIGHT_EMOJI if night else DEFAULT_DAY_EMOJI)
+        else:
+            descriptions.append(DESCRIPTIONS[idx])
+            emojis.append(NIGHT_EMOJI[idx] if night else DAY_EMOJI[idx])
+    return descriptions, emojis
@@ -9,8 +9,30 @@ import requests
 from datetime import datetime, timezone, timedelta
 import streamlit.components.v1 as components
 import os
+import ipaddress
+import hashlib
+import json
+from concurrent.futures import ThreadPoolExecutor, wait
 from typing import List, Dict, Any
 from dotenv import load_dotenv
+from ip_geolocation import IPRangeDatabase
+from units import KMH_PER_MPH, MM_PER_INCH, UnitSeries, fahrenheit_to_celsius, is_missing
+from weather_codes import classify_series, describe, emoji_for_description, is_night_hour
+from sun_ephemeris import daylight_flags, format_minutes, sun_times
+from precip_onset import detect_onset
+from ensemble import fetch_ensemble_bands
+from model_consensus import align_models, compute_consensus, consensus_summary
+from climatology import ClimatologyStore
+from overview_cache import OverviewCache, overview_key
+from ai_overview import (
+    PERPLEXITY_MODEL, PROMPT_VERSION, build_hourly_summary, build_local_brief, build_local_overview,
+    current_hour_index, is_quota_error, request_perplexity_overview, stream_perplexity_overview,
+)
+from overview_jobs import OverviewJobQueue
+from ai_metrics import METRICS
+from radar_nowcast import RadarNowcaster, http_manifest_source, http_tile_source
+from radar_proxy import TILE_HOST
+from app_components import hourly_strip, pack_hourly_strip, page_style, radar_viewer
 
 # Load environment variables from .env file
 load_dotenv()
@@ -43,108 +65,8 @@ US_STATES = {
 }
 ABBREV_TO_STATE = {v: k for k, v in US_STATES.items()}
 
-# Custom CSS - Dark Mode
-st.markdown("""
-<style>
-    .main {
-        background: linear-gradient(135deg, #0f0c29 0%, #302b63 50%, #24243e 100%);
-    }
-    .stApp {
-        background: linear-gradient(135deg, #0f0c29 0%, #302b63 50%, #24243e 100%);
-    }
-    .weather-card {
-        background: rgba(30, 30, 45, 0.95);
-        border-radius: 30px;
-        padding: 40px;
-        box-shadow: 0 20px 60px rgba(0, 0, 0, 0.5);
-        animation: slideIn 0.5s ease-out;
-        border: 1px solid rgba(100, 100, 150, 0.2);
-    }
-    .weather-icon {
-        text-align: center;
-        font-size: 100px;
-        animation: float 3s ease-in-out infinite;
-        filter: drop-shadow(0 0 20px rgba(255, 255, 255, 0.3));
-        margin: 10px 0;
-    }
-    @keyframes float {
-        0%, 100% { transform: translateY(0px); }
-        50% { transform: translateY(-15px); }
-    }
-    .temperature {
-        text-align: center;
-        font-size: 64px;
-        font-weight: bold;
-        color: #00d4ff;
-        text-shadow: 0 0 20px rgba(0, 212, 255, 0.5);
-        margin: 5px 0;
-    }
-    .detail-card {
-        background: linear-gradient(135deg, #1e3c72 0%, #2a5298 100%);
-        padding: 12px 16px;
-        border-radius: 12px;
-        color: white;
-        text-align: center;
-        margin: 10px;
-        border: 1px solid rgba(255, 255, 255, 0.1);
-        box-shadow: 0 5px 15px rgba(0, 0, 0, 0.3);
-    }
-    .coordinates {
-        text-align: center;
-        color: #aaa;
-        font-size: 12px;
-        padding-top: 20px;
-        border-top: 2px solid #444;
-    }
-    h1, h2, h3 {
-        color: #e0e0e0;
-    }
-    .stButton>button {
-        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-        color: white;
-        border: none;
-        border-radius: 25px;
-        padding: 12px 30px;
-        font-weight: bold;
-        box-shadow: 0 4px 10px rgba(102, 126, 234, 0.3);
-    }
-    .stButton>button:hover {
-        background: linear-gradient(135deg, #764ba2 0%, #667eea 100%);
-        box-shadow: 0 8px 20px rgba(102, 126, 234, 0.5);
-        transform: translateY(-2px);
-    }
-    /* Sidebar Dark Mode */
-    [data-testid="stSidebar"] {
-        background: linear-gradient(180deg, #1a1a2e 0%, #16213e 100%);
-    }
-    [data-testid="stSidebar"] .stRadio label,
-    [data-testid="stSidebar"] .stTextInput label,
-    [data-testid="stSidebar"] h2,
-    [data-testid="stSidebar"] h3,
-    [data-testid="stSidebar"] p {
-        color: #e0e0e0 !important;
-    }
-    /* Input fields dark mode */
-    .stTextInput input {
-        background-color: rgba(255, 255, 255, 0.1);
-        color: white;
-        border: 1px solid rgba(255, 255, 255, 0.2);
-    }
-    .stTextInput input::placeholder {
-        color: rgba(255, 255, 255, 0.5);
-    }
-    /* Radio buttons dark mode */
-    .stRadio > div {
-        color: white;
-    }
-    /* Info boxes dark mode */
-    .stAlert {
-        background-color: rgba(30, 30, 45, 0.8);
-        color: #e0e0e0;
-        border: 1px solid rgba(100, 100, 150, 0.3);
-    }
-</style>
-""", unsafe_allow_html=True)
+# Custom CSS - Dark Mode (static/app.css, linked once and cached by the browser)
+page_style()
 
 # Initialize session state
 if 'unit_temp' not in st.session_state:
@@ -304,27 +226,107 @@ def get_location_by_name(location_name):
         st.error(f"Error searching for location: {e}")
         return None
 
+@st.cache_resource(show_spinner=False)
+def get_ip_range_database():
+    """Load the optional offline IP range table named by IP_RANGE_DB_PATH (None if unavailable)."""
+    db_path = os.environ.get('IP_RANGE_DB_PATH', '')
+    if not db_path or not os.path.exists(db_path):
+        return None
+    try:
+        return IPRangeDatabase(db_path)
+    except Exception as e:
+        print(f"Could not load IP range database {db_path}: {e}", flush=True)
+        return None
+
+@st.cache_resource(show_spinner=False)
+def get_climatology_store():
+    """Open the precomputed normals store named by CLIMATOLOGY_STORE.
+
+    Cells (and the store directory itself) may be filled while the app runs:
+    python climatology.py backfill <lat> <lon>
+    """
+    return ClimatologyStore(os.environ.get('CLIMATOLOGY_STORE', 'climatology'))
+
+@st.cache_resource(show_spinner=False)
+def get_radar_nowcaster():
+    """Process-wide radar nowcaster, so every session shares the decoded frames (None without NumPy/Pillow).
+
+    Uses the radar proxy (RADAR_PROXY_URL) for the manifest and tiles when one is set.
+    """
+    proxy = os.environ.get('RADAR_PROXY_URL', '')
+    try:
+        return RadarNowcaster(http_tile_source(proxy or TILE_HOST), http_manifest_source(proxy))
+    except RuntimeError:
+        return None
+
+RADAR_NOWCAST_TTL = 300  # RainViewer publishes a frame every 5-10 minutes
+
+@st.cache_data(ttl=RADAR_NOWCAST_TTL, show_spinner=False)
+def fetch_radar_nowcast(latitude, longitude):
+    """Radar-based precipitation onset for a location (see radar_nowcast), cached per frame interval."""
+    nowcaster = get_radar_nowcaster()
+    return nowcaster.nowcast(latitude, longitude) if nowcaster else None
+
+def get_client_ip():
+    """Return the browser's public IP address, or None when running locally/unknown."""
+    context = getattr(st, 'context', None)
+    headers = getattr(context, 'headers', None) or {}
+    candidates = []
+    forwarded = headers.get('X-Forwarded-For', '')
+    if forwarded:
+        candidates.append(forwarded.split(',')[0].strip())
+    candidates.append(headers.get('X-Real-Ip', ''))
+    candidates.append(getattr(context, 'ip_address', None) or '')
+    
+    for candidate in candidates:
+        try:
+            if candidate and ipaddress.ip_address(candidate).is_global:
+                return candidate
+        except ValueError:
+            continue
+    return None
+
+@st.cache_data(ttl=86400, show_spinner=False)
+def lookup_ip_location(client_ip):
+    """Resolve an IP address to a location, cached for a day per address.
+    
+    The offline range table answers locally when configured; ipapi.co is only
+    used as a fallback. Failures raise so they are never cached.
+    """
+    db = get_ip_range_database()
+    if db and client_ip:
+        location = db.lookup(client_ip)
+        if location:
+            return location
+    
+    # ipapi.co fallback - look up the client's address, not the server's
+    url = f"https://ipapi.co/{client_ip}/json/" if client_ip else 'https://ipapi.co/json/'
+    response = requests.get(url, timeout=5)
+    data = response.json()
+    
+    if data.get('latitude') and data.get('longitude'):
+        return {
+            'latitude': data.get('latitude'),
+            'longitude': data.get('longitude'),
+            'city': data.get('city', 'Unknown'),
+            'region': data.get('region', 'Unknown'),
+            'country': data.get('country_name', 'Unknown')
+        }
+    raise LookupError(data.get('reason') or 'Location not available for this address')
+
 def get_current_location():
-    """Get approximate location based on IP address."""
+    """Get approximate location based on the client's IP address."""
     try:
-        response = requests.get('https://ipapi.co/json/', timeout=5)
-        data = response.json()
-        
-        if data.get('latitude') and data.get('longitude'):
-            return {
-                'latitude': data.get('latitude'),
-                'longitude': data.get('longitude'),
-                'city': data.get('city', 'Unknown'),
-                'region': data.get('region', 'Unknown'),
-                'country': data.get('country_name', 'Unknown')
-            }
+        return lookup_ip_location(get_client_ip())
+    except LookupError:
         return None
     except Exception as e:
         st.error(f"Error getting location: {e}")
         return None
 
+@st.cache_data(ttl=300, show_spinner=False)
 def get_weather_alerts(latitude, longitude):
-    """Get active weather alerts from National Weather Service API.
+    """Get active weather alerts from National Weather Service API (cached 5 minutes).
     
     Returns alerts for the given location including:
     - Severe weather warnings
@@ -387,6 +389,42 @@ def get_weather_alerts(latitude, longitude):
         # Fail silently for non-US locations or API issues
         return None
 
+@st.cache_data(ttl=600, show_spinner=False)
+def fetch_weather(latitude, longitude, model='best_match'):
+    """Fetch an Open-Meteo forecast, cached for 10 minutes per location and model.
+    
+    Raises on HTTP errors so failures are never cached (see get_weather()).
+    """
+    url = "https://api.open-meteo.com/v1/forecast"
+    params = {
+        'latitude': latitude,
+        'longitude': longitude,
+        'current': 'temperature_2m,relative_humidity_2m,wind_speed_10m,weather_code',
+        'hourly': 'temperature_2m,precipitation_probability,precipitation,rain,showers,snowfall,weather_code',
+        'minutely_15': 'precipitation,rain,snowfall,weather_code',  # Nowcast for precipitation onset
+        'forecast_minutely_15': 48,  # 12 hours of 15-minute steps
+        'daily': 'temperature_2m_max,temperature_2m_min,sunshine_duration,uv_index_max',  # Sun times are computed locally (sun_ephemeris)
+        'temperature_unit': 'fahrenheit',
+        'wind_speed_unit': 'mph',
+        'forecast_days': 3,  # 3 days = 72 hours of hourly forecast
+        'timezone': 'auto'
+    }
+    
+    # Add model parameter if not using best_match
+    if model != 'best_match':
+        params['models'] = model
+    
+    response = requests.get(url, params=params, timeout=10)
+    response.raise_for_status()
+    data = response.json()
+    
+    # Add model info to response for display
+    data['model_used'] = model
+    # Hashed once per fetch: every rerun gets a copy that already carries it
+    weather_fingerprint(data)
+    
+    return data
+
 def get_weather(latitude, longitude, model='best_match'):
     """Get current weather data from Open-Meteo API with hourly forecast.
     
@@ -402,234 +440,139 @@ def get_weather(latitude, longitude, model='best_match'):
             - 'icon_global': ICON Global (German Weather Service, high resolution)
     """
     try:
-        url = "https://api.open-meteo.com/v1/forecast"
-        params = {
-            'latitude': latitude,
-            'longitude': longitude,
-            'current': 'temperature_2m,relative_humidity_2m,wind_speed_10m,weather_code',
-            'hourly': 'temperature_2m,precipitation_probability,precipitation,weather_code',
-            'daily': 'sunrise,sunset,daylight_duration,sunshine_duration,uv_index_max',
-            'temperature_unit': 'fahrenheit',
-            'wind_speed_unit': 'mph',
-            'forecast_days': 3,  # 3 days = 72 hours of hourly forecast
-            'timezone': 'auto'
-        }
-        
-        # Add model parameter if not using best_match
-        if model != 'best_match':
-            params['models'] = model
-        
-        response = requests.get(url, params=params, timeout=10)
-        response.raise_for_status()
-        data = response.json()
-        
-        # Add model info to response for display
-        data['model_used'] = model
-        
-        return data
+        return fetch_weather(latitude, longitude, model)
     except Exception as e:
         st.error(f"Error getting weather: {e}")
         return None
 
-def check_precipitation_soon(weather_data):
-    """Check if precipitation is expected soon and return details including type."""
+RADAR_NOWCAST_POLL_SECONDS = 1  # How often the precipitation banner checks for the radar nowcast
+
+def check_precipitation_soon(weather_data, location=None):
+    """Check if precipitation is expected soon and return details including type.
+    
+    Uses the 15-minute nowcast when available and the hourly forecast otherwise,
+    with "now" taken in the location's own timezone (see precip_onset). With a
+    location, an earlier arrival seen on radar (see radar_nowcast) wins once the
+    background nowcast has finished.
+    """
     try:
-        if not weather_data or 'hourly' not in weather_data:
-            return None
-        
-        hourly = weather_data['hourly']
-        times = hourly.get('time', [])
-        precip_prob = hourly.get('precipitation_probability', [])
-        precipitation = hourly.get('precipitation', [])
-        rain = hourly.get('rain', [])
-        showers = hourly.get('showers', [])
-        snowfall = hourly.get('snowfall', [])
-        weather_codes = hourly.get('weather_code', [])
-        
-        current_time = datetime.now()
-        
-        # Check next 12 hours for precipitation
-        for i, time_str in enumerate(times[:12]):
-            if i >= len(precip_prob):
-                continue
-                
-            prob = precip_prob[i] if i < len(precip_prob) else 0
-            precip = precipitation[i] if i < len(precipitation) else 0
-            rain_amt = rain[i] if i < len(rain) else 0
-            shower_amt = showers[i] if i < len(showers) else 0
-            snow_amt = snowfall[i] if i < len(snowfall) else 0
-            w_code = weather_codes[i] if i < len(weather_codes) else 0
-            
-            # If moderate to high probability (>30%) or actual precipitation expected
-            if (prob and prob > 30) or precip > 0.1:
-                # Calculate minutes until this time
-                try:
-                    # Handle different time formats
-                    if 'T' in time_str:
-                        forecast_time = datetime.fromisoformat(time_str.replace('Z', ''))
-                    else:
-                        forecast_time = datetime.fromisoformat(time_str)
-                    
-                    # Calculate time difference
-                    current_time = datetime.now()
-                    time_diff = (forecast_time - current_time).total_seconds()
-                    minutes = int(time_diff / 60)
-                    
-                    if minutes > 0 and minutes <= 720:  # Within next 12 hours
-                        # Determine precipitation type
-                        precip_type = 'Rain'
-                        emoji = '🌧️'
-                        color_start = '#ff6b6b'
-                        color_end = '#ee5a6f'
-                        
-                        # Check for snow
-                        if snow_amt > 0 or w_code in [71, 73, 75, 77, 85, 86]:
-                            precip_type = 'Snow'
-                            emoji = '❄️'
-                            color_start = '#64b5f6'
-                            color_end = '#42a5f5'
-                        # Check for freezing rain/sleet
-                        elif w_code in [56, 57, 66, 67]:
-                            precip_type = 'Freezing Rain'
-                            emoji = '🧊'
-                            color_start = '#9575cd'
-                            color_end = '#7e57c2'
-                        # Check for thunderstorm
-                        elif w_code in [95, 96, 99]:
-                            precip_type = 'Thunderstorm'
-                            emoji = '⛈️'
-                            color_start = '#ffa726'
-                            color_end = '#ff9800'
-                        # Check for showers vs rain
-                        elif shower_amt > rain_amt:
-                            precip_type = 'Showers'
-                            emoji = '🌦️'
-                        
-                        return {
-                            'minutes': minutes,
-                            'probability': prob,
-                            'amount': precip if precip else 0,
-                            'type': precip_type,
-                            'emoji': emoji,
-                            'color_start': color_start,
-                            'color_end': color_end
-                        }
-                except Exception as time_err:
-                    continue  # Skip this time slot if parsing fails
-        
-        return None
+        onset = detect_onset(weather_data)
     except Exception as e:
         st.error(f"Error checking precipitation: {e}")
+        onset = None
+    radar = get_radar_onset(location) if location else None
+    if radar and (onset is None or radar['minutes'] < onset['minutes']):
+        return radar
+    return onset
+
+def prefetch_radar_nowcast(location):
+    """Start the radar nowcast for a location in the background (once per location and radar interval)."""
+    key = (location['latitude'], location['longitude'])
+    interval = int(datetime.now(timezone.utc).timestamp() // RADAR_NOWCAST_TTL)
+    prefetched = st.session_state.setdefault('radar_nowcast', {})
+    if (key, interval) not in prefetched:
+        prefetched.clear()
+        prefetched[(key, interval)] = get_nowcast_executor().submit(fetch_radar_nowcast, *key)
+    return prefetched[(key, interval)]
+
+@st.cache_resource(show_spinner=False)
+def get_nowcast_executor():
+    """Thread pool for radar nowcasts, separate from the model prefetches so they never queue behind them."""
+    return ThreadPoolExecutor(max_workers=2, thread_name_prefix="nowcast")
+
+def get_radar_onset(location):
+    """Radar onset for a location if its nowcast has finished (never blocks; None otherwise)."""
+    future = prefetch_radar_nowcast(location)
+    if not future.done():
+        return None
+    try:
+        return future.result()
+    except Exception as e:
+        print(f"Radar nowcast failed: {e}", flush=True)
+        return None
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def get_ensemble_bands(latitude, longitude):
+    """Ensemble percentile bands for a location (ECMWF ENS + GEFS members).
+    
+    Only the reduced p10/p50/p90 bands and exceedance probabilities are cached,
+    not the raw member data. Returns None if the ensemble API is unavailable.
+    """
+    try:
+        return fetch_ensemble_bands(latitude, longitude)
+    except Exception as e:
+        print(f"Ensemble fetch failed: {e}", flush=True)
         return None
 
 def get_weather_description(weather_code):
     """Convert weather code to description."""
-    weather_codes = {
-        0: "Clear sky",
-        1: "Mainly clear",
-        2: "Partly cloudy",
-        3: "Overcast",
-        45: "Foggy",
-        48: "Depositing rime fog",
-        51: "Light drizzle",
-        53: "Moderate drizzle",
-        55: "Dense drizzle",
-        61: "Slight rain",
-        63: "Moderate rain",
-        65: "Heavy rain",
-        71: "Slight snow",
-        73: "Moderate snow",
-        75: "Heavy snow",
-        77: "Snow grains",
-        80: "Slight rain showers",
-        81: "Moderate rain showers",
-        82: "Violent rain showers",
-        85: "Slight snow showers",
-        86: "Heavy snow showers",
-        95: "Thunderstorm",
-        96: "Thunderstorm with slight hail",
-        99: "Thunderstorm with heavy hail"
-    }
-    return weather_codes.get(weather_code, "Unknown")
+    return describe(weather_code)
 
-def get_weather_emoji(conditions, time_str=None):
+def get_weather_emoji(conditions, time_str=None, is_night=None):
     """Get emoji based on weather conditions and time of day.
     
     Args:
         conditions: Weather condition string
         time_str: Optional ISO format time string (e.g., "2024-12-12T22:00")
                   If provided and it's nighttime, uses night-appropriate emojis
+        is_night: Optional day/night flag (e.g. from night_flags()); overrides
+                  the fixed 6 PM - 6 AM check on time_str
+    
+    For whole hourly series use classify_series(), which does the same lookup in one pass.
     """
-    # Determine if it's nighttime (6 PM to 6 AM)
-    is_night = False
-    if time_str:
-        try:
-            from datetime import datetime
-            if 'T' in time_str:
-                dt = datetime.fromisoformat(time_str.replace('Z', '+00:00'))
-                hour = dt.hour
-                is_night = hour >= 18 or hour < 6  # 6 PM to 6 AM
-        except:
-            pass
-    
-    # Night-specific emojis
-    if is_night:
-        night_emoji = {
-            "Clear sky": "🌙",
-            "Mainly clear": "🌙",
-            "Partly cloudy": "☁️",
-            "Overcast": "☁️",
-            "Foggy": "🌫️",
-            "Depositing rime fog": "🌫️",
-            "Light drizzle": "🌧️",
-            "Moderate drizzle": "🌧️",
-            "Dense drizzle": "🌧️",
-            "Slight rain": "🌧️",
-            "Moderate rain": "🌧️",
-            "Heavy rain": "⛈️",
-            "Slight snow": "🌨️",
-            "Moderate snow": "❄️",
-            "Heavy snow": "❄️",
-            "Snow grains": "❄️",
-            "Slight rain showers": "🌧️",
-            "Moderate rain showers": "🌧️",
-            "Violent rain showers": "⛈️",
-            "Slight snow showers": "🌨️",
-            "Heavy snow showers": "❄️",
-            "Thunderstorm": "⛈️",
-            "Thunderstorm with slight hail": "⛈️",
-            "Thunderstorm with heavy hail": "⛈️"
-        }
-        return night_emoji.get(conditions, "🌙")
-    
-    # Daytime emojis
-    weather_emoji = {
-        "Clear sky": "☀️",
-        "Mainly clear": "🌤️",
-        "Partly cloudy": "⛅",
-        "Overcast": "☁️",
-        "Foggy": "🌫️",
-        "Depositing rime fog": "🌫️",
-        "Light drizzle": "🌦️",
-        "Moderate drizzle": "🌧️",
-        "Dense drizzle": "🌧️",
-        "Slight rain": "🌧️",
-        "Moderate rain": "🌧️",
-        "Heavy rain": "⛈️",
-        "Slight snow": "🌨️",
-        "Moderate snow": "❄️",
-        "Heavy snow": "❄️",
-        "Snow grains": "❄️",
-        "Slight rain showers": "🌦️",
-        "Moderate rain showers": "🌧️",
-        "Violent rain showers": "⛈️",
-        "Slight snow showers": "🌨️",
-        "Heavy snow showers": "❄️",
-        "Thunderstorm": "⛈️",
-        "Thunderstorm with slight hail": "⛈️",
-        "Thunderstorm with heavy hail": "⛈️"
+    if is_night is None:
+        is_night = is_night_hour(time_str)
+    return emoji_for_description(conditions, is_night)
+
+def night_flags(times, weather_data, latitude, longitude):
+    """Night (True) / day (False) for each local time, from the computed sunrise and sunset.
+    
+    Falls back to the fixed 6 PM - 6 AM check when the data has no UTC offset.
+    """
+    offset = weather_data.get('utc_offset_seconds')
+    if offset is None or latitude is None or longitude is None:
+        return [is_night_hour(t) for t in times]
+    return [not is_day for is_day in daylight_flags(times, latitude, longitude, offset)]
+
+def get_visual_crossing_api_key():
+    """Return the Visual Crossing API key from the sidebar or environment."""
+    # Get API key from session state first (user's custom key in sidebar)
+    api_key = st.session_state.get('visual_crossing_api_key', '')
+    
+    if not api_key:
+        # Try environment variable (recommended for security)
+        api_key = os.environ.get('VISUAL_CROSSING_API_KEY', '')
+    
+    return api_key
+
+@st.cache_data(ttl=900, show_spinner=False)
+def fetch_visual_crossing_timeline(latitude, longitude, api_key):
+    """Fetch the combined Visual Crossing timeline used by the outlook card and the VC tab.
+    
+    One request asks for daily descriptions, hourly data and current conditions,
+    so the outlook and the forecast tab share a single call (and its billed records).
+    Only today and the next two days are requested, the 3 days the app shows.
+    Cached for 15 minutes per location and key.
+    
+    Raises on HTTP and network errors so failures are never cached.
+    """
+    # Visual Crossing API endpoint (free tier)
+    # Sign up at: https://www.visualcrossing.com/sign-up
+    # Free tier: 1000 records/day
+    url = (f"https://weather.visualcrossing.com/VisualCrossingWebServices/rest/services/timeline/"
+           f"{latitude},{longitude}/next2days")
+    
+    params = {
+        'key': api_key,
+        'unitGroup': 'us',  # Fahrenheit, mph, etc.
+        'include': 'days,hours,current',  # Daily description + hourly + current conditions
+        'elements': 'datetime,description,temp,humidity,precip,precipprob,windspeed,conditions,icon',
+        'contentType': 'json'
     }
-    return weather_emoji.get(conditions, "🌤️")
+    
+    response = requests.get(url, params=params, timeout=10)
+    response.raise_for_status()
+    return response.json()
 
 def get_visual_crossing_outlook(latitude, longitude):
     """Get daily weather description from Visual Crossing API (free tier).
@@ -642,48 +585,27 @@ def get_visual_crossing_outlook(latitude, longitude):
     Returns the 'description' field for today's weather or None if unavailable.
     """
     try:
-        # Visual Crossing API endpoint (free tier)
-        # Sign up at: https://www.visualcrossing.com/sign-up
-        # Free tier: 1000 records/day
-        
-        # Get API key from session state first (user's custom key in sidebar)
-        api_key = st.session_state.get('visual_crossing_api_key', '')
-        
-        if not api_key:
-            # Try environment variable (recommended for security)
-            api_key = os.environ.get('VISUAL_CROSSING_API_KEY', '')
+        api_key = get_visual_crossing_api_key()
         
         if not api_key:
             # No API key configured - Visual Crossing features will be disabled
             return None
         
-        # Build API URL - request only today's data to minimize record usage
-        url = f"https://weather.visualcrossing.com/VisualCrossingWebServices/rest/services/timeline/{latitude},{longitude}/today"
-        
-        params = {
-            'key': api_key,
-            'unitGroup': 'us',  # Fahrenheit, mph, etc.
-            'include': 'days',  # Only include daily data
-            'elements': 'datetime,description',  # Only get the description
-            'contentType': 'json'
-        }
-        
-        response = requests.get(url, params=params, timeout=10)
+        try:
+            data = fetch_visual_crossing_timeline(latitude, longitude, api_key)
+        except requests.HTTPError as e:
+            if e.response is not None and e.response.status_code == 401:
+                # Invalid API key - show warning once
+                if 'vc_api_key_warning_shown' not in st.session_state:
+                    st.warning("⚠️ Visual Crossing API key is invalid. Using generated outlook instead.")
+                    st.session_state.vc_api_key_warning_shown = True
+            return None
         
-        # Check if request was successful
-        if response.status_code == 200:
-            data = response.json()
-            
-            # Get description from today's data
-            if 'days' in data and len(data['days']) > 0:
-                description = data['days'][0].get('description')
-                if description:
-                    return description
-        elif response.status_code == 401:
-            # Invalid API key - show warning once
-            if 'vc_api_key_warning_shown' not in st.session_state:
-                st.warning("⚠️ Visual Crossing API key is invalid. Using generated outlook instead.")
-                st.session_state.vc_api_key_warning_shown = True
+        # Get description from today's data
+        if data.get('days'):
+            description = data['days'][0].get('description')
+            if description:
+                return description
         
         return None
         
@@ -716,34 +638,17 @@ def get_visual_crossing_forecast(latitude, longitude):
     Returns weather data in a format compatible with display_weather() function.
     """
     try:
-        # Get API key from session state first (user's custom key in sidebar)
-        api_key = st.session_state.get('visual_crossing_api_key', '')
-        
-        if not api_key:
-            # Try environment variable (recommended for security)
-            api_key = os.environ.get('VISUAL_CROSSING_API_KEY', '')
+        api_key = get_visual_crossing_api_key()
         
         if not api_key:
             # No API key configured - return None to use Open-Meteo instead
             return None
         
-        # Build API URL - request 3 days of data with hourly details
-        url = f"https://weather.visualcrossing.com/VisualCrossingWebServices/rest/services/timeline/{latitude},{longitude}"
-        
-        params = {
-            'key': api_key,
-            'unitGroup': 'us',  # Fahrenheit, mph, etc.
-            'include': 'hours,current',  # Include hourly and current conditions
-            'elements': 'datetime,temp,humidity,precip,precipprob,windspeed,conditions,icon',
-            'contentType': 'json'
-        }
-        
-        response = requests.get(url, params=params, timeout=10)
+        # Shared with the outlook card - one cached timeline request per location
+        # (errors fall through to the except below and are retried on the next run)
+        data = fetch_visual_crossing_timeline(latitude, longitude, api_key)
         
-        # Check if request was successful
-        if response.status_code == 200:
-            data = response.json()
-            
+        if data:
             # Convert Visual Crossing format to Open-Meteo compatible format
             converted_data = {
                 'current': {},
@@ -760,7 +665,9 @@ def get_visual_crossing_forecast(latitude, longitude):
             if 'currentConditions' in data:
                 current = data['currentConditions']
                 icon = current.get('icon', 'clear-day')
+                today = data['days'][0].get('datetime', '') if data.get('days') else ''
                 converted_data['current'] = {
+                    'time': f"{today}T{current.get('datetime', '')[:5]}" if today else None,
                     'temperature_2m': current.get('temp', 0),
                     'relative_humidity_2m': current.get('humidity', 0),
                     'wind_speed_10m': current.get('windspeed', 0),
@@ -786,12 +693,14 @@ def get_visual_crossing_forecast(latitude, longitude):
                             converted_data['hourly']['precipitation_probability'].append(hour.get('precipprob', 0))
                             # Convert precipitation from inches to mm for consistency (1 inch = 25.4 mm)
                             precip_inches = hour.get('precip', 0) or 0
-                            precip_mm = precip_inches * 25.4
+                            precip_mm = precip_inches * MM_PER_INCH
                             converted_data['hourly']['precipitation'].append(precip_mm)
                             converted_data['hourly']['weather_code'].append(weather_code)
             
             # Add timezone info (required by display functions)
             converted_data['timezone'] = data.get('timezone', 'America/New_York')
+            if data.get('tzoffset') is not None:
+                converted_data['utc_offset_seconds'] = int(data['tzoffset'] * 3600)
             
             return converted_data
         else:
@@ -801,76 +710,106 @@ def get_visual_crossing_forecast(latitude, longitude):
         return None
 
 def convert_temp(temp_f, to_celsius=False):
-    """Convert temperature between F and C."""
+    """Convert a single temperature between F and C (use dataset_unit_series() for hourly data)."""
     if to_celsius:
         return (temp_f - 32) * 5/9
     return temp_f
 
 def convert_wind(wind_mph, to_kmh=False):
-    """Convert wind speed between mph and km/h."""
+    """Convert a single wind speed between mph and km/h."""
     if to_kmh:
-        return wind_mph * 1.60934
+        return wind_mph * KMH_PER_MPH
     return wind_mph
 
-def display_sun_times(weather_data):
-    """Display sunrise, sunset, and twilight information from daily weather data.
+def display_normal_comparison(weather_data, latitude, longitude):
+    """Show how today's forecast high compares with the precomputed climate normal."""
+    store = get_climatology_store()
+    if store is None:
+        return
+    try:
+        normals = store.normals(latitude, longitude)
+    except Exception as e:
+        print(f"Could not read climatology normals: {e}", flush=True)
+        return
+    today = (weather_data.get('current', {}).get('time') or '')[:10]
+    if normals is None or not today:
+        return
+
+    daily = weather_data.get('daily', {})
+    highs = daily.get('temperature_2m_max') or []
+    if daily.get('time') and daily['time'][0] == today and highs and highs[0] is not None:
+        high = highs[0]
+    else:
+        # Visual Crossing data has no daily block: use the hourly maximum
+        hourly = weather_data.get('hourly', {})
+        temps = [t for ts, t in zip(hourly.get('time', []), hourly.get('temperature_2m', []))
+                 if ts.startswith(today) and t is not None]
+        high = max(temps) if temps else None
+
+    anomaly = normals.anomaly('temperature_2m_max', today, high)
+    if anomaly is None:
+        return
+    normal = normals.get('temperature_2m_max', today)
+    if st.session_state.unit_temp == 'F':
+        diff, high_str, normal_str = anomaly, f"{high:.0f}°F", f"{normal:.0f}°F"
+    else:
+        diff = anomaly * 5 / 9
+        high_str, normal_str = f"{convert_temp(high, True):.0f}°C", f"{convert_temp(normal, True):.0f}°C"
+    unit = f"°{st.session_state.unit_temp}"
+    if abs(diff) < 1:
+        comparison = "right at normal"
+    else:
+        comparison = f"{abs(diff):.0f}{unit} {'above' if diff > 0 else 'below'} normal"
+    st.markdown(f"<p style='text-align: center; color: #aaa; margin-top: -10px; margin-bottom: 15px;'>"
+                f"📈 Today's high {high_str} is {comparison} ({normal_str})</p>", unsafe_allow_html=True)
+
+def display_sun_times(weather_data, latitude, longitude):
+    """Display sunrise, sunset, and twilight information for the location's current day.
+    
+    Sun times and civil twilight are computed locally (sun_ephemeris); sunshine
+    duration and UV index come from the 'daily' weather data when available.
     
     Args:
-        weather_data: Weather data dict containing 'daily' with sun times
+        weather_data: Weather data dict ('utc_offset_seconds', 'current', optional 'daily')
+        latitude: Location latitude
+        longitude: Location longitude
     """
     try:
-        daily = weather_data.get('daily', {})
-        if not daily:
+        offset = weather_data.get('utc_offset_seconds')
+        today = (weather_data.get('current', {}).get('time') or '')[:10]
+        if offset is None or not today:
             return
         
-        # Get today's data (first entry)
-        sunrise = daily.get('sunrise', [None])[0]
-        sunset = daily.get('sunset', [None])[0]
-        daylight_duration = daily.get('daylight_duration', [None])[0]
+        events = sun_times(latitude, longitude, [today], offset)
+        daily = weather_data.get('daily', {})
         sunshine_duration = daily.get('sunshine_duration', [None])[0]
         uv_index = daily.get('uv_index_max', [None])[0]
         
-        if not sunrise or not sunset:
-            return
-        
-        from datetime import datetime, timedelta
-        
-        # Parse sunrise and sunset times
-        sunrise_dt = datetime.fromisoformat(sunrise.replace('Z', '+00:00'))
-        sunset_dt = datetime.fromisoformat(sunset.replace('Z', '+00:00'))
-        
-        # Format times
-        sunrise_time = sunrise_dt.strftime('%I:%M %p').lstrip('0')
-        sunset_time = sunset_dt.strftime('%I:%M %p').lstrip('0')
-        
-        # Estimate civil twilight (approximately 25-30 minutes before sunrise / after sunset)
-        # Civil twilight is when the sun is between 0° and 6° below the horizon
-        first_light_dt = sunrise_dt - timedelta(minutes=28)
-        last_light_dt = sunset_dt + timedelta(minutes=28)
-        
-        first_light = first_light_dt.strftime('%I:%M %p').lstrip('0')
-        last_light = last_light_dt.strftime('%I:%M %p').lstrip('0')
+        # Format times (polar day/night have no sunrise/sunset)
+        first_light = format_minutes(events['dawn'][0]) or "—"
+        sunrise_time = format_minutes(events['sunrise'][0]) or "—"
+        sunset_time = format_minutes(events['sunset'][0]) or "—"
+        last_light = format_minutes(events['dusk'][0]) or "—"
+        daylight_duration = events['daylight_seconds'][0]
         
         # Convert daylight duration from seconds to hours and minutes
-        if daylight_duration:
-            hours = int(daylight_duration // 3600)
-            minutes = int((daylight_duration % 3600) // 60)
-            daylight_str = f"{hours}h {minutes}m"
-        else:
-            daylight_str = "N/A"
+        hours = int(daylight_duration // 3600)
+        minutes = int((daylight_duration % 3600) // 60)
+        daylight_str = f"{hours}h {minutes}m"
         
         # Sunshine duration (actual sunshine vs possible daylight)
         if sunshine_duration:
             sun_hours = int(sunshine_duration // 3600)
             sun_minutes = int((sunshine_duration % 3600) // 60)
             sunshine_str = f"{sun_hours}h {sun_minutes}m"
-            sunshine_percent = int((sunshine_duration / daylight_duration * 100)) if daylight_duration else 0
+            sunshine_percent = min(100, int((sunshine_duration / daylight_duration * 100))) if daylight_duration else 0
         else:
             sunshine_str = "N/A"
             sunshine_percent = 0
         
         # UV Index color coding
-        if uv_index:
+        if uv_index is not None:
+            uv_str = f"{uv_index:.0f} - "
             if uv_index < 3:
                 uv_color = "#2ecc71"  # Green - Low
                 uv_level = "Low"
@@ -887,6 +826,7 @@ def display_sun_times(weather_data):
                 uv_color = "#8e44ad"  # Purple - Extreme
                 uv_level = "Extreme"
         else:
+            uv_str = ""
             uv_color = "#888"
             uv_level = "N/A"
         
@@ -933,7 +873,7 @@ def display_sun_times(weather_data):
 </div>
 <div style='text-align: center;'>
 <div style='font-size: 11px; color: #aaa; text-transform: uppercase;'>UV Index</div>
-<div style='font-size: 16px; font-weight: 600; color: {uv_color}; margin-top: 3px;'>{uv_index:.0f} - {uv_level}</div>
+<div style='font-size: 16px; font-weight: 600; color: {uv_color}; margin-top: 3px;'>{uv_str}{uv_level}</div>
 </div>
 </div>
 </div>""", unsafe_allow_html=True)
@@ -943,26 +883,6 @@ def display_sun_times(weather_data):
         pass
 
 # ===== AI Overview (OpenAI) =====
-def build_hourly_summary(hourly: Dict[str, Any], start_idx: int, hours_to_show: int = 24) -> List[Dict[str, Any]]:
-    """Extract a compact hourly slice for AI summarization (up to 24 hours)."""
-    times = hourly.get('time', [])
-    temps = hourly.get('temperature_2m', [])
-    codes = hourly.get('weather_code', [])
-    probs = hourly.get('precipitation_probability', [])
-    precips = hourly.get('precipitation', [])
-    end = min(len(times), start_idx + hours_to_show)
-    summary = []
-    for i in range(start_idx, end):
-        hour = {
-            'time': times[i],
-            'temp_f': temps[i] if i < len(temps) else None,
-            'wmo_code': codes[i] if i < len(codes) else None,
-            'precip_prob': probs[i] if i < len(probs) else None,
-            'precip_mm': precips[i] if i < len(precips) else None,
-        }
-        summary.append(hour)
-    return summary
-
 def get_openai_client():
     """Initialize OpenAI client using environment variable."""
     # Load API key from environment variable
@@ -975,927 +895,147 @@ def get_openai_client():
     except Exception:
         return None
 
+@st.cache_resource(show_spinner=False)
+def get_overview_cache():
+    """Process-wide AI overview cache, backed by the SQLite file at OVERVIEW_CACHE_PATH."""
+    return OverviewCache(os.environ.get('OVERVIEW_CACHE_PATH', 'overview_cache.sqlite'))
+
 def generate_ai_overview(location: Dict[str, Any], hourly_slice: List[Dict[str, Any]]) -> str:
-    """Use Perplexity AI to produce a web-based, human-friendly weather overview from hourly forecast data."""
+    """Use Perplexity AI to produce a web-based, human-friendly weather overview from hourly forecast data.
+    
+    Overviews are cached per grid cell, forecast slice and PROMPT_VERSION (see
+    overview_cache), so repeat requests for the same forecast cost nothing.
+    Each request is recorded in the AI metrics (see ai_metrics).
+    """
     # Perplexity API configuration - load from environment variable
     perplexity_api_key = os.environ.get('PERPLEXITY_API_KEY', '')
     
-    if not perplexity_api_key:
-        return "⚠️ Perplexity API key not configured. Please set PERPLEXITY_API_KEY environment variable."
-    
-    if not perplexity_api_key:
-        return "🌐 Web-Based AI Weather Overview unavailable: API key not configured."
+    with METRICS.track('perplexity', PERPLEXITY_MODEL) as call:
+        if not perplexity_api_key:
+            call.fallback = 'no_key'
+            return "⚠️ Perplexity API key not configured. Please set PERPLEXITY_API_KEY environment variable."
 
-    city = location.get('city', 'Unknown')
-    region = location.get('region', '')
-    country = location.get('country', '')
-    
-    # Get current date for context
-    from datetime import datetime
-    today = datetime.now().strftime('%B %d, %Y')
+        if not hourly_slice:
+            call.fallback = 'no_data'
+            return "AI overview unavailable: missing hourly data."
+
+        key = overview_key(location, hourly_slice, PROMPT_VERSION, kind='perplexity')
+        try:
+            text, hit = get_overview_cache().get_or_create(
+                key, lambda: request_perplexity_overview(location, hourly_slice, perplexity_api_key, call=call)
+            )
+            call.cache = 'hit' if hit else 'miss'
+            return text
+        except Exception as e:
+            call.cache, call.error = 'miss', str(e)
+            if is_quota_error(e):
+                call.fallback = 'quota'
+                return build_local_overview(location, hourly_slice)
+            call.fallback = 'error'
+            return f"AI overview failed: {e}"
 
-    # Build hourly data summary for the prompt
-    if not hourly_slice:
-        return "AI overview unavailable: missing hourly data."
+def stream_ai_overview(location: Dict[str, Any], hourly_slice: List[Dict[str, Any]]):
+    """generate_ai_overview() as a stream of text chunks, for rendering as they arrive.
     
-    # Format hourly data into readable text (next 48 hours)
-    hours_text = []
-    for h in hourly_slice[:48]:
-        time_str = h.get('time', '')
-        temp = h.get('temp_f')
-        precip_prob = h.get('precip_prob', 0)
-        precip_mm = h.get('precip_mm', 0)
-        
-        # Format: "2023-12-13T14:00 -> 72°F, 30% precip chance, 0.5mm"
-        temp_str = f"{int(temp)}°F" if temp else "N/A"
-        hours_text.append(f"{time_str} -> {temp_str}, {precip_prob}% precip, {precip_mm}mm")
-    
-    hours_blob = "\n".join(hours_text)
-
-    system_msg = (
-        "You are a precise, thorough weather forecaster with access to real-time web information. "
-        "You will receive hourly weather data and transform it into a richly detailed, practical 2-day forecast "
-        "enriched with current web-based weather intelligence from trusted meteorological sources. "
-        "Use a natural, flowing narrative style with complete sentences and professional weather language. "
-        "Be explicit about when precipitation starts, peaks, and ends with specific time callouts. "
-        "Leverage your web search capabilities to provide context about current weather patterns, systems, and trends."
-    )
+    A cached overview comes back as a single chunk; otherwise Perplexity's
+    chunks are passed through and the full text is cached once complete. Errors
+    end the stream with the same fallbacks as generate_ai_overview().
+    """
+    perplexity_api_key = os.environ.get('PERPLEXITY_API_KEY', '')
+    with METRICS.track('perplexity', PERPLEXITY_MODEL) as call:
+        if not perplexity_api_key:
+            call.fallback = 'no_key'
+            yield "⚠️ Perplexity API key not configured. Please set PERPLEXITY_API_KEY environment variable."
+            return
+        if not hourly_slice:
+            call.fallback = 'no_data'
+            yield "AI overview unavailable: missing hourly data."
+            return
 
-    user_msg = (
-        f"Location: {city}, {region}, {country}\n"
-        f"Date: {today}\n\n"
-        f"HOURLY FORECAST DATA (next 48 hours):\n{hours_blob}\n\n"
-        f"Using your web search capabilities, find current weather patterns, advisories, and meteorological context for {city}, {region}. "
-        f"Then create a comprehensive forecast using this EXACT format:\n\n"
-        f"🌨️ <DayName> — <Full Date (e.g., December 13, 2025)>\n"
-        f"==================================================\n\n"
-        f"**General**\n\n"
-        f"<2-3 complete sentences describing overall conditions, sky cover, and primary weather pattern for the day.>\n\n"
-        f"**Temperatures**\n\n"
-        f"🌡️ High: ~<high°F> (<high°C>)\n\n"
-        f"🌡️ Low: ~<low°F> (<low°C>) overnight\n\n"
-        f"<Additional sentence about temperature feel and trends.>\n\n"
-        f"**Precipitation Timeline**\n\n"
-        f"☀️ **Morning (6 AM - 11 AM):**\n"
-        f"<Natural narrative with specific hours and percentages if precip occurs, or 'No precipitation expected.'>\n\n"
-        f"🌤️ **Afternoon (12 PM - 5 PM):**\n"
-        f"<Natural narrative with specific hours like '2 PM: 65% chance' if precip occurs, or 'Dry conditions.'>\n\n"
-        f"🌙 **Evening (6 PM - 11 PM):**\n"
-        f"<Natural narrative describing evening precip with specific hours and intensity changes, or 'Clear skies.'>\n\n"
-        f"🌃 **Night (12 AM - 5 AM):**\n"
-        f"<Natural narrative describing overnight precip with specific hours, or 'No precipitation overnight.'>\n\n"
-        f"**Winds & Conditions**\n\n"
-        f"<Complete sentences about overall conditions based on the data patterns.>\n\n"
-        f"[Repeat exact same format for Day 2]\n\n"
-        f"==================================================\n\n"
-        f"**📊 2-Day Summary**\n\n"
-        f"<DayName>: <One-sentence summary highlighting key weather impacts.>\n\n"
-        f"<DayName>: <One-sentence summary highlighting key weather impacts.>\n\n"
-        f"<Additional summary sentence about overall pattern or temperatures.>\n\n"
-        f"CRITICAL FORMATTING RULES:\n"
-        f"- Use double line breaks between sections\n"
-        f"- Write in complete, natural sentences (not bullet points)\n"
-        f"- Break precipitation into 4 time periods: Morning/Afternoon/Evening/Night with emojis\n"
-        f"- Call out specific hours with percentages: '7 AM: 45%', '2 PM: 65% chance'\n"
-        f"- Use weather terminology: 'accumulating snow', 'lingering showers', 'tapering off'\n"
-        f"- Include transitions: 'developing', 'becomes steadier', 'continuing into'\n"
-        f"- Add separator lines (==================================================) for visual organization"
-    )
+        def stream():
+            call.cache = 'miss'  # Only called when the cache has no overview
+            return stream_perplexity_overview(location, hourly_slice, perplexity_api_key, call=call)
 
-    def local_overview() -> str:
-        """Build a detailed, non-AI 2-day overview from hourly data (next 48 hours).
-        Includes likely precipitation hours per day and temperature ranges.
-        """
-        if not hourly_slice:
-            return "Local overview unavailable: missing hourly data."
-        city = location.get('city', 'Unknown')
-        region = location.get('region', '')
-        country = location.get('country', '')
-
-        window = hourly_slice[:48]
-        from datetime import datetime
-        # Group by day (local date derived from ISO timestamp; assumes provided times are local or UTC-consistent)
-        days = {}
-        for h in window:
-            ts = h.get('time')
-            try:
-                dt = datetime.fromisoformat(ts.replace('Z','+00:00'))
-                day_key = dt.strftime('%Y-%m-%d')
-                hour_label = dt.strftime('%-I %p')
-            except Exception:
-                # Fallback to raw string
-                day_key = (ts or '')[:10]
-                hour_label = ts
-            days.setdefault(day_key, []).append({
-                'temp_f': h.get('temp_f'),
-                'precip_prob': h.get('precip_prob') or 0,
-                'precip_mm': h.get('precip_mm') or 0.0,
-                'label': hour_label,
-            })
-
-        lines = []
-        lines.append(f"**Detailed 2-Day Weather Overview for {city}, {region}, {country}**\n")
-        
-        for i, (day, entries) in enumerate(sorted(days.items())):
-            # Parse day for better formatting
-            try:
-                day_dt = datetime.fromisoformat(day)
-                day_name = day_dt.strftime('%A')
-                full_date = day_dt.strftime('%B %d, %Y')
-                day_header = f"🌨️ {day_name} — {full_date}"
-            except Exception:
-                day_header = f"📅 {day}"
-            
-            lines.append(f"\n{day_header}")
-            lines.append("=" * 50)
-            
-            # Temperature analysis
-            temps = [e['temp_f'] for e in entries if e['temp_f'] is not None]
-            if temps:
-                tmin = int(round(min(temps)))
-                tmax = int(round(max(temps)))
-                tmin_c = int(round((tmin - 32) * 5/9))
-                tmax_c = int(round((tmax - 32) * 5/9))
-                
-                lines.append(f"\n🌡️ **Temperature Range:**")
-                lines.append(f"   • High: ~{tmax}°F ({tmax_c}°C)")
-                lines.append(f"   • Low: ~{tmin}°F ({tmin_c}°C)")
-                
-                # Temperature description
-                temp_range = tmax - tmin
-                if temp_range > 20:
-                    lines.append(f"   • Significant temperature variation of {temp_range}°F throughout the day")
-                else:
-                    lines.append(f"   • Relatively stable temperatures with {temp_range}°F variation")
-            else:
-                lines.append("\n🌡️ **Temperature Range:** Data unavailable")
-            
-            # Precipitation analysis
-            pmax = int(max([e['precip_prob'] for e in entries])) if entries else 0
-            total_mm = round(sum([e['precip_mm'] for e in entries]), 2)
-            total_inches = round(total_mm * 0.0393701, 2)
-            
-            lines.append(f"\n� **Precipitation:**")
-            lines.append(f"   • Maximum probability: {pmax}%")
-            lines.append(f"   • Total accumulation: ~{total_mm} mm ({total_inches} inches)")
-            
-            # Detailed hourly precipitation breakdown
-            precip_hours = [
-                (e['label'], int(e['precip_prob']), round(e['precip_mm'], 2))
-                for e in entries if (e['precip_prob'] >= 25 or e['precip_mm'] >= 0.5)
-            ]
-            
-            if precip_hours:
-                lines.append(f"\n⏰ **Precipitation Timeline:** (Times with ≥25% chance or ≥0.5mm)")
-                
-                # Group by time of day
-                morning = [(h, p, m) for h, p, m in precip_hours if 'AM' in h and not ('12 AM' in h)]
-                afternoon = [(h, p, m) for h, p, m in precip_hours if ('12 PM' in h or ('PM' in h and int(h.split()[0]) <= 5))]
-                evening = [(h, p, m) for h, p, m in precip_hours if 'PM' in h and int(h.split()[0]) > 5]
-                night = [(h, p, m) for h, p, m in precip_hours if '12 AM' in h or ('AM' in h and int(h.split()[0]) >= 11)]
-                
-                if morning:
-                    lines.append(f"\n   ☀️ **Morning (6 AM - 11 AM):** {len(morning)} hour(s)")
-                    for h, p, m in morning:
-                        lines.append(f"      • {h}: {p}% probability, {m} mm expected")
-                
-                if afternoon:
-                    lines.append(f"\n   🌤️ **Afternoon (12 PM - 5 PM):** {len(afternoon)} hour(s)")
-                    for h, p, m in afternoon:
-                        lines.append(f"      • {h}: {p}% probability, {m} mm expected")
-                
-                if evening:
-                    lines.append(f"\n   🌙 **Evening (6 PM - 11 PM):** {len(evening)} hour(s)")
-                    for h, p, m in evening:
-                        lines.append(f"      • {h}: {p}% probability, {m} mm expected")
-                
-                if night:
-                    lines.append(f"\n   🌃 **Night (12 AM - 5 AM):** {len(night)} hour(s)")
-                    for h, p, m in night:
-                        lines.append(f"      • {h}: {p}% probability, {m} mm expected")
-                
-                # Summary
-                if pmax >= 70:
-                    lines.append(f"\n   📌 **Alert:** High precipitation probability. Plan for wet conditions.")
-                elif pmax >= 40:
-                    lines.append(f"\n   📌 **Note:** Moderate precipitation expected. Carry an umbrella.")
-                else:
-                    lines.append(f"\n   📌 **Note:** Low to moderate precipitation chance.")
+        key = overview_key(location, hourly_slice, PROMPT_VERSION, kind='perplexity')
+        started = False
+        try:
+            for chunk in get_overview_cache().stream_or_create(key, stream):
+                started = True
+                yield chunk
+            call.cache = call.cache or 'hit'
+        except Exception as e:
+            call.error = str(e)
+            if is_quota_error(e) and not started:
+                call.fallback = 'quota'
+                yield build_local_overview(location, hourly_slice)
             else:
-                lines.append(f"   • No significant precipitation expected")
-                lines.append(f"   📌 **Note:** Dry conditions expected throughout the day")
-            
-            lines.append("")  # Blank line between days
-        
-        # Overall summary
-        lines.append("\n" + "=" * 50)
-        lines.append("📊 **2-Day Summary:**")
-        all_temps = []
-        all_precip_prob = []
-        all_precip_mm = []
-        for day, entries in sorted(days.items()):
-            all_temps.extend([e['temp_f'] for e in entries if e['temp_f'] is not None])
-            all_precip_prob.extend([e['precip_prob'] for e in entries])
-            all_precip_mm.extend([e['precip_mm'] for e in entries])
-        
-        if all_temps:
-            overall_high = int(round(max(all_temps)))
-            overall_low = int(round(min(all_temps)))
-            lines.append(f"   • Overall temperature range: {overall_low}°F to {overall_high}°F")
-        
-        if all_precip_prob:
-            avg_precip_prob = int(sum(all_precip_prob) / len(all_precip_prob))
-            total_precip_mm = round(sum(all_precip_mm), 2)
-            total_precip_in = round(total_precip_mm * 0.0393701, 2)
-            lines.append(f"   • Average precipitation probability: {avg_precip_prob}%")
-            lines.append(f"   • Total 48-hour precipitation: {total_precip_mm} mm ({total_precip_in} inches)")
-        
-        return "\n".join(lines)
-
-    try:
-        # Use Perplexity AI with web search to generate narrative forecast from hourly data
-        headers = {
-            "Authorization": f"Bearer {perplexity_api_key}",
-            "Content-Type": "application/json"
-        }
-        
-        payload = {
-            "model": "sonar-pro",  # Perplexity's web-search enabled model
-            "messages": [
-                {"role": "system", "content": system_msg},
-                {"role": "user", "content": user_msg},
-            ],
-            "temperature": 0.3,
-            "max_tokens": 3500,
-        }
-        
-        response = requests.post(
-            "https://api.perplexity.ai/chat/completions",
-            headers=headers,
-            json=payload,
-            timeout=30
-        )
-        response.raise_for_status()
-        
-        result = response.json()
-        return result['choices'][0]['message']['content']
-    except Exception as e:
-        msg = str(e).lower()
-        if 'insufficient_quota' in msg or 'code: 429' in msg or 'status code: 429' in msg:
-            return local_overview()
-        return f"AI overview failed: {e}"
+                call.fallback = 'error'
+                yield f"\n\nAI overview failed: {e}"
 
 def display_radar(location):
     """Display animated weather radar using RainViewer and OpenStreetMap."""
     st.markdown("<p style='color: #aaa; font-size: 0.9em;'>Animated radar: 2 hours past + 30 min forecast</p>", unsafe_allow_html=True)
     
+    # Static radar component: only the location is sent on each rerun
+    radar_viewer(location, variant='animated', key='rainviewer_radar')
+    
+    st.markdown("""
+    <div style='text-align: center; margin-top: 10px; color: #888; font-size: 0.85em;'>
+        🔄 Radar updates every 5 minutes | 
+        <span style='color: #667eea;'>Blue/Green</span> = Light Rain | 
+        <span style='color: #e6b800;'>Yellow</span> = Moderate | 
+        <span style='color: #ff4444;'>Red</span> = Heavy
+    </div>
+    """, unsafe_allow_html=True)
+
+def display_visual_crossing_radar(location):
+    """Display animated radar using OpenWeatherMap precipitation layer."""
+    st.markdown("<p style='color: #aaa; font-size: 0.9em;'>Animated precipitation radar with current conditions</p>", unsafe_allow_html=True)
+    
+    # Same static radar component with the recent-frames variant
+    radar_viewer(location, variant='recent', key='precip_radar')
+    
+    st.markdown("""
+    <div style='text-align: center; margin-top: 10px; color: #888; font-size: 0.85em;'>
+        🔄 Animation shows last 4 hours of precipitation | 
+        <span style='color: #667eea;'>Blue</span> = Light | 
+        <span style='color: #00d4ff;'>Cyan</span> = Moderate | 
+        <span style='color: #ff4444;'>Red</span> = Heavy
+    </div>
+    """, unsafe_allow_html=True)
+
+def display_windy_radar(location):
+    """Display interactive weather radar using Windy.com embedded map."""
+    st.markdown("<p style='color: #aaa; font-size: 0.9em;'>Windy.com interactive weather map with multiple layers</p>", unsafe_allow_html=True)
+    
     lat = location['latitude']
     lon = location['longitude']
     
-    # Create radar map HTML with animation using RainViewer and Leaflet
-    radar_html = f"""
+    # Windy.com API key - load from environment variable
+    windy_api_key = os.environ.get('WINDY_API_KEY', '')
+    
+    if not windy_api_key:
+        st.warning("⚠️ Windy.com API key not configured. Windy map unavailable.")
+        return
+    
+    # Use Windy.com's embedded iframe (simplest and most reliable method)
+    windy_html = f"""
     <!DOCTYPE html>
     <html>
     <head>
-        <link rel="stylesheet" href="https://unpkg.com/leaflet@1.9.4/dist/leaflet.css" />
-        <script src="https://unpkg.com/leaflet@1.9.4/dist/leaflet.js"></script>
         <style>
             body {{ margin: 0; padding: 0; background: #1e1e2d; }}
-            #map {{ 
-                height: 500px; 
+            #windy-container {{ 
+                height: 520px; 
                 width: 100%; 
                 border-radius: 15px;
+                overflow: hidden;
                 border: 2px solid rgba(100, 100, 150, 0.3);
             }}
-            .leaflet-container {{
-                background: #0f0c29;
-            }}
-            .leaflet-layer {{
-                transition: opacity 0.3s ease-in-out;
-            }}
-            .radar-controls {{
-                position: absolute;
-                top: 10px;
-                right: 10px;
-                z-index: 1000;
-                background: rgba(30, 30, 45, 0.95);
-                padding: 12px;
-                border-radius: 10px;
-                color: white;
-                font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
-                min-width: 180px;
-            }}
-            .radar-controls button {{
-                background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-                color: white;
-                border: none;
-                padding: 8px 15px;
-                border-radius: 5px;
-                cursor: pointer;
-                margin: 2px;
-                font-size: 12px;
+            iframe {{
                 width: 100%;
-            }}
-            .radar-controls button:hover {{
-                background: linear-gradient(135deg, #764ba2 0%, #667eea 100%);
-            }}
-            .radar-controls button:disabled {{
-                background: #555;
-                cursor: not-allowed;
-                opacity: 0.5;
-            }}
-            .timestamp {{
-                font-size: 11px;
-                color: #aaa;
-                margin-top: 8px;
-                text-align: center;
-            }}
-            .control-group {{
-                margin: 5px 0;
-            }}
-            .play-btn {{
-                background: linear-gradient(135deg, #00d4ff 0%, #0099cc 100%) !important;
-            }}
-            .play-btn:hover {{
-                background: linear-gradient(135deg, #0099cc 0%, #00d4ff 100%) !important;
-            }}
-        </style>
-    </head>
-    <body>
-        <div class="radar-controls">
-            <div style="margin-bottom: 8px;"><strong>🌧️ Radar Animation</strong></div>
-            <div class="control-group">
-                <button id="playBtn" class="play-btn" onclick="toggleAnimation()">▶️ Play</button>
-            </div>
-            <div class="control-group">
-                <button onclick="map.setView([{lat}, {lon}], map.getZoom())">📍 Center</button>
-            </div>
-            <div class="control-group">
-                <button onclick="toggleRadarVisibility()">👁️ Toggle Radar</button>
-            </div>
-            <div class="timestamp" id="timestamp">Loading frames...</div>
-        </div>
-        <div id="map"></div>
-        <script>
-            // Clean up any existing map instance
-            if (window.radarMap) {{
-                window.radarMap.remove();
-                window.radarMap = null;
-            }}
-            
-            // Clear any existing animation intervals
-            if (window.radarAnimationInterval) {{
-                clearInterval(window.radarAnimationInterval);
-                window.radarAnimationInterval = null;
-            }}
-            
-            // Initialize map with reasonable zoom limits
-            const map = L.map('map', {{
-                maxZoom: 15,  // Good balance between detail and radar quality
-                zoomControl: true
-            }}).setView([{lat}, {lon}], 8);
-            window.radarMap = map;  // Store globally for cleanup
-            
-            // Add dark tile layer
-            L.tileLayer('https://{{s}}.basemaps.cartocdn.com/dark_all/{{z}}/{{x}}/{{y}}{{r}}.png', {{
-                attribution: '&copy; <a href="https://www.openstreetmap.org/copyright">OpenStreetMap</a> contributors &copy; <a href="https://carto.com/attributions">CARTO</a>',
-                maxZoom: 19  // Base map supports higher zoom
-            }}).addTo(map);
-            
-            // Add zoom level indicator
-            map.on('zoomend', function() {{
-                const zoom = map.getZoom();
-                const timestamp = document.getElementById('timestamp');
-                if (zoom > 13 && radarVisible && radarFrames.length > 0) {{
-                    // At zoom 14-15, tiles are scaled up
-                    updateTimestamp();
-                    const currentText = timestamp.textContent;
-                    if (!currentText.includes('⚠️')) {{
-                        timestamp.textContent = currentText + ' ⚠️ Scaled';
-                    }}
-                }} else if (radarFrames.length > 0 && !timestamp.textContent.includes('⚠️')) {{
-                    updateTimestamp();
-                }}
-            }});
-            
-            // Add location marker
-            const marker = L.marker([{lat}, {lon}]).addTo(map);
-            marker.bindPopup('<b>{location['city']}</b><br>{location['region']}, {location['country']}').openPopup();
-            
-            // Animation variables
-            let radarFrames = [];
-            let radarLayers = [];
-            let animationInterval = null;
-            let currentFrameIndex = 0;
-            let isPlaying = false;
-            let radarVisible = true;
-            let framesLoaded = 0;
-            let pastFramesCount = 0;  // Track where past ends and future begins
-            
-            // Load all radar frames with preloading for smooth animation
-            function loadRadarFrames() {{
-                fetch('https://api.rainviewer.com/public/weather-maps.json')
-                    .then(response => response.json())
-                    .then(data => {{
-                        if (data.radar) {{
-                            // Combine past and future (nowcast) frames
-                            let allFrames = [];
-                            
-                            // Add past frames (2 hours)
-                            if (data.radar.past && data.radar.past.length > 0) {{
-                                allFrames = allFrames.concat(data.radar.past);
-                            }}
-                            
-                            // Add nowcast frames (30 min future) if available
-                            if (data.radar.nowcast && data.radar.nowcast.length > 0) {{
-                                allFrames = allFrames.concat(data.radar.nowcast);
-                            }}
-                            
-                            if (allFrames.length === 0) return;
-                            
-                            radarFrames = allFrames;
-                            framesLoaded = 0;
-                            
-                            pastFramesCount = data.radar.past ? data.radar.past.length : 0;
-                            
-                            // Create and preload layers for all frames
-                            radarFrames.forEach((frame, index) => {{
-                                // Color scheme 4 = The Weather Channel style
-                                // RainViewer tiles work best up to zoom level 12-13
-                                const radarUrl = `https://tilecache.rainviewer.com${{frame.path}}/256/{{z}}/{{x}}/{{y}}/4/1_1.png`;
-                                
-                                const layer = L.tileLayer(radarUrl, {{
-                                    opacity: 0,
-                                    zIndex: 10 + index,
-                                    className: 'radar-layer',
-                                    maxZoom: 15,  // Map can zoom to level 15
-                                    maxNativeZoom: 13,  // Radar tiles exist up to level 13
-                                    minZoom: 0,
-                                    tileSize: 256,
-                                    keepBuffer: 4,  // Keep more tiles in memory for smoother display
-                                    updateWhenIdle: true,  // Wait for idle to prevent constant reloading
-                                    updateWhenZooming: true,
-                                    updateInterval: 200
-                                }});
-                                
-                                // Add to map immediately but invisible (for preloading)
-                                layer.addTo(map);
-                                
-                                // Listen for tile loading
-                                layer.on('load', function() {{
-                                    framesLoaded++;
-                                    if (framesLoaded === radarFrames.length) {{
-                                        const hasNowcast = data.radar.nowcast && data.radar.nowcast.length > 0;
-                                        const msg = hasNowcast ? 
-                                            `Ready - ${{pastFramesCount}} past + ${{radarFrames.length - pastFramesCount}} future` :
-                                            `Ready - ${{radarFrames.length}} frames loaded`;
-                                        document.getElementById('timestamp').textContent = msg;
-                                        // Show last past frame (present moment) once all loaded
-                                        showFrame(pastFramesCount - 1);
-                                    }} else {{
-                                        document.getElementById('timestamp').textContent = 
-                                            `Loading... ${{framesLoaded}}/${{radarFrames.length}}`;
-                                    }}
-                                }});
-                                
-                                radarLayers.push(layer);
-                            }});
-                            
-                            currentFrameIndex = pastFramesCount - 1;  // Start at current time
-                        }}
-                    }})
-                    .catch(error => {{
-                        console.error('Error loading radar:', error);
-                        document.getElementById('timestamp').textContent = 'Radar unavailable';
-                    }});
-            }}
-            
-            function updateTimestamp() {{
-                if (radarFrames.length > 0) {{
-                    const frame = radarFrames[currentFrameIndex];
-                    const date = new Date(frame.time * 1000);
-                    const timeStr = date.toLocaleTimeString();
-                    
-                    // Determine if frame is past or future
-                    const label = currentFrameIndex < pastFramesCount ? '📊 PAST' : '🔮 FUTURE';
-                    const now = currentFrameIndex === pastFramesCount - 1 ? ' (NOW)' : '';
-                    
-                    document.getElementById('timestamp').textContent = 
-                        `${{label}}${{now}} - ${{timeStr}}`;
-                }}
-            }}
-            
-            function showFrame(index) {{
-                // Smoothly fade out current frame
-                if (radarLayers[currentFrameIndex]) {{
-                    radarLayers[currentFrameIndex].setOpacity(0);
-                }}
-                
-                // Update index
-                currentFrameIndex = index;
-                
-                // Smoothly fade in new frame
-                if (radarVisible && radarLayers[currentFrameIndex]) {{
-                    radarLayers[currentFrameIndex].setOpacity(0.7);
-                }}
-                
-                updateTimestamp();
-            }}
-            
-            function toggleAnimation() {{
-                const playBtn = document.getElementById('playBtn');
-                
-                if (isPlaying) {{
-                    // Stop animation
-                    clearInterval(animationInterval);
-                    window.radarAnimationInterval = null;
-                    isPlaying = false;
-                    playBtn.textContent = '▶️ Play';
-                }} else {{
-                    // Start animation
-                    isPlaying = true;
-                    playBtn.textContent = '⏸️ Pause';
-                    
-                    animationInterval = setInterval(() => {{
-                        let nextFrame = currentFrameIndex + 1;
-                        if (nextFrame >= radarFrames.length) {{
-                            nextFrame = 0;  // Loop back to start
-                        }}
-                        showFrame(nextFrame);
-                    }}, 500);  // 500ms per frame (2 frames/second)
-                    window.radarAnimationInterval = animationInterval;  // Store globally for cleanup
-                }}
-            }}
-            
-            function toggleRadarVisibility() {{
-                radarVisible = !radarVisible;
-                
-                if (radarVisible) {{
-                    // Fade in current frame
-                    if (radarLayers[currentFrameIndex]) {{
-                        radarLayers[currentFrameIndex].setOpacity(0.7);
-                    }}
-                }} else {{
-                    // Fade out all frames
-                    radarLayers.forEach(layer => {{
-                        layer.setOpacity(0);
-                    }});
-                }}
-            }}
-            
-            // Load radar on startup
-            loadRadarFrames();
-            
-            // Refresh radar data every 5 minutes
-            setInterval(function() {{
-                // Stop animation if playing
-                if (isPlaying) {{
-                    toggleAnimation();
-                }}
-                
-                // Clear existing layers
-                radarLayers.forEach(layer => map.removeLayer(layer));
-                radarLayers = [];
-                radarFrames = [];
-                currentFrameIndex = 0;
-                
-                // Reload
-                loadRadarFrames();
-            }}, 300000);
-        </script>
-    </body>
-    </html>
-    """
-    
-    # Display the radar map
-    components.html(radar_html, height=520)
-    
-    st.markdown("""
-    <div style='text-align: center; margin-top: 10px; color: #888; font-size: 0.85em;'>
-        🔄 Radar updates every 5 minutes | 
-        <span style='color: #667eea;'>Blue/Green</span> = Light Rain | 
-        <span style='color: #e6b800;'>Yellow</span> = Moderate | 
-        <span style='color: #ff4444;'>Red</span> = Heavy
-    </div>
-    """, unsafe_allow_html=True)
-
-def display_visual_crossing_radar(location):
-    """Display animated radar using OpenWeatherMap precipitation layer."""
-    st.markdown("<p style='color: #aaa; font-size: 0.9em;'>Animated precipitation radar with current conditions</p>", unsafe_allow_html=True)
-    
-    lat = location['latitude']
-    lon = location['longitude']
-    
-    # Create animated radar HTML
-    vc_radar_html = f"""
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <link rel="stylesheet" href="https://unpkg.com/leaflet@1.9.4/dist/leaflet.css" />
-        <script src="https://unpkg.com/leaflet@1.9.4/dist/leaflet.js"></script>
-        <style>
-            body {{ margin: 0; padding: 0; background: #1e1e2d; }}
-            #vcmap {{ 
-                height: 500px; 
-                width: 100%; 
-                border-radius: 15px;
-                border: 2px solid rgba(100, 100, 150, 0.3);
-            }}
-            .leaflet-container {{
-                background: #0f0c29;
-            }}
-            .vc-controls {{
-                position: absolute;
-                top: 10px;
-                right: 10px;
-                z-index: 1000;
-                background: rgba(30, 30, 45, 0.95);
-                padding: 12px;
-                border-radius: 10px;
-                color: white;
-                font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
-                min-width: 180px;
-            }}
-            .vc-controls button {{
-                background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-                color: white;
-                border: none;
-                padding: 8px 15px;
-                border-radius: 5px;
-                cursor: pointer;
-                margin: 2px;
-                font-size: 12px;
-                width: 100%;
-            }}
-            .vc-controls button:hover {{
-                background: linear-gradient(135deg, #764ba2 0%, #667eea 100%);
-            }}
-            .play-btn {{
-                background: linear-gradient(135deg, #00d4ff 0%, #0099cc 100%) !important;
-            }}
-            .play-btn:hover {{
-                background: linear-gradient(135deg, #0099cc 0%, #00d4ff 100%) !important;
-            }}
-            .control-group {{
-                margin: 5px 0;
-            }}
-            .timestamp {{
-                font-size: 11px;
-                color: #aaa;
-                margin-top: 8px;
-                text-align: center;
-            }}
-        </style>
-    </head>
-    <body>
-        <div class="vc-controls">
-            <div style="margin-bottom: 8px;"><strong>�️ Precipitation Radar</strong></div>
-            <div class="control-group">
-                <button id="playBtn" class="play-btn" onclick="toggleAnimation()">▶️ Play</button>
-            </div>
-            <div class="control-group">
-                <button onclick="vcmap.setView([{lat}, {lon}], vcmap.getZoom())">� Center</button>
-            </div>
-            <div class="control-group">
-                <button onclick="toggleRadar()">�️ Toggle Radar</button>
-            </div>
-            <div class="timestamp" id="timestamp">Loading...</div>
-        </div>
-        <div id="vcmap"></div>
-        <script>
-            // Initialize map
-            const vcmap = L.map('vcmap', {{
-                maxZoom: 15,  // Good balance between detail and radar quality
-                zoomControl: true
-            }}).setView([{lat}, {lon}], 8);
-            
-            // Add dark tile layer
-            L.tileLayer('https://{{s}}.basemaps.cartocdn.com/dark_all/{{z}}/{{x}}/{{y}}{{r}}.png', {{
-                attribution: '&copy; OpenStreetMap contributors',
-                maxZoom: 19
-            }}).addTo(vcmap);
-            
-            // Add location marker
-            const vcmarker = L.marker([{lat}, {lon}]).addTo(vcmap);
-            vcmarker.bindPopup('<b>{location['city']}</b><br>{location['region']}, {location['country']}').openPopup();
-            
-            // Add zoom level indicator
-            vcmap.on('zoomend', function() {{
-                const zoom = vcmap.getZoom();
-                const timestamp = document.getElementById('timestamp');
-                if (zoom > 13 && radarVisible && radarFrames.length > 0 && !timestamp.textContent.includes('Loading')) {{
-                    const currentText = timestamp.textContent;
-                    if (!currentText.includes('⚠️')) {{
-                        timestamp.textContent = currentText + ' ⚠️ Scaled';
-                    }}
-                }}
-            }});
-            
-            // Animation variables
-            let precipLayers = [];
-            let radarFrames = [];
-            let animationInterval = null;
-            let currentFrame = 0;
-            let isPlaying = false;
-            let radarVisible = true;
-            
-            // Load precipitation frames from RainViewer
-            function loadPrecipFrames() {{
-                document.getElementById('timestamp').textContent = 'Loading frames...';
-                
-                fetch('https://api.rainviewer.com/public/weather-maps.json')
-                    .then(response => response.json())
-                    .then(data => {{
-                        if (data.radar && data.radar.past) {{
-                            // Clear existing layers
-                            precipLayers.forEach(layer => vcmap.removeLayer(layer));
-                            precipLayers = [];
-                            radarFrames = [];
-                            
-                            // Use only last 4 frames for faster loading and better performance
-                            const pastFrames = data.radar.past || [];
-                            radarFrames = pastFrames.slice(-4);
-                            
-                            if (radarFrames.length === 0) {{
-                                document.getElementById('timestamp').textContent = 'No radar data available';
-                                return;
-                            }}
-                            
-                            let loadedCount = 0;
-                            const totalFrames = radarFrames.length;
-                            
-                            // Create layers for each frame with preloading
-                            radarFrames.forEach((frame, index) => {{
-                                // Color scheme 6 = NEXRAD style (different from main radar)
-                                const radarUrl = `https://tilecache.rainviewer.com${{frame.path}}/256/{{z}}/{{x}}/{{y}}/6/1_1.png`;
-                                
-                                const layer = L.tileLayer(radarUrl, {{
-                                    opacity: 0,
-                                    zIndex: 10 + index,
-                                    maxZoom: 15,  // Map can zoom to level 15
-                                    maxNativeZoom: 13,  // Radar tiles exist up to level 13
-                                    tileSize: 256,
-                                    keepBuffer: 4,  // Keep more tiles in memory
-                                    updateWhenIdle: true,  // Wait for idle
-                                    updateWhenZooming: true,
-                                    updateInterval: 200
-                                }});
-                                
-                                // Add to map first
-                                layer.addTo(vcmap);
-                                precipLayers.push(layer);
-                                
-                                // Track tile loading
-                                layer.on('load', function() {{
-                                    loadedCount++;
-                                    if (loadedCount === totalFrames) {{
-                                        document.getElementById('timestamp').textContent = `Ready - ${{totalFrames}} frames`;
-                                        // Show most recent frame once loaded
-                                        currentFrame = totalFrames - 1;
-                                        showFrame(currentFrame);
-                                    }} else {{
-                                        document.getElementById('timestamp').textContent = `Loading... ${{loadedCount}}/${{totalFrames}}`;
-                                    }}
-                                }});
-                                
-                                // Handle tile errors
-                                layer.on('tileerror', function(error) {{
-                                    console.warn('Tile load error:', error);
-                                }});
-                            }});
-                            
-                            // Show most recent frame immediately (will update when loaded)
-                            currentFrame = radarFrames.length - 1;
-                            showFrame(currentFrame);
-                        }} else {{
-                            document.getElementById('timestamp').textContent = 'Radar unavailable';
-                        }}
-                    }})
-                    .catch(error => {{
-                        console.error('Error loading radar:', error);
-                        document.getElementById('timestamp').textContent = 'Error loading radar';
-                    }});
-            }}
-            
-            function showFrame(index) {{
-                // Hide all frames
-                precipLayers.forEach(layer => {{
-                    layer.setOpacity(0);
-                }});
-                
-                // Show selected frame
-                if (radarVisible && precipLayers[index]) {{
-                    precipLayers[index].setOpacity(0.7);
-                    // Force redraw to ensure tiles appear at all zoom levels
-                    precipLayers[index].redraw();
-                }}
-                
-                currentFrame = index;
-                
-                // Update timestamp
-                if (radarFrames.length > 0 && radarFrames[index]) {{
-                    const frame = radarFrames[index];
-                    const date = new Date(frame.time * 1000);
-                    const now = Date.now();
-                    const minutesAgo = Math.round((now - date.getTime()) / 60000);
-                    
-                    if (minutesAgo < 5) {{
-                        document.getElementById('timestamp').textContent = 'Current';
-                    }} else {{
-                        document.getElementById('timestamp').textContent = `${{minutesAgo}} min ago`;
-                    }}
-                }}
-            }}
-            
-            function toggleAnimation() {{
-                const playBtn = document.getElementById('playBtn');
-                
-                if (isPlaying) {{
-                    clearInterval(animationInterval);
-                    isPlaying = false;
-                    playBtn.textContent = '▶️ Play';
-                }} else {{
-                    isPlaying = true;
-                    playBtn.textContent = '⏸️ Pause';
-                    
-                    animationInterval = setInterval(() => {{
-                        let nextFrame = currentFrame + 1;
-                        if (nextFrame >= precipLayers.length) {{
-                            nextFrame = 0;
-                        }}
-                        showFrame(nextFrame);
-                    }}, 500); // 500ms per frame
-                }}
-            }}
-            
-            function toggleRadar() {{
-                radarVisible = !radarVisible;
-                if (radarVisible) {{
-                    precipLayers[currentFrame].setOpacity(0.7);
-                }} else {{
-                    precipLayers.forEach(layer => layer.setOpacity(0));
-                }}
-            }}
-            
-            // Load radar on startup
-            loadPrecipFrames();
-            
-            // Refresh every 5 minutes
-            setInterval(() => {{
-                if (isPlaying) {{
-                    toggleAnimation();
-                }}
-                loadPrecipFrames();
-            }}, 300000);
-        </script>
-    </body>
-    </html>
-    """
-    
-    # Display the map
-    components.html(vc_radar_html, height=520)
-    
-    st.markdown("""
-    <div style='text-align: center; margin-top: 10px; color: #888; font-size: 0.85em;'>
-        🔄 Animation shows last 4 hours of precipitation | 
-        <span style='color: #667eea;'>Blue</span> = Light | 
-        <span style='color: #00d4ff;'>Cyan</span> = Moderate | 
-        <span style='color: #ff4444;'>Red</span> = Heavy
-    </div>
-    """, unsafe_allow_html=True)
-
-def display_windy_radar(location):
-    """Display interactive weather radar using Windy.com embedded map."""
-    st.markdown("<p style='color: #aaa; font-size: 0.9em;'>Windy.com interactive weather map with multiple layers</p>", unsafe_allow_html=True)
-    
-    lat = location['latitude']
-    lon = location['longitude']
-    
-    # Windy.com API key - load from environment variable
-    windy_api_key = os.environ.get('WINDY_API_KEY', '')
-    
-    if not windy_api_key:
-        st.warning("⚠️ Windy.com API key not configured. Windy map unavailable.")
-        return
-    
-    # Use Windy.com's embedded iframe (simplest and most reliable method)
-    windy_html = f"""
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <style>
-            body {{ margin: 0; padding: 0; background: #1e1e2d; }}
-            #windy-container {{ 
-                height: 520px; 
-                width: 100%; 
-                border-radius: 15px;
-                overflow: hidden;
-                border: 2px solid rgba(100, 100, 150, 0.3);
-            }}
-            iframe {{
-                width: 100%;
-                height: 100%;
-                border: none;
+                height: 100%;
+                border: none;
             }}
         </style>
     </head>
@@ -2119,79 +1259,253 @@ def display_weather_alerts(alerts):
             - **Issued By:** {alert['sender_name']}
             """)
 
-def display_weather(location, weather_data, model_key='default'):
-    """Display weather information.
+def display_ensemble(location, bands):
+    """Display ensemble temperature bands and precipitation exceedance probabilities."""
+    times = bands.get('time', [])
+    if not times:
+        st.error("Ensemble data unavailable")
+        return
     
-    Args:
-        location: Location dictionary
-        weather_data: Weather data from API
-        model_key: Unique key for this model instance (prevents widget ID conflicts in tabs)
+    # Start at the current hour in the location's timezone
+    now_local = (datetime.now(timezone.utc) + timedelta(seconds=bands.get('utc_offset_seconds', 0))).strftime('%Y-%m-%dT%H:00')
+    start_idx = next((i for i, t in enumerate(times) if t >= now_local), 0)
+    end_idx = min(len(times), start_idx + 72)
+    
+    st.markdown(f"<p style='color: #aaa; font-size: 0.9em;'>{bands.get('members', 0)} members from {', '.join(bands.get('models', []))}. "
+                f"Shaded range: 10th-90th percentile, line: median.</p>", unsafe_allow_html=True)
+    
+    temperature = bands['temperature_2m']
+    unit = st.session_state.unit_temp
+    chart = {'time': [datetime.fromisoformat(t) for t in times[start_idx:end_idx]]}
+    for band in ('p10', 'p50', 'p90'):
+        values = temperature[band]
+        if unit == 'C':
+            values = fahrenheit_to_celsius(values)
+        chart[f"{band} (°{unit})"] = [round(v, 1) if not is_missing(v) else None for v in list(values)[start_idx:end_idx]]
+    
+    st.markdown("#### 🌡️ Temperature Spread")
+    st.line_chart(chart, x='time', y=[f"{b} (°{unit})" for b in ('p10', 'p50', 'p90')])
+    
+    st.markdown("#### 💧 Chance of Precipitation (share of members)")
+    exceedance = bands['exceedance']
+    precip_chart = {'time': chart['time']}
+    for threshold, label in (('0.1', '≥ 0.1 mm'), ('1', '≥ 1 mm'), ('5', '≥ 5 mm')):
+        precip_chart[label] = exceedance.get(threshold, [])[start_idx:end_idx]
+    st.line_chart(precip_chart, x='time', y=['≥ 0.1 mm', '≥ 1 mm', '≥ 5 mm'])
+    
+    # Headline numbers for the next 24 hours
+    next_day = slice(start_idx, min(end_idx, start_idx + 24))
+    wet_chance = max(exceedance.get('0.1', [0])[next_day] or [0])
+    heavy_chance = max(exceedance.get('5', [0])[next_day] or [0])
+    st.markdown(f"""
+    <div class='detail-card'>
+        <div style='font-size: 12px; opacity: 0.9; margin-bottom: 3px;'>Next 24 hours</div>
+        <div style='font-size: 18px; font-weight: bold;'>💧 {wet_chance:.0f}% chance of any precipitation · ⛈️ {heavy_chance:.0f}% chance of ≥ 5 mm in an hour</div>
+    </div>
+    """, unsafe_allow_html=True)
+
+def build_consensus(model_data):
+    """Consensus across already-fetched model datasets ({model name: weather data})."""
+    return compute_consensus(align_models(model_data))
+
+def consensus_start_time(weather_data):
+    """Current hour in the location's timezone as "YYYY-MM-DDTHH:00"."""
+    offset = (weather_data or {}).get('utc_offset_seconds', 0) or 0
+    return (datetime.now(timezone.utc) + timedelta(seconds=offset)).strftime('%Y-%m-%dT%H:00')
+
+def format_consensus_time(time_str):
+    """'Mon 3 PM' style label for a local ISO time."""
+    dt = datetime.fromisoformat(time_str)
+    return dt.strftime('%a ') + dt.strftime('%I %p').lstrip('0')
+
+def display_consensus_banner(consensus, start_time):
+    """One-line banner: do the models agree over the next 24 hours?"""
+    if len(consensus['models']) < 2:
+        return
+    summary = consensus_summary(consensus, start_time, hours=24)
+    spread = summary['max_temp_spread']
+    if spread is None:
+        return
+    spread_str = f"{spread:.0f}°F" if st.session_state.unit_temp == 'F' else f"{spread * 5 / 9:.0f}°C"
+
+    if summary['disagree_hours']:
+        first = format_consensus_time(summary['first_disagreement'])
+        reasons = ', '.join(summary['first_reasons'])
+        icon, color = '⚖️', 'rgba(255, 167, 38, 0.15)'
+        text = (f"Models disagree for {summary['disagree_hours']} of the next {summary['hours']} hours "
+                f"(from {first}: {reasons}) · max temperature spread {spread_str}")
+    else:
+        icon, color = '🤝', 'rgba(102, 187, 106, 0.15)'
+        text = f"{len(summary['models'])} models agree for the next {summary['hours']} hours · max temperature spread {spread_str}"
+
+    st.markdown(f"""
+    <div style='background: {color}; padding: 10px 15px; border-radius: 10px;
+                border: 1px solid rgba(255,255,255,0.1); margin-bottom: 15px; font-size: 14px;'>
+        {icon} {text}
+    </div>
+    """, unsafe_allow_html=True)
+
+def display_consensus(location, consensus, start_time):
+    """Display the cross-model mean, spread and the hours where models disagree."""
+    times = consensus['time']
+    if len(consensus['models']) < 2 or not times:
+        st.error("Need at least two models to compare")
+        return
+
+    start_idx = next((i for i, t in enumerate(times) if t >= start_time), 0)
+    end_idx = min(len(times), start_idx + 72)
+
+    st.markdown(f"<p style='color: #aaa; font-size: 0.9em;'>Aligned hourly forecasts from {', '.join(consensus['models'])}. "
+                f"Shaded range: lowest to highest model, line: mean.</p>", unsafe_allow_html=True)
+
+    unit = st.session_state.unit_temp
+    temperature = consensus['temperature_2m']
+    chart = {'time': [datetime.fromisoformat(t) for t in times[start_idx:end_idx]]}
+    for key, label in (('min', 'lowest'), ('mean', 'mean'), ('max', 'highest')):
+        values = temperature[key]
+        if unit == 'C':
+            values = fahrenheit_to_celsius(values)
+        chart[f"{label} (°{unit})"] = [round(v, 1) if not is_missing(v) else None for v in list(values)[start_idx:end_idx]]
+
+    st.markdown("#### 🌡️ Temperature Across Models")
+    st.line_chart(chart, x='time', y=[f"{label} (°{unit})" for label in ('lowest', 'mean', 'highest')])
+
+    st.markdown("#### 💧 Precipitation Chance Spread")
+    probability = consensus['precipitation_probability']
+    st.line_chart({
+        'time': chart['time'],
+        'mean (%)': [None if is_missing(v) else round(v) for v in probability['mean'][start_idx:end_idx]],
+        'spread (%)': [None if is_missing(v) else round(v) for v in probability['spread'][start_idx:end_idx]],
+    }, x='time', y=['mean (%)', 'spread (%)'])
+
+    disagreements = [i for i in range(start_idx, end_idx) if consensus['disagree'][i]]
+    st.markdown("#### ⚖️ Disagreement Hours")
+    if not disagreements:
+        st.info("The models agree for the whole forecast.")
+        return
+    rows = []
+    for i in disagreements:
+        spread = temperature['spread'][i]
+        rows.append({
+            'Time': format_consensus_time(times[i]),
+            'Models': temperature['count'][i],
+            f'Temp spread (°{unit})': round(spread if unit == 'F' else spread * 5 / 9, 1),
+            'Precip chance spread (%)': None if is_missing(probability['spread'][i]) else round(probability['spread'][i]),
+            'Why': ', '.join(consensus['reasons'][i]),
+        })
+    st.dataframe(rows, use_container_width=True, hide_index=True)
+
+HOURLY_STRIP_HOURS = 72
+
+def weather_fingerprint(weather_data):
+    """Stable hash of a dataset's contents, memoized on the dataset itself.
+
+    fetch_weather() computes it inside the cache, so for fetched forecasts this is a dict lookup.
     """
-    current = weather_data.get('current', {})
-    temperature = current.get('temperature_2m')
-    humidity = current.get('relative_humidity_2m')
-    wind_speed = current.get('wind_speed_10m')
-    weather_code = current.get('weather_code')
-    current_time = current.get('time')  # Get current time from API
-    conditions = get_weather_description(weather_code)
-    emoji = get_weather_emoji(conditions, current_time)  # Pass time for night/day detection
-    
-    # Location header
-    st.markdown(f"<h1 style='text-align: center; color: #e0e0e0; margin-bottom: 5px; margin-top: 0px;'>{location['city']}</h1>", unsafe_allow_html=True)
-    st.markdown(f"<p style='text-align: center; color: #aaa; margin-top: 0px; margin-bottom: 10px;'>{location['region']}, {location['country']}</p>", unsafe_allow_html=True)
-    
-    # Weather Alerts (NWS for US locations)
-    # Check for US location using multiple possible country name formats
-    country = location.get('country', '').lower()
-    is_us_location = any(us_name in country for us_name in ['united states', 'usa', 'us'])
-    
-    if is_us_location or country == 'united states':
-        alerts = get_weather_alerts(location['latitude'], location['longitude'])
-        if alerts:
-            st.markdown("<br>", unsafe_allow_html=True)
-            display_weather_alerts(alerts)
-            st.markdown("<br>", unsafe_allow_html=True)
-    
-    # Weather icon
-    st.markdown(f"<div class='weather-icon'>{emoji}</div>", unsafe_allow_html=True)
-    
-    # Temperature display
-    if st.session_state.unit_temp == 'F':
-        temp_display = f"{temperature:.1f}°F"
+    fingerprint = weather_data.get('_fingerprint')
+    if fingerprint is None:
+        content = {k: v for k, v in weather_data.items() if not k.startswith('_')}
+        fingerprint = hashlib.blake2b(
+            json.dumps(content, sort_keys=True, default=str).encode('utf-8'), digest_size=16
+        ).hexdigest()
+        weather_data['_fingerprint'] = fingerprint
+    return fingerprint
+
+@st.cache_resource(show_spinner=False, max_entries=64)
+def dataset_unit_series(fingerprint, _weather_data):
+    """UnitSeries for a dataset, shared across reruns by fingerprint (cache_data copies would lose the memo)."""
+    return UnitSeries(_weather_data.get('hourly'))
+
+@st.cache_data(show_spinner=False, max_entries=256)
+def hourly_strip_payload(fingerprint, unit_temp, start_idx, latitude, longitude, _weather_data):
+    """Cached hourly strip arrays for a dataset (keyed by its fingerprint, not hashed itself)."""
+    hourly = _weather_data['hourly']
+    end_idx = start_idx + HOURLY_STRIP_HOURS
+    times = hourly.get('time', [])[start_idx:end_idx]
+    codes = (hourly.get('weather_code') or [])[start_idx:end_idx]
+    probs = (hourly.get('precipitation_probability') or [])[start_idx:end_idx]
+
+    # Whole-series unit conversions, converted once per dataset and unit
+    series = dataset_unit_series(fingerprint, _weather_data)
+    temps = series.temperature(unit_temp)[start_idx:end_idx]
+    amounts_in = series.precipitation('in')[start_idx:end_idx]
+
+    # Time-aware (night/day) emojis for the whole window in one pass,
+    # with night defined by the computed sunrise/sunset for each date
+    flags = night_flags(times, _weather_data, latitude, longitude)
+    _, emojis = classify_series(codes, night_flags=flags)
+    return pack_hourly_strip(times, temps, emojis, probs, amounts_in)
+
+def toggle_temp_unit():
+    st.session_state.unit_temp = 'C' if st.session_state.unit_temp == 'F' else 'F'
+
+def toggle_wind_unit():
+    st.session_state.unit_wind = 'kmh' if st.session_state.unit_wind == 'mph' else 'mph'
+
+def refresh_weather_data():
+    """Drop cached forecasts and alerts so the next run fetches fresh data."""
+    fetch_weather.clear()
+    fetch_visual_crossing_timeline.clear()
+    get_weather_alerts.clear()
+    if st.session_state.get('weather_data'):
+        location, _ = st.session_state.weather_data
+        st.session_state.weather_data = (location, get_weather(location['latitude'], location['longitude']))
+
+OVERVIEW_BOX = ("<div style='background: rgba(255,255,255,0.05); padding: 15px; border-radius: 10px; "
+                "border: 1px solid rgba(255,255,255,0.1); color:#e0e0e0;'>{}</div>").format
+
+OVERVIEW_POLL_SECONDS = 0.5  # How often the panel checks a running AI overview job
+
+@st.cache_resource(show_spinner=False)
+def get_overview_jobs():
+    """Background queue for AI overview generation, shared by every session."""
+    return OverviewJobQueue()
+
+def start_ai_overview(location, hourly_slice, model_key):
+    """Queue an AI overview for a panel; the job (None if the queue is full) is kept in the session."""
+    key = overview_key(location, hourly_slice, PROMPT_VERSION, kind='perplexity')
+    job = get_overview_jobs().submit(key, lambda: stream_ai_overview(location, hourly_slice))
+    if job is None:
+        METRICS.record('perplexity', PERPLEXITY_MODEL, fallback='queue_full')
+    st.session_state[f"overview_job_{model_key}"] = (key, job)
+
+def current_overview_job(location, hourly_slice, model_key):
+    """(started, job) for the panel's AI overview of this forecast; started is False if there is none."""
+    key, job = st.session_state.get(f"overview_job_{model_key}", (None, None))
+    if key is None or key != overview_key(location, hourly_slice, PROMPT_VERSION, kind='perplexity'):
+        return False, None
+    return True, job
+
+def overview_job_running(model_key):
+    _, job = st.session_state.get(f"overview_job_{model_key}", (None, None))
+    return job is not None and not job.done
+
+def display_overview_job(job, location, hourly_slice):
+    """AI text when the job is done, partial text while it streams, the local overview past its deadline."""
+    if job is None:
+        st.caption("⏳ AI overviews are busy right now; showing the local overview.")
+        text = build_local_overview(location, hourly_slice)
+    elif job.done:
+        text = job.text if job.error is None else f"AI overview failed: {job.error}"
+    elif job.expired:
+        if not st.session_state.get(f"overview_deadline_{job.key}"):
+            st.session_state[f"overview_deadline_{job.key}"] = True  # Count each fallback once
+            METRICS.record('perplexity', PERPLEXITY_MODEL, fallback='deadline')
+        st.caption("⏳ The AI overview is taking a while; showing the local overview until it's ready.")
+        text = build_local_overview(location, hourly_slice)
     else:
-        temp_c = convert_temp(temperature, to_celsius=True)
-        temp_display = f"{temp_c:.1f}°C"
-    
-    st.markdown(f"<div class='temperature'>{temp_display}</div>", unsafe_allow_html=True)
-    
-    # Conditions
-    st.markdown(f"<h3 style='text-align: center; color: #bbb; margin-top: 10px; margin-bottom: 20px;'>{conditions}</h3>", unsafe_allow_html=True)
-    
-    # Sun times display (sunrise, sunset, first/last light)
-    display_sun_times(weather_data)
-    
-    # Daily Outlook - using Visual Crossing API
-    outlook = get_visual_crossing_outlook(location['latitude'], location['longitude'])
-    
-    if outlook:
-        st.markdown(f"""
-        <div style='background: linear-gradient(135deg, rgba(100, 65, 165, 0.2) 0%, rgba(42, 159, 255, 0.2) 100%);
-                    border-left: 4px solid #4A90E2;
-                    padding: 15px 20px;
-                    border-radius: 10px;
-                    margin: 20px auto;
-                    max-width: 700px;
-                    box-shadow: 0 4px 6px rgba(0,0,0,0.2);'>
-            <div style='font-size: 14px; font-weight: 600; color: #4A90E2; margin-bottom: 8px; text-transform: uppercase; letter-spacing: 1px;'>
-                📅 Today's Outlook
-            </div>
-            <div style='font-size: 16px; color: #e0e0e0; line-height: 1.6;'>
-                {outlook}
-            </div>
-        </div>
-        """, unsafe_allow_html=True)
-    
-    # 🌐 Web-Based AI Weather Overview (Perplexity)
+        text = (job.text + " ▌") if job.chunks else "🌐 Generating web-based AI overview with real-time weather intelligence..."
+    st.markdown(OVERVIEW_BOX(text), unsafe_allow_html=True)
+
+def display_overview_panel(location, weather_data, model_key):
+    """AI/local overview panel as a fragment; it polls while an AI overview is being generated."""
+    polling = overview_job_running(model_key)
+    st.fragment(run_every=OVERVIEW_POLL_SECONDS if polling else None)(overview_panel)(
+        location, weather_data, model_key, polling
+    )
+
+def overview_panel(location, weather_data, model_key, polling):
+    """Body of the overview panel; its widgets rerun only this fragment."""
     with st.expander("🌐 Web-Based AI Weather Overview", expanded=False):
         mode = st.selectbox(
             "Overview mode",
@@ -2200,74 +1514,81 @@ def display_weather(location, weather_data, model_key='default'):
         )
         if weather_data.get('hourly'):
             hourly = weather_data['hourly']
-            # Determine start_idx similar to hourly forecast logic
-            all_times = hourly.get('time', [])
-            start_idx = 0
-            if all_times:
-                try:
-                    # Use location timezone if available
-                    tzname = weather_data.get('timezone', 'UTC')
-                    # Fallback to naive matching: find the first time >= now
-                    now_iso = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0).isoformat(timespec='minutes')
-                    for i, t in enumerate(all_times):
-                        if t >= now_iso:
-                            start_idx = i
-                            break
-                except Exception:
-                    start_idx = 0
+            start_idx = current_hour_index(hourly.get('time', []), weather_data.get('utc_offset_seconds', 0))
             hourly_slice = build_hourly_summary(hourly, start_idx, hours_to_show=48)
             if st.button("Generate Overview", key=f"overview_{model_key}"):
-                with st.spinner("🌐 Generating web-based AI overview with real-time weather intelligence..."):
-                    if mode.startswith("Web-Based AI"):
-                        ai_text = generate_ai_overview(location, hourly_slice)
-                    else:
-                        # Local detailed overview without AI
-                        def _local_only(location, slice_):
-                            if not slice_:
-                                return "Local overview unavailable: missing hourly data."
-                            city = location.get('city', 'Unknown')
-                            region = location.get('region', '')
-                            country = location.get('country', '')
-                            window = slice_[:24]
-                            temps = [h.get('temp_f') for h in window if h.get('temp_f') is not None]
-                            t0 = temps[0] if temps else None
-                            tmin = min(temps) if temps else None
-                            tmax = max(temps) if temps else None
-                            precip_hours = []
-                            from datetime import datetime
-                            for h in window:
-                                prob = h.get('precip_prob') or 0
-                                amt = h.get('precip_mm') or 0.0
-                                if prob >= 25 or amt >= 0.5:
-                                    try:
-                                        dt = datetime.fromisoformat(h.get('time').replace('Z','+00:00'))
-                                        label = dt.strftime('%-I %p')
-                                    except Exception:
-                                        label = h.get('time')
-                                    precip_hours.append(f"{label} ({int(prob)}% / {round(amt,2)} mm)")
-                            total_mm = round(sum([(h.get('precip_mm') or 0.0) for h in window]), 2)
-                            pmax = int(max([(h.get('precip_prob') or 0) for h in window]))
-                            lines = []
-                            lines.append(f"Detailed overview for {city}, {region}, {country}:")
-                            if t0 is not None:
-                                lines.append(f"- Temps: start ~{t0}°F; range {tmin}–{tmax}°F today.")
-                            else:
-                                lines.append("- Temps: data unavailable.")
-                            lines.append(f"- Precipitation: max chance ~{pmax}%; total ~{total_mm} mm over the day.")
-                            if precip_hours:
-                                lines.append("- Likely precip hours: " + ", ".join(precip_hours[:12]) + ("…" if len(precip_hours) > 12 else ""))
-                            else:
-                                lines.append("- No significant precipitation expected based on current data.")
-                            return "\n".join(lines)
-                        ai_text = _local_only(location, hourly_slice)
-                    st.markdown(f"<div style='background: rgba(255,255,255,0.05); padding: 15px; border-radius: 10px; border: 1px solid rgba(255,255,255,0.1); color:#e0e0e0;'>"+ai_text+"</div>", unsafe_allow_html=True)
+                if mode.startswith("Web-Based AI"):
+                    # Generated in the background; a full rerun makes this panel start polling
+                    start_ai_overview(location, hourly_slice, model_key)
+                    st.rerun()
+                # Local detailed overview without AI
+                st.session_state.pop(f"overview_job_{model_key}", None)
+                st.markdown(OVERVIEW_BOX(build_local_brief(location, hourly_slice)), unsafe_allow_html=True)
+            started, job = current_overview_job(location, hourly_slice, model_key)
+            if started and mode.startswith("Web-Based AI"):
+                display_overview_job(job, location, hourly_slice)
+                if polling and (job is None or job.done):
+                    st.rerun()  # Finished: stop polling
         else:
             st.write("Hourly data unavailable.")
 
-    # Check for upcoming precipitation
-    precip_alert = check_precipitation_soon(weather_data)
+def display_precip_banner(weather_data, location):
+    """Upcoming precipitation banner as a fragment; it polls until the radar nowcast arrives."""
+    pending = not prefetch_radar_nowcast(location).done()
+    st.fragment(run_every=RADAR_NOWCAST_POLL_SECONDS if pending else None)(precip_banner)(
+        weather_data, location, pending
+    )
+
+def precip_banner(weather_data, location, pending):
+    """Body of the precipitation banner (hourly/15-minute forecast and radar)."""
+    if pending and prefetch_radar_nowcast(location).done():
+        st.rerun()  # Nowcast finished: render with it and stop polling
+    precip_alert = check_precipitation_soon(weather_data, location)
+    if not precip_alert:
+        return
+    minutes = precip_alert['minutes']
+    prob = precip_alert['probability']
+    precip_type = precip_alert['type']
+    precip_emoji = precip_alert['emoji']
+    color_start = precip_alert['color_start']
+    color_end = precip_alert['color_end']
+    
+    if precip_alert.get('source') == 'radar':
+        detail = f"On radar: {precip_alert['dbz']} dBZ cells moving {precip_alert['speed_kmh']:.0f} km/h"
+    else:
+        detail = f"{prob}% probability"
     
-    # Debug: Show precipitation forecast data (you can remove this later)
+    if minutes < 60:
+        time_str = f"{minutes} minutes"
+    else:
+        hours = minutes // 60
+        time_str = f"{hours} hour{'s' if hours > 1 else ''}"
+    
+    st.markdown(f"""
+    <div style='background: linear-gradient(135deg, {color_start} 0%, {color_end} 100%); 
+                padding: 15px; border-radius: 15px; text-align: center; 
+                margin: 20px auto; max-width: 500px; 
+                box-shadow: 0 4px 15px rgba(255, 107, 107, 0.4);
+                animation: pulse 2s ease-in-out infinite;'>
+        <div style='font-size: 32px; margin-bottom: 5px;'>{precip_emoji}</div>
+        <div style='font-size: 18px; font-weight: bold; color: white;'>
+            {precip_type} Expected in {time_str}
+        </div>
+        <div style='font-size: 14px; color: rgba(255,255,255,0.9); margin-top: 5px;'>
+            {detail}
+        </div>
+    </div>
+    <style>
+    @keyframes pulse {{
+        0%, 100% {{ transform: scale(1); }}
+        50% {{ transform: scale(1.02); }}
+    }}
+    </style>
+    """, unsafe_allow_html=True)
+
+@st.fragment
+def display_precip_debug(weather_data):
+    """Debug list of the next 12 hourly precipitation probabilities."""
     if weather_data.get('hourly'):
         with st.expander("🔍 Debug: Precipitation Forecast (next 12 hours)", expanded=False):
             hourly = weather_data['hourly']
@@ -2275,25 +1596,25 @@ def display_weather(location, weather_data, model_key='default'):
                 # Find current hour index using timezone-aware comparison
                 all_times = hourly.get('time', [])
                 start_idx = 0
-                
+
                 if all_times:
                     try:
                         # Get the timezone from the API response
                         api_timezone = weather_data.get('timezone', 'UTC')
-                        
+
                         try:
                             from zoneinfo import ZoneInfo
                             tz = ZoneInfo(api_timezone)
                             now_local = datetime.now(tz).replace(minute=0, second=0, microsecond=0)
-                            
+
                             for i, time_str in enumerate(all_times):
                                 dt_naive = datetime.fromisoformat(time_str)
                                 dt_aware = dt_naive.replace(tzinfo=tz)
-                                
+
                                 if dt_aware >= now_local:
                                     start_idx = i
                                     break
-                                    
+
                         except ImportError:
                             # Fallback without zoneinfo
                             for i, time_str in enumerate(all_times):
@@ -2303,11 +1624,11 @@ def display_weather(location, weather_data, model_key='default'):
                                     break
                     except:
                         start_idx = 0
-                
+
                 # Get next 12 hours starting from current hour
                 probs = hourly['precipitation_probability'][start_idx:start_idx+12]
                 times = all_times[start_idx:start_idx+12]
-                
+
                 st.write("**Precipitation Probabilities:**")
                 for i, (time_str, prob) in enumerate(zip(times, probs)):
                     # Show all hours, even if probability is 0 or None
@@ -2316,20 +1637,45 @@ def display_weather(location, weather_data, model_key='default'):
                         time_only = dt.strftime("%I:%M %p")  # Format as 12-hour time
                     except:
                         time_only = time_str.split('T')[1] if 'T' in time_str else time_str
-                    
+
                     # Display probability, defaulting to 0% if None
                     prob_display = f"{prob}%" if prob is not None else "0%"
                     st.write(f"- {time_only}: {prob_display}")
-    
-    # Debug: Weather Alerts Status
+
+@st.fragment
+def display_ai_metrics():
+    """Admin view of AI overview calls: latency, tokens, estimated cost, cache hits and fallbacks."""
+    with st.expander("📈 Admin: AI Usage & Cost", expanded=False):
+        rows = METRICS.summary()
+        if not rows:
+            st.write("No AI calls recorded since the app started.")
+            return
+        calls = sum(r['calls'] for r in rows)
+        tokens = sum(r['prompt_tokens'] + r['completion_tokens'] for r in rows)
+        cols = st.columns(3)
+        cols[0].metric("AI calls", calls)
+        cols[1].metric("Tokens", f"{tokens:,}")
+        cols[2].metric("Estimated cost", f"${sum(r['cost_usd'] for r in rows):.4f}")
+        st.dataframe(rows, use_container_width=True, hide_index=True)
+        st.caption("Latency excludes cache hits. Costs use ai_metrics.PRICES (no per-request search fees).")
+        cols = st.columns(3)
+        cols[0].download_button("⬇️ JSON", METRICS.to_json(), "ai_metrics.json", "application/json")
+        cols[1].download_button("⬇️ CSV", METRICS.to_csv(), "ai_metrics.csv", "text/csv")
+        if cols[2].button("Clear", key="ai_metrics_clear"):
+            METRICS.clear()
+            st.rerun(scope="fragment")
+
+@st.fragment
+def display_alerts_debug(location):
+    """Debug view of the NWS alert lookup for this location."""
     country = location.get('country', '').lower()
     is_us_location = any(us_name in country for us_name in ['united states', 'usa', 'us'])
-    
+
     with st.expander("🚨 Debug: Weather Alerts Status", expanded=False):
         st.write(f"**Location Country:** {location.get('country')}")
         st.write(f"**Is US Location:** {is_us_location}")
         st.write(f"**Coordinates:** {location['latitude']}, {location['longitude']}")
-        
+
         if is_us_location:
             st.write("**Checking NWS for alerts...**")
             test_alerts = get_weather_alerts(location['latitude'], location['longitude'])
@@ -2344,43 +1690,101 @@ def display_weather(location, weather_data, model_key='default'):
             st.warning("⚠️ Weather alerts only available for US locations.")
             st.write("NWS API only covers United States and territories.")
 
+def display_weather(location, weather_data, model_key='default'):
+    """Display weather information.
     
-    if precip_alert:
-        minutes = precip_alert['minutes']
-        prob = precip_alert['probability']
-        precip_type = precip_alert['type']
-        precip_emoji = precip_alert['emoji']
-        color_start = precip_alert['color_start']
-        color_end = precip_alert['color_end']
-        
-        if minutes < 60:
-            time_str = f"{minutes} minutes"
-        else:
-            hours = minutes // 60
-            time_str = f"{hours} hour{'s' if hours > 1 else ''}"
-        
+    Args:
+        location: Location dictionary
+        weather_data: Weather data from API
+        model_key: Unique key for this model instance (prevents widget ID conflicts in tabs)
+    """
+    current = weather_data.get('current', {})
+    temperature = current.get('temperature_2m')
+    humidity = current.get('relative_humidity_2m')
+    wind_speed = current.get('wind_speed_10m')
+    weather_code = current.get('weather_code')
+    current_time = current.get('time')  # Get current time from API
+    conditions = get_weather_description(weather_code)
+    # Radar nowcast runs while the rest of the page renders
+    prefetch_radar_nowcast(location)
+    # Night/day from the location's actual sunrise/sunset
+    is_night_now = night_flags([current_time], weather_data, location.get('latitude'), location.get('longitude'))[0] if current_time else None
+    emoji = get_weather_emoji(conditions, current_time, is_night=is_night_now)
+    
+    # Location header
+    st.markdown(f"<h1 style='text-align: center; color: #e0e0e0; margin-bottom: 5px; margin-top: 0px;'>{location['city']}</h1>", unsafe_allow_html=True)
+    st.markdown(f"<p style='text-align: center; color: #aaa; margin-top: 0px; margin-bottom: 10px;'>{location['region']}, {location['country']}</p>", unsafe_allow_html=True)
+    
+    # Weather Alerts (NWS for US locations)
+    # Check for US location using multiple possible country name formats
+    country = location.get('country', '').lower()
+    is_us_location = any(us_name in country for us_name in ['united states', 'usa', 'us'])
+    
+    if is_us_location or country == 'united states':
+        alerts = get_weather_alerts(location['latitude'], location['longitude'])
+        if alerts:
+            st.markdown("<br>", unsafe_allow_html=True)
+            display_weather_alerts(alerts)
+            st.markdown("<br>", unsafe_allow_html=True)
+    
+    # Weather icon
+    st.markdown(f"<div class='weather-icon'>{emoji}</div>", unsafe_allow_html=True)
+    
+    # Temperature display
+    if st.session_state.unit_temp == 'F':
+        temp_display = f"{temperature:.1f}°F"
+    else:
+        temp_c = convert_temp(temperature, to_celsius=True)
+        temp_display = f"{temp_c:.1f}°C"
+    
+    st.markdown(f"<div class='temperature'>{temp_display}</div>", unsafe_allow_html=True)
+    
+    # Conditions
+    st.markdown(f"<h3 style='text-align: center; color: #bbb; margin-top: 10px; margin-bottom: 20px;'>{conditions}</h3>", unsafe_allow_html=True)
+    
+    # Today's high against the climate normal (precomputed, no history fetch)
+    display_normal_comparison(weather_data, location['latitude'], location['longitude'])
+    
+    # Sun times display (sunrise, sunset, first/last light)
+    display_sun_times(weather_data, location['latitude'], location['longitude'])
+    
+    # Daily Outlook - using Visual Crossing API
+    outlook = get_visual_crossing_outlook(location['latitude'], location['longitude'])
+    
+    if outlook:
         st.markdown(f"""
-        <div style='background: linear-gradient(135deg, {color_start} 0%, {color_end} 100%); 
-                    padding: 15px; border-radius: 15px; text-align: center; 
-                    margin: 20px auto; max-width: 500px; 
-                    box-shadow: 0 4px 15px rgba(255, 107, 107, 0.4);
-                    animation: pulse 2s ease-in-out infinite;'>
-            <div style='font-size: 32px; margin-bottom: 5px;'>{precip_emoji}</div>
-            <div style='font-size: 18px; font-weight: bold; color: white;'>
-                {precip_type} Expected in {time_str}
+        <div style='background: linear-gradient(135deg, rgba(100, 65, 165, 0.2) 0%, rgba(42, 159, 255, 0.2) 100%);
+                    border-left: 4px solid #4A90E2;
+                    padding: 15px 20px;
+                    border-radius: 10px;
+                    margin: 20px auto;
+                    max-width: 700px;
+                    box-shadow: 0 4px 6px rgba(0,0,0,0.2);'>
+            <div style='font-size: 14px; font-weight: 600; color: #4A90E2; margin-bottom: 8px; text-transform: uppercase; letter-spacing: 1px;'>
+                📅 Today's Outlook
             </div>
-            <div style='font-size: 14px; color: rgba(255,255,255,0.9); margin-top: 5px;'>
-                {prob}% probability
+            <div style='font-size: 16px; color: #e0e0e0; line-height: 1.6;'>
+                {outlook}
             </div>
         </div>
-        <style>
-        @keyframes pulse {{
-            0%, 100% {{ transform: scale(1); }}
-            50% {{ transform: scale(1.02); }}
-        }}
-        </style>
         """, unsafe_allow_html=True)
     
+    # 🌐 Web-Based AI Weather Overview (Perplexity) - reruns on its own
+    display_overview_panel(location, weather_data, model_key)
+
+    # Debug: Show precipitation forecast data (you can remove this later)
+    display_precip_debug(weather_data)
+    
+    # Debug: Weather Alerts Status
+    display_alerts_debug(location)
+
+    # Admin: AI call latency, tokens and cost (set AI_METRICS_PANEL=1)
+    if os.environ.get('AI_METRICS_PANEL'):
+        display_ai_metrics()
+    
+    # Precipitation banner; fills in the radar onset when the nowcast arrives
+    display_precip_banner(weather_data, location)
+    
     # Details cards
     col1, col2 = st.columns(2)
     
@@ -2415,10 +1819,6 @@ def display_weather(location, weather_data, model_key='default'):
     if weather_data.get('hourly'):
         hourly = weather_data['hourly']
         all_times = hourly.get('time', [])
-        all_temps = hourly.get('temperature_2m', [])
-        all_weather_codes = hourly.get('weather_code', [])
-        all_precip_probs = hourly.get('precipitation_probability', [])
-        
         
         # Find current hour index
         # The API with timezone='auto' returns times in the location's local timezone
@@ -2465,148 +1865,13 @@ def display_weather(location, weather_data, model_key='default'):
                 # Ultimate fallback: start from index 0
                 start_idx = 0
         
-        # Get 72 hours (3 days) starting from current hour
-        hours_to_show = 72
-        times = all_times[start_idx:start_idx+hours_to_show]
-        temps = all_temps[start_idx:start_idx+hours_to_show] if all_temps else []
-        weather_codes = all_weather_codes[start_idx:start_idx+hours_to_show] if all_weather_codes else []
-        precip_probs = all_precip_probs[start_idx:start_idx+hours_to_show] if all_precip_probs else []
-        
-        # Get precipitation amounts (in mm from API)
-        all_precip_amounts = hourly.get('precipitation', [])
-        precip_amounts = all_precip_amounts[start_idx:start_idx+hours_to_show] if all_precip_amounts else []
-        
-        # Create scrollable horizontal forecast
-        hourly_cards = []
-        last_day = None  # Track day changes for labels
-        
-        for idx in range(len(times)):
-            try:
-                # Parse time (handles timezone from API response)
-                dt = datetime.fromisoformat(times[idx])
-                
-                # Check if we've crossed into a new day
-                current_day = dt.strftime("%A")  # Full day name (e.g., "Monday")
-                show_day_label = (current_day != last_day)
-                last_day = current_day
-                
-                # Show "Now" for first hour, day label for new days, otherwise time
-                if idx == 0:
-                    time_str = "Now"
-                    day_label = ""
-                elif show_day_label and idx > 0:
-                    # Show day name for first hour of each new day
-                    time_str = dt.strftime("%I%p").lstrip('0')  # "2PM" format
-                    day_label = f"<div style='font-size: 10px; color: #888; margin-bottom: 2px;'>{current_day[:3]}</div>"  # "Mon"
-                else:
-                    time_str = dt.strftime("%I%p").lstrip('0')  # "2PM" format
-                    day_label = ""
-                
-                # Get temperature
-                if idx < len(temps):
-                    temp = temps[idx]
-                    if st.session_state.unit_temp == 'C':
-                        temp = convert_temp(temp, to_celsius=True)
-                        temp_str = f"{temp:.0f}°"
-                    else:
-                        temp_str = f"{temp:.0f}°"
-                else:
-                    temp_str = "N/A"
-                
-                # Get weather emoji (time-aware for night/day)
-                weather_emoji = "🌤️"
-                if idx < len(weather_codes):
-                    w_desc = get_weather_description(weather_codes[idx])
-                    # Pass the time string for night/day detection
-                    time_for_emoji = times[idx] if idx < len(times) else None
-                    weather_emoji = get_weather_emoji(w_desc, time_for_emoji)
-                
-                # Get precipitation probability and amount
-                precip_str = ""
-                prob_value = precip_probs[idx] if idx < len(precip_probs) and precip_probs[idx] is not None else 0
-                
-                # Get precipitation amount (convert from mm to inches if needed)
-                precip_amount = 0
-                if idx < len(precip_amounts) and precip_amounts[idx] is not None:
-                    precip_amount = precip_amounts[idx]
-                
-                # API returns in mm, convert to inches: 1 mm = 0.0393701 inches
-                precip_amount_in = precip_amount * 0.0393701
-                
-                # Always show probability, and show amount when probability > 0
-                if prob_value > 0:
-                    # Show probability and amount (even if 0.00")
-                    precip_str = f"""<div style='font-size: 13px; color: #64b5f6; margin-top: 5px; line-height: 1.6;'>
-                        💧 {prob_value:.0f}%<br>
-                        <span style='font-size: 12px; color: #87CEEB; font-weight: 500;'>{precip_amount_in:.2f}"</span>
-                    </div>"""
-                else:
-                    # No precipitation expected
-                    precip_str = f"<div style='font-size: 13px; color: #64b5f6; margin-top: 5px;'>💧 {prob_value:.0f}%</div>"
-                
-                hourly_cards.append(f"""
-                    <div style='background: rgba(30, 30, 45, 0.6); 
-                                padding: 18px 15px 20px 15px; 
-                                border-radius: 12px; 
-                                text-align: center;
-                                border: 1px solid rgba(100, 100, 150, 0.2);
-                                min-width: 110px;
-                                flex-shrink: 0;
-                                margin-right: 12px;'>
-                        {day_label}
-                        <div style='font-size: 12px; color: #aaa; margin-bottom: 8px; font-weight: {"bold" if idx == 0 else "normal"};'>{time_str}</div>
-                        <div style='font-size: 36px; margin: 10px 0;'>{weather_emoji}</div>
-                        <div style='font-size: 22px; font-weight: bold; color: #e0e0e0; margin-bottom: 8px;'>{temp_str}</div>
-                        {precip_str}
-                    </div>
-                """)
-            except Exception as e:
-                continue
-        
-        # Display scrollable container using components.html for proper rendering
-        html_content = f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <style>
-                body {{ 
-                    margin: 0; 
-                    padding: 0; 
-                    background: transparent;
-                    font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
-                }}
-                .hourly-container {{
-                    overflow-x: auto; 
-                    display: flex; 
-                    padding: 10px 0;
-                    scrollbar-width: thin;
-                    scrollbar-color: rgba(100, 100, 150, 0.5) rgba(30, 30, 45, 0.3);
-                }}
-                .hourly-container::-webkit-scrollbar {{
-                    height: 8px;
-                }}
-                .hourly-container::-webkit-scrollbar-track {{
-                    background: rgba(30, 30, 45, 0.3);
-                    border-radius: 10px;
-                }}
-                .hourly-container::-webkit-scrollbar-thumb {{
-                    background: rgba(100, 100, 150, 0.5);
-                    border-radius: 10px;
-                }}
-                .hourly-container::-webkit-scrollbar-thumb:hover {{
-                    background: rgba(100, 100, 150, 0.7);
-                }}
-            </style>
-        </head>
-        <body>
-            <div class='hourly-container'>
-                {"".join(hourly_cards)}
-            </div>
-        </body>
-        </html>
-        """
-        
-        components.html(html_content, height=250, scrolling=False)
+        # Packed once per (dataset, unit, start hour); the browser renders the cards
+        fingerprint = weather_fingerprint(weather_data)
+        payload = hourly_strip_payload(
+            fingerprint, st.session_state.unit_temp, start_idx,
+            location.get('latitude'), location.get('longitude'), weather_data
+        )
+        hourly_strip(payload, f"{fingerprint}:{st.session_state.unit_temp}:{start_idx}", key=f"hourly_strip_{model_key}")
     
     # Coordinates
     st.markdown(f"""
@@ -2623,19 +1888,94 @@ def display_weather(location, weather_data, model_key='default'):
     st.markdown("<br>", unsafe_allow_html=True)
     col1, col2, col3 = st.columns(3)
     
+    # Units change every panel, so the toggles flip state in a callback and let the
+    # click's own rerun redraw the page (data and hourly strips come from the cache)
     with col1:
-        if st.button("°F ⇄ °C", key=f"temp_toggle_{model_key}"):
-            st.session_state.unit_temp = 'C' if st.session_state.unit_temp == 'F' else 'F'
-            st.rerun()
+        st.button("°F ⇄ °C", key=f"temp_toggle_{model_key}", on_click=toggle_temp_unit)
     
     with col2:
-        if st.button("mph ⇄ km/h", key=f"wind_toggle_{model_key}"):
-            st.session_state.unit_wind = 'kmh' if st.session_state.unit_wind == 'mph' else 'mph'
-            st.rerun()
+        st.button("mph ⇄ km/h", key=f"wind_toggle_{model_key}", on_click=toggle_wind_unit)
     
     with col3:
-        if st.button("🔄 Refresh", key=f"refresh_{model_key}"):
-            st.rerun()
+        st.button("🔄 Refresh", key=f"refresh_{model_key}", on_click=refresh_weather_data)
+
+# Model tabs and their captions, in display order
+MODEL_TABS = {
+    "📊 Best Match (Auto)": "",
+    "🇪🇺 ECMWF (European)": "ECMWF IFS 0.25° - European Centre for Medium-Range Weather Forecasts (High accuracy, global coverage)",
+    "🇺🇸 GFS (NOAA)": "GFS - NOAA Global Forecast System (Best for North America, 4x daily updates)",
+    "🇩🇪 ICON (German)": "ICON - German Weather Service (High resolution, updated 4x daily)",
+    "🌤️ Visual Crossing": "Visual Crossing - Professional weather API with natural language descriptions and detailed hourly forecasts",
+    "🤝 Consensus": "Consensus - ECMWF, GFS, ICON and Visual Crossing aligned hour by hour, with the spread between them",
+    "🎲 Ensemble": "Ensemble - Dozens of perturbed model runs (ECMWF ENS, GEFS) showing the range of likely outcomes",
+}
+MODEL_TAB_SOURCES = {
+    "🇪🇺 ECMWF (European)": ('ECMWF', 'ecmwf'),
+    "🇺🇸 GFS (NOAA)": ('GFS', 'gfs'),
+    "🇩🇪 ICON (German)": ('ICON', 'icon'),
+    "🌤️ Visual Crossing": ('Visual Crossing', 'visual_crossing'),
+}
+# Consensus model name -> Open-Meteo model (None = Visual Crossing)
+MODEL_SOURCES = {
+    'ECMWF': 'ecmwf_ifs025',
+    'GFS': 'gfs_global',
+    'ICON': 'icon_global',
+    'Visual Crossing': None,
+}
+
+@st.cache_resource(show_spinner=False)
+def get_prefetch_executor():
+    """Small shared thread pool that warms the forecast caches in the background."""
+    return ThreadPoolExecutor(max_workers=4, thread_name_prefix="prefetch")
+
+def prefetch_models(location):
+    """Start background fetches of every model for a location (once per location per session).
+
+    The workers call the cached fetchers, so a finished prefetch is a cache hit
+    when its tab is opened. Returns {model name: Future}.
+    """
+    key = (location['latitude'], location['longitude'])
+    prefetched = st.session_state.setdefault('prefetch', {})
+    futures = prefetched.get(key)
+    if futures is None:
+        executor = get_prefetch_executor()
+        futures = {}
+        for name, model in MODEL_SOURCES.items():
+            if model:
+                futures[name] = executor.submit(fetch_weather, key[0], key[1], model)
+            else:
+                api_key = get_visual_crossing_api_key()
+                if api_key:
+                    futures[name] = executor.submit(fetch_visual_crossing_timeline, key[0], key[1], api_key)
+        prefetched.clear()  # Only the current location is worth keeping
+        prefetched[key] = futures
+    return futures
+
+def load_model_data(location, name, timeout=20):
+    """Data for one model, waiting for its background prefetch instead of fetching twice."""
+    future = st.session_state.get('prefetch', {}).get((location['latitude'], location['longitude']), {}).get(name)
+    if future is not None:
+        wait([future], timeout=timeout)
+    model = MODEL_SOURCES[name]
+    if model is None:
+        return get_visual_crossing_forecast(location['latitude'], location['longitude'])
+    return get_weather(location['latitude'], location['longitude'], model=model)
+
+def available_consensus(location, weather_data):
+    """Consensus over the models whose prefetch has already finished (never blocks).
+
+    Returns (consensus, start time), or None until at least two models are ready.
+    """
+    futures = prefetch_models(location)
+    ready = {
+        name: load_model_data(location, name)
+        for name, future in futures.items()
+        if future.done() and future.exception() is None
+    }
+    ready = {name: data for name, data in ready.items() if data}
+    if len(ready) < 2:
+        return None
+    return build_consensus(ready), consensus_start_time(weather_data)
 
 def main():
     # Sidebar
@@ -2769,67 +2109,56 @@ def main():
             st.markdown("### 🌐 Weather Model Comparison")
             st.markdown("<p style='color: #aaa; font-size: 0.9em; margin-bottom: 20px;'>Compare forecasts from different global weather models</p>", unsafe_allow_html=True)
             
-            tab1, tab2, tab3, tab4, tab5 = st.tabs([
-                "📊 Best Match (Auto)", 
-                "🇪🇺 ECMWF (European)", 
-                "🇺🇸 GFS (NOAA)", 
-                "🇩🇪 ICON (German)",
-                "🌤️ Visual Crossing"
-            ])
-            
-            with tab1:
-                display_weather(location, weather_data, model_key='best_match')
-            
-            with tab2:
-                st.markdown("<p style='color: #888; font-size: 0.85em; font-style: italic;'>ECMWF IFS 0.25° - European Centre for Medium-Range Weather Forecasts (High accuracy, global coverage)</p>", unsafe_allow_html=True)
-                with st.spinner("Loading ECMWF model data..."):
-                    ecmwf_data = get_weather(location['latitude'], location['longitude'], model='ecmwf_ifs025')
-                    if ecmwf_data:
-                        display_weather(location, ecmwf_data, model_key='ecmwf')
-                    else:
-                        st.error("Unable to load ECMWF model data")
-            
-            with tab3:
-                st.markdown("<p style='color: #888; font-size: 0.85em; font-style: italic;'>GFS - NOAA Global Forecast System (Best for North America, 4x daily updates)</p>", unsafe_allow_html=True)
-                with st.spinner("Loading GFS model data..."):
-                    gfs_data = get_weather(location['latitude'], location['longitude'], model='gfs_global')
-                    if gfs_data:
-                        display_weather(location, gfs_data, model_key='gfs')
-                    else:
-                        st.error("Unable to load GFS model data")
+            # Other models download in the background while the selected one renders
+            prefetch_models(location)
+            consensus = available_consensus(location, weather_data)
+            if consensus:
+                display_consensus_banner(*consensus)
             
-            with tab4:
-                st.markdown("<p style='color: #888; font-size: 0.85em; font-style: italic;'>ICON - German Weather Service (High resolution, updated 4x daily)</p>", unsafe_allow_html=True)
-                with st.spinner("Loading ICON model data..."):
-                    icon_data = get_weather(location['latitude'], location['longitude'], model='icon_global')
-                    if icon_data:
-                        display_weather(location, icon_data, model_key='icon')
-                    else:
-                        st.error("Unable to load ICON model data")
+            # Lazy tabs: only the selected tab is fetched and rendered
+            model_tab = st.radio("Weather model", list(MODEL_TABS), horizontal=True,
+                                 key="model_tab", label_visibility="collapsed")
             
-            with tab5:
-                st.markdown("<p style='color: #888; font-size: 0.85em; font-style: italic;'>Visual Crossing - Professional weather API with natural language descriptions and detailed hourly forecasts</p>", unsafe_allow_html=True)
-                with st.spinner("Loading Visual Crossing data..."):
-                    vc_data = get_visual_crossing_forecast(location['latitude'], location['longitude'])
-                    if vc_data:
-                        display_weather(location, vc_data, model_key='visual_crossing')
+            if model_tab == "📊 Best Match (Auto)":
+                display_weather(location, weather_data, model_key='best_match')
+            elif model_tab == "🤝 Consensus":
+                st.markdown(f"<p style='color: #888; font-size: 0.85em; font-style: italic;'>{MODEL_TABS[model_tab]}</p>", unsafe_allow_html=True)
+                with st.spinner("Loading model data..."):
+                    model_data = {name: load_model_data(location, name) for name in MODEL_SOURCES}
+                display_consensus(location, build_consensus(model_data), consensus_start_time(weather_data))
+            elif model_tab == "🎲 Ensemble":
+                st.markdown(f"<p style='color: #888; font-size: 0.85em; font-style: italic;'>{MODEL_TABS[model_tab]}</p>", unsafe_allow_html=True)
+                with st.spinner("Loading ensemble data..."):
+                    bands = get_ensemble_bands(location['latitude'], location['longitude'])
+                    if bands:
+                        display_ensemble(location, bands)
                     else:
-                        st.error("Unable to load Visual Crossing data")
+                        st.error("Unable to load ensemble data")
+            else:
+                name, model_key = MODEL_TAB_SOURCES[model_tab]
+                st.markdown(f"<p style='color: #888; font-size: 0.85em; font-style: italic;'>{MODEL_TABS[model_tab]}</p>", unsafe_allow_html=True)
+                with st.spinner(f"Loading {name} data..."):
+                    data = load_model_data(location, name)
+                if data:
+                    display_weather(location, data, model_key=model_key)
+                elif name == 'Visual Crossing':
+                    st.error("Unable to load Visual Crossing data")
+                else:
+                    st.error(f"Unable to load {name} model data")
             
             # Add spacing before radar
             st.markdown("<br><br>", unsafe_allow_html=True)
             
-            # Display radar with tabs at bottom (outside weather model tabs, always visible)
+            # Display radar below the model tabs (always visible); only the selected map is embedded
             st.markdown("### 🗺️ Weather Radar")
-            radar_tab1, radar_tab2, radar_tab3 = st.tabs(["�️ Multi-Layer Radar", "�🌧️ RainViewer Radar", "🌤️ Visual Crossing Map"])
+            radar_tab = st.radio("Radar", ["🗺️ Multi-Layer Radar", "🌧️ RainViewer Radar", "🌤️ Visual Crossing Map"],
+                                 horizontal=True, key="radar_tab", label_visibility="collapsed")
             
-            with radar_tab1:
+            if radar_tab == "🗺️ Multi-Layer Radar":
                 display_windy_radar(location)
-            
-            with radar_tab2:
+            elif radar_tab == "🌧️ RainViewer Radar":
                 display_radar(location)
-            
-            with radar_tab3:
+            else:
                 display_visual_crossing_radar(location)
         else:
             st.error("Could not fetch weather data. Please try again.")